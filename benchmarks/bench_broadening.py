@@ -0,0 +1,98 @@
+"""
+Benchmark the vectorized, windowed and FFT broadening paths against the
+per-excitation Python loop GenerateSpectrum used before, and batched
+broadening of many molecules against one call per molecule.
+
+    python -m benchmarks.bench_broadening
+"""
+
+import time
+from itertools import product
+
+import numpy as np
+
+from src.toddgpt.tools.broadening import broaden, broaden_batch
+
+
+def loop_broaden(energy, osc_strength, grid, sigma=5.0):
+    output = np.zeros(len(grid))
+    for i, en in enumerate(energy):
+        gauss = np.exp(-((grid - 1240 / en) ** 2) / (2 * sigma**2)) / (
+            sigma * np.sqrt(2 * np.pi)
+        )
+        output += gauss * osc_strength[i]
+    return output
+
+
+def best_of(func, repeat=3):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    rng = np.random.default_rng(0)
+    print(
+        f"{'lines':>7} {'grid':>6} {'loop (ms)':>10} {'direct (ms)':>12} "
+        f"{'windowed (ms)':>14} {'fft (ms)':>9} {'direct':>7} {'windowed':>9} "
+        f"{'fft':>7} {'fft err':>8}"
+    )
+    for (n_samples, n_roots), n_grid in product(
+        [(100, 10), (1000, 10), (1000, 30)], [551, 5001]
+    ):
+        energy = rng.uniform(3.5, 9.0, n_samples * n_roots)
+        osc = rng.random(len(energy))
+        grid = np.linspace(100, 350, n_grid)
+        reference = broaden(energy, osc, grid, method="direct")
+        fft = broaden(energy, osc, grid, method="fft")
+        error = np.abs(fft - reference).max() / reference.max()
+        t_loop = best_of(lambda: loop_broaden(energy, osc, grid))
+        t_direct = best_of(lambda: broaden(energy, osc, grid, method="direct"))
+        t_windowed = best_of(lambda: broaden(energy, osc, grid, method="windowed"))
+        t_fft = best_of(lambda: broaden(energy, osc, grid, method="fft"))
+        print(
+            f"{len(energy):>7} {n_grid:>6} {1e3 * t_loop:>10.1f} {1e3 * t_direct:>12.1f} "
+            f"{1e3 * t_windowed:>14.1f} {1e3 * t_fft:>9.2f} {t_loop / t_direct:>6.1f}x "
+            f"{t_loop / t_windowed:>8.1f}x {t_loop / t_fft:>6.0f}x {error:>8.1e}"
+        )
+
+    # Windowed cost follows the lines, not the grid, on a wide grid
+    energy = rng.uniform(3.5, 9.0, 1000)
+    osc = rng.random(len(energy))
+    print(
+        f"\n{'grid (50-1000 nm)':>18} {'direct (ms)':>12} {'windowed (ms)':>14} "
+        f"{'speedup':>8}"
+    )
+    for n_grid in [1_000, 10_000, 100_000]:
+        grid = np.linspace(50, 1000, n_grid)
+        t_direct = best_of(lambda: broaden(energy, osc, grid, method="direct"))
+        t_windowed = best_of(lambda: broaden(energy, osc, grid, method="windowed"))
+        print(
+            f"{n_grid:>18} {1e3 * t_direct:>12.1f} {1e3 * t_windowed:>14.1f} "
+            f"{t_direct / t_windowed:>7.1f}x"
+        )
+
+    # Many molecules: one broaden call each against a single batched pass
+    print(
+        f"\n{'molecules':>10} {'grid':>6} {'per molecule (ms)':>18} "
+        f"{'batch (ms)':>11} {'speedup':>8}"
+    )
+    for n_molecules, n_grid in product([100, 1000], [551, 2001]):
+        sticks = [
+            (str(i), rng.uniform(3.5, 9.0, n), rng.random(n))
+            for i, n in enumerate(rng.integers(1, 100, n_molecules))
+        ]
+        grid = np.linspace(100, 350, n_grid)
+        t_loop = best_of(lambda: [broaden(e, o, grid) for _, e, o in sticks])
+        t_batch = best_of(lambda: broaden_batch(sticks, grid))
+        print(
+            f"{n_molecules:>10} {n_grid:>6} {1e3 * t_loop:>18.1f} "
+            f"{1e3 * t_batch:>11.1f} {t_loop / t_batch:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+"""
+Benchmark the streaming TeraChem excited state parsers against the previous
+whole-file regex parsers on multi-MB synthetic outputs.
+
+    python -m benchmarks.bench_parsers
+"""
+
+import re
+import tempfile
+import time
+from itertools import product
+from pathlib import Path
+
+from src.toddgpt.parsers.parse_hhtda import extract_energy_data as stream_hhtda
+from src.toddgpt.parsers.parse_wpbe import extract_energy_data as stream_wpbe
+from tests.tc_outputs import SCF_ITERATION, random_output
+
+HHTDA_PATTERN = r"Root\s+Mult\.\s+Total Energy \(a.u.\)\s+Ex\. Energy \(a.u.\)\s+Ex\. Energy \(eV\)\s+Ex\. Energy \(nm\)\s+Osc\. \(a.u.\)\s+[-=]+\n((?:\s+\d+\s+\w+\s+[-+]?\d+\.\d+([ ]+[-+]?\d+\.\d+){0,5}\n?)+)"
+WPBE_PATTERN = r"Final Excited State Results:\n\n\s*Root\s+Total Energy \(a.u.\)\s+Ex\. Energy \(eV\)\s+Osc\. \(a.u.\)\s+< S\^2 >\s+Max CI Coeff\.\s+Excitation\n-+\n((?:\s+\d+\s+[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s+\d+\s+->\s+\d+\s+:\s+\w+\s+->\s+\w+\n?)+)"
+
+
+def regex_hhtda(output_file):
+    with open(output_file, "r") as file:
+        content = file.read()
+    energy_data = []
+    for match in re.findall(HHTDA_PATTERN, content):
+        sublist = []
+        for term in match[0].strip().split():
+            if term.isdigit() and sublist:
+                energy_data.append(
+                    [float(x) if "." in x else int(x) for x in sublist if x != "singlet"]
+                )
+                sublist = []
+            sublist.append(term)
+        if sublist:
+            energy_data.append(
+                [float(x) if "." in x else int(x) for x in sublist if x != "singlet"]
+            )
+    return energy_data
+
+
+def regex_wpbe(output_file):
+    with open(output_file, "r") as file:
+        content = file.read()
+    return [
+        term.split()
+        for match in re.findall(WPBE_PATTERN, content)
+        for term in match.strip().splitlines()
+    ]
+
+
+def best_of(func, path, repeat=5):
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(path)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main():
+    print(
+        f"{'method':>6} {'table':>7} {'size (MB)':>10} {'regex (ms)':>11} "
+        f"{'stream (ms)':>12} {'speedup':>8}"
+    )
+    with tempfile.TemporaryDirectory() as tmp:
+        for method, regex_parser, stream_parser in [
+            ("hhtda", regex_hhtda, stream_hhtda),
+            ("wpbe", regex_wpbe, stream_wpbe),
+        ]:
+            for n_scf, table in product([1_000, 20_000, 100_000], ["end", "middle"]):
+                path = Path(tmp) / f"{method}_{n_scf}_{table}.out"
+                if table == "end":
+                    output = random_output(method, n_roots=50, n_scf=n_scf)[0]
+                else:
+                    # Results table followed by as much output again
+                    output = random_output(method, n_roots=50, n_scf=n_scf // 2)[0]
+                    output += "".join(
+                        SCF_ITERATION.format(it=it) for it in range(n_scf // 2)
+                    )
+                path.write_text(output)
+                size = path.stat().st_size / 1e6
+                assert len(regex_parser(path)) == len(stream_parser(path))
+                t_regex = best_of(regex_parser, path)
+                t_stream = best_of(stream_parser, path)
+                print(
+                    f"{method:>6} {table:>7} {size:>10.1f} {1e3 * t_regex:>11.2f} "
+                    f"{1e3 * t_stream:>12.2f} {t_regex / t_stream:>7.1f}x"
+                )
+
+
+if __name__ == "__main__":
+    main()
@@ -11,7 +11,8 @@ def main():
         print("OPENAI_API_KEY not found in environment variables.")
         raise ValueError("Please set the OPENAI_API_KEY environment variable.")
 
-    agent = Agent("openai", api_key)
+    # Set TODDGPT_LLM_CACHE to a file path to replay identical LLM calls from disk
+    agent = Agent("openai", api_key, llm_cache=os.environ.get("TODDGPT_LLM_CACHE"))
     executor = agent.get_executor()
 
     while True:
@@ -60,6 +61,8 @@ def main():
         # Print the result
         print("Agent's response:")
         print(result["output"])
+        if agent.cache is not None:
+            print(f"LLM cache: {agent.cache.stats()}")
         print("\n")  # Add a newline for better readability between interactions
         conversation = input("Please enter your question (or 'exit' to quit): ")
         if conversation.lower() == "exit":
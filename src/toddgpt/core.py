@@ -10,6 +10,7 @@ from langchain_openai import ChatOpenAI
 # from toddgpt.parsers.terachem import TerachemParser
 # # from toddgpt.tools.interface import Interface
 from .prompt import SYSTEM_PROMPT
+from .llm_cache import SQLiteLLMCache
 
 # from toddgpt.tools.geom_reporter import GeomReporter
 from .tools.grab_geom import extract_molecule_from_pubchem, read_geometry_from_file
@@ -20,14 +21,21 @@ from .tools.spectra import (
     OptimizeMolecule,
     RunHessian,
     RunTDDFT,
+    RunMultiFidelityTDDFT,
     CheckGeneratedSpectra,
+    LookupExcitations,
+    CompareSpectra,
+    OverlaySpectra,
 )
 from .tools.experimental_data import MaxWavelengthTool
 from .tools.update_tc_input import UpdateTcInput
 from .tools.search_lit import SearchLit
+from .tools.artifacts import ReadArtifact
+from .pipeline import RunUVVisPipeline
 from langchain_core.messages import AIMessage
 from langchain_core.runnables import Runnable
 import json
+import logging
 
 # from langchain_community.tools import MoveFileTool
 # from langchain_core.tools import MoveFileTool
@@ -56,12 +64,30 @@ class Agent:
         api_url=None,
         api_model="gpt-4o-2024-08-06",
         api_temperature=0,
+        llm_cache=None,
     ):
         self.api_provider = api_provider
         self.api_key = api_key
         self.api_url = api_url
         self.api_model = api_model
         self.api_temperature = api_temperature
+        # Path of an on-disk LLM response cache, off by default
+        self.llm_cache = llm_cache
+        self.cache = None
+
+    def get_cache(self):
+        """
+        The response cache, only at temperature 0 where a replayed response is
+        what the model would have returned.
+        """
+        if self.llm_cache is None:
+            return None
+        if self.api_temperature != 0:
+            logging.info("LLM cache disabled: temperature is not 0")
+            return None
+        if self.cache is None:
+            self.cache = SQLiteLLMCache(self.llm_cache)
+        return self.cache
 
     def get_executor(self):
         if self.api_provider.lower() == "openai":
@@ -71,11 +97,16 @@ class Agent:
                     f"Unsupported OpenAI model: {self.api_model}. Supported models are: {', '.join(supported_models)}"
                 )
 
+            cache = self.get_cache()
             llm = ChatOpenAI(
                 model=self.api_model,
                 temperature=self.api_temperature,
                 openai_api_key=self.api_key,
                 base_url=self.api_url,
+                cache=cache,
+                # AgentExecutor streams the model, and streamed calls bypass
+                # the cache, so stream only without one
+                disable_streaming=cache is not None,
             )
             prompt = ChatPromptTemplate.from_messages(
                 [
@@ -99,17 +130,23 @@ class Agent:
         # ]
         tools = [
             # read_geometry_from_file,
+            RunUVVisPipeline(),
             extract_molecule_from_pubchem,
+            LookupExcitations(),
             RunTerachem(),
             MaceCalculator(),
             OptimizeMolecule(),
             RunHessian(),
             RunTDDFT(),
+            RunMultiFidelityTDDFT(),
             GenerateSpectrum(),
             CheckGeneratedSpectra(),
             MaxWavelengthTool(),
+            CompareSpectra(),
+            OverlaySpectra(),
             SearchLit(),
             UpdateTcInput(),
+            ReadArtifact(),
         ]
         llm_with_tools = llm.bind_tools(tools)
         agent = (
@@ -0,0 +1,87 @@
+import hashlib
+import logging
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import Any, Optional
+
+from langchain_core.caches import RETURN_VAL_TYPE, BaseCache
+from langchain_core.load import dumps, loads
+
+DEFAULT_LLM_CACHE_PATH = Path("./scratch/llm_cache.sqlite")
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS llm_cache (
+    key TEXT PRIMARY KEY,
+    llm_string TEXT NOT NULL,
+    prompt TEXT NOT NULL,
+    response TEXT NOT NULL,
+    created REAL NOT NULL DEFAULT (julianday('now'))
+);
+"""
+
+
+def cache_key(prompt: str, llm_string: str) -> str:
+    """
+    Hash of the serialized prompt messages and the model configuration, which
+    holds the model name, temperature and the schemas of the bound tools.
+    """
+    return hashlib.sha256(f"{llm_string}\0{prompt}".encode()).hexdigest()
+
+
+class SQLiteLLMCache(BaseCache):
+    """
+    On-disk cache of chat model responses. Only deterministic (temperature 0)
+    calls should use it: a hit replays the stored response without a request.
+    """
+
+    def __init__(self, path: Path = DEFAULT_LLM_CACHE_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self.connect()) as conn:
+            conn.executescript(SCHEMA)
+        self.hits = 0
+        self.misses = 0
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def lookup(self, prompt: str, llm_string: str) -> Optional[RETURN_VAL_TYPE]:
+        with closing(self.connect()) as conn:
+            row = conn.execute(
+                "SELECT response FROM llm_cache WHERE key = ?",
+                (cache_key(prompt, llm_string),),
+            ).fetchone()
+        if row is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        logging.info(f"LLM cache hit ({self.hits} hits, {self.misses} misses)")
+        return loads(row[0])
+
+    def update(self, prompt: str, llm_string: str, return_val: RETURN_VAL_TYPE):
+        with closing(self.connect()) as conn, conn:
+            conn.execute(
+                "INSERT OR REPLACE INTO llm_cache (key, llm_string, prompt, response) "
+                "VALUES (?, ?, ?, ?)",
+                (cache_key(prompt, llm_string), llm_string, prompt, dumps(return_val)),
+            )
+
+    def clear(self, **kwargs: Any):
+        with closing(self.connect()) as conn, conn:
+            conn.execute("DELETE FROM llm_cache")
+        self.hits = self.misses = 0
+
+    def stats(self) -> dict:
+        """
+        Hits and misses of this session and the number of stored responses.
+        """
+        with closing(self.connect()) as conn:
+            (entries,) = conn.execute("SELECT COUNT(*) FROM llm_cache").fetchone()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "entries": entries,
+        }
@@ -0,0 +1,64 @@
+import re
+from pathlib import Path
+from typing import Iterable, Optional, Sequence
+
+import numpy as np
+
+HC_EV_NM = 1239.84193
+
+# One record per excited state. s2 is NaN when the output does not report < S^2 >.
+EXCITATION_DTYPE = np.dtype(
+    [
+        ("sample", np.int32),
+        ("root", np.int32),
+        ("total_energy", np.float64),
+        ("ex_energy_ev", np.float64),
+        ("ex_energy_nm", np.float64),
+        ("osc_strength", np.float64),
+        ("s2", np.float64),
+    ]
+)
+
+
+def sample_id(file) -> int:
+    """
+    Wigner sample index from an output name like x0012.out, or -1.
+    """
+    if not isinstance(file, (str, Path)):
+        return -1
+    match = re.search(r"(\d+)$", Path(file).stem)
+    return int(match.group(1)) if match else -1
+
+
+def make_excitations(
+    sample: int,
+    root: Sequence[int],
+    total_energy: Sequence[float],
+    ex_energy_ev: Sequence[float],
+    osc_strength: Sequence[float],
+    ex_energy_nm: Optional[Sequence[float]] = None,
+    s2: Optional[Sequence[float]] = None,
+) -> np.ndarray:
+    excitations = np.empty(len(root), dtype=EXCITATION_DTYPE)
+    excitations["sample"] = sample
+    excitations["root"] = root
+    excitations["total_energy"] = total_energy
+    excitations["ex_energy_ev"] = ex_energy_ev
+    excitations["ex_energy_nm"] = (
+        HC_EV_NM / np.asarray(ex_energy_ev, dtype=float)
+        if ex_energy_nm is None
+        else ex_energy_nm
+    )
+    excitations["osc_strength"] = osc_strength
+    excitations["s2"] = np.nan if s2 is None else s2
+    return excitations
+
+
+def concatenate_excitations(arrays: Iterable[np.ndarray]) -> np.ndarray:
+    """
+    Stack per-sample excitation arrays into one, copying each record once.
+    """
+    arrays = list(arrays)
+    if not arrays:
+        return np.empty(0, dtype=EXCITATION_DTYPE)
+    return np.concatenate(arrays)
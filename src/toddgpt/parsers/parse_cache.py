@@ -0,0 +1,87 @@
+import json
+import logging
+import os
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, List, Optional, Sequence, Union
+
+import numpy as np
+
+# Below this many files to parse, a process pool costs more than it saves
+MIN_FILES_FOR_POOL = 8
+SIDECAR_SUFFIX = ".json"
+
+
+def sidecar_path(file: Path) -> Path:
+    return file.with_name(file.name + SIDECAR_SUFFIX)
+
+
+def _cache_key(file: Path, parser: Callable) -> dict:
+    stat = file.stat()
+    return {
+        "path": str(file.resolve()),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "parser": f"{parser.__module__}.{parser.__name__}",
+    }
+
+
+def read_sidecar(
+    file: Path, parser: Callable
+) -> Optional[Union[list, np.ndarray]]:
+    """
+    Cached parse of file, or None if there is no sidecar or the file changed.
+    """
+    sidecar = sidecar_path(file)
+    if not sidecar.exists():
+        return None
+    try:
+        with open(sidecar, "r") as f:
+            cached = json.load(f)
+    except (OSError, ValueError):
+        return None
+    if cached.get("key") != _cache_key(file, parser):
+        return None
+    if "dtype" in cached:
+        dtype = np.dtype([tuple(field) for field in cached["dtype"]])
+        return np.array([tuple(record) for record in cached["data"]], dtype=dtype)
+    return cached["data"]
+
+
+def write_sidecar(file: Path, parser: Callable, data: Union[list, np.ndarray]):
+    sidecar = {"key": _cache_key(file, parser)}
+    if isinstance(data, np.ndarray):
+        # Structured arrays are stored as their dtype and a list of records
+        sidecar["dtype"] = data.dtype.descr
+    sidecar["data"] = data.tolist() if isinstance(data, np.ndarray) else data
+    with open(sidecar_path(file), "w") as f:
+        json.dump(sidecar, f)
+
+
+def parse_outputs(
+    files: Sequence[Union[str, Path]],
+    parser: Callable,
+    max_workers: Optional[int] = None,
+) -> List[Union[list, np.ndarray]]:
+    """
+    Parse every file with parser, in order. Results are cached in a sidecar next
+    to each file keyed by path, size and mtime, so only new or changed outputs are
+    parsed again. Files that need parsing are fanned out over a process pool.
+    """
+    files = [Path(file) for file in files]
+    results: List[Optional[Union[list, np.ndarray]]] = [read_sidecar(file, parser) for file in files]
+    misses = [i for i, data in enumerate(results) if data is None]
+    if not misses:
+        return results
+
+    logging.info(f"Parsing {len(misses)} of {len(files)} outputs")
+    if len(misses) >= MIN_FILES_FOR_POOL and (max_workers or os.cpu_count() or 1) > 1:
+        with ProcessPoolExecutor(max_workers=max_workers) as pool:
+            parsed = list(pool.map(parser, [files[i] for i in misses]))
+    else:
+        parsed = [parser(files[i]) for i in misses]
+
+    for i, data in zip(misses, parsed):
+        results[i] = data
+        write_sidecar(files[i], parser, data)
+    return results
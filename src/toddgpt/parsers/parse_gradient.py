@@ -0,0 +1,16 @@
+import re
+
+import numpy as np
+
+GRADIENT_PATTERN = r"dE/dX\s+dE/dY\s+dE/dZ\s*\n((?:\s*[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s*\n?)+)"
+
+
+def extract_gradient(stdout: str) -> np.ndarray:
+    """
+    Get the last nuclear gradient (natoms, 3) in Hartree/Bohr from TeraChem stdout.
+    """
+    matches = re.findall(GRADIENT_PATTERN, stdout)
+    if not matches:
+        raise ValueError("No gradient found in TeraChem output")
+    rows = [line.split() for line in matches[-1].strip().splitlines()]
+    return np.array(rows, dtype=float)
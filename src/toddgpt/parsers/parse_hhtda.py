@@ -1,44 +1,33 @@
-import re
-from pathlib import Path
-from typing import Union
+from typing import Optional
 
+import numpy as np
 
-def extract_energy_data(output_file):
-    with open(output_file, "r") as file:
-        content = file.read()
+from src.toddgpt.parsers.excitations import make_excitations, sample_id
+from src.toddgpt.parsers.parse_tc_stream import (
+    HHTDA_HEADER,
+    OutputSource,
+    open_output,
+    stream_results_table,
+)
+
+
+def extract_energy_data(output_file: OutputSource):
+    """
+    Rows of the hh-TDA results table as [root, total energy, ex. energy (a.u.),
+    ex. energy (eV), ex. energy (nm), osc.]. The ground state row only has the
+    root and total energy.
+    """
+    with open_output(output_file) as file:
+        rows = stream_results_table(file, HHTDA_HEADER)
 
-    # Regex to match the energy data section
-    pattern = r"Root\s+Mult\.\s+Total Energy \(a.u.\)\s+Ex\. Energy \(a.u.\)\s+Ex\. Energy \(eV\)\s+Ex\. Energy \(nm\)\s+Osc\. \(a.u.\)\s+[-=]+\n((?:\s+\d+\s+\w+\s+[-+]?\d+\.\d+([ ]+[-+]?\d+\.\d+){0,5}\n?)+)"
-    matches = re.findall(pattern, content)
     energy_data = []
-    for match in matches:
-        terms = match[0].strip().split()
-        sublist = []
-        for term in terms:
-            if (
-                term.isdigit() and sublist
-            ):  # If the term is an integer and sublist is not empty
-                energy_data.append(
-                    [
-                        float(x) if "." in x else int(x)
-                        for x in sublist
-                        if x not in ["singlet", "doublet"]
-                    ]
-                )  # Convert values to float or int, ignore non-numeric
-                sublist = []  # Reset sublist for the next group
-            sublist.append(term)  # Add the term to the current sublist
-        if sublist:  # Append the last sublist if it exists
-            energy_data.append(
-                [
-                    float(x) if "." in x else int(x)
-                    for x in sublist
-                    if x not in ["singlet", "doublet"]
-                ]
-            )  # Convert values to float or int, ignore non-numeric
+    for row in rows:
+        # Drop the multiplicity label in the second column
+        energy_data.append([int(row[0])] + [float(x) for x in row[2:]])
     return energy_data
 
 
-def get_uv_vis_data(file: Union[str, Path]):
+def get_uv_vis_data(file: OutputSource):
     """
     Get the UV-Vis data from the energy data.
     """
@@ -49,5 +38,22 @@ def get_uv_vis_data(file: Union[str, Path]):
     return uv_vis_data
 
 
+def get_excitations(file: OutputSource, sample: Optional[int] = None):
+    """
+    Excited states as a structured array with EXCITATION_DTYPE, from an output
+    file or stream. The sample id defaults to the number in the file name (-1
+    for in-memory output).
+    """
+    rows = np.array(extract_energy_data(file)[1:], dtype=float).reshape(-1, 6)
+    return make_excitations(
+        sample_id(file) if sample is None else sample,
+        root=rows[:, 0],
+        total_energy=rows[:, 1],
+        ex_energy_ev=rows[:, 3],
+        ex_energy_nm=rows[:, 4],
+        osc_strength=rows[:, 5],
+    )
+
+
 if __name__ == "__main__":
     print(get_uv_vis_data("scratch/hhtda/x0000.out"))
@@ -0,0 +1,94 @@
+import re
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Iterator, List, Pattern, TextIO, Union
+
+OutputSource = Union[str, Path, TextIO]
+
+SEPARATOR = re.compile(r"^\s*[-=]{5,}\s*$")
+
+# Line that opens each results table
+HHTDA_HEADER = re.compile(r"Root\s+Mult\.\s+Total Energy")
+WPBE_HEADER = re.compile(r"Final Excited State Results:")
+
+# Characters read per block while seeking the results table
+CHUNK_SIZE = 1 << 18
+# Longest header we might see split across two blocks
+HEADER_OVERLAP = 256
+
+# Parser states
+SEEK, HEADER, ROWS = range(3)
+
+
+@contextmanager
+def open_output(source: OutputSource) -> Iterator[TextIO]:
+    """
+    Open a TeraChem output given as a path or an open text stream. Wrap an
+    in-memory stdout, e.g. ProgramOutput.stdout, in io.StringIO.
+    """
+    if hasattr(source, "read"):
+        yield source
+    else:
+        with open(source, "r") as stream:
+            yield stream
+
+
+def stream_results_table(
+    stream: TextIO, header: Pattern, chunk_size: int = CHUNK_SIZE
+) -> List[List[str]]:
+    """
+    Single pass over a TeraChem output stream, returning the whitespace split rows
+    of the last results table opened by a line matching header, i.e. the final
+    results of outputs that print several.
+
+    While seeking, the stream is read in blocks searched by the regex engine; only
+    the lines from a header to the end of its table are looked at one by one. A
+    table is the header line, anything up to a dashed separator, then every line
+    starting with a root number.
+    """
+    state = SEEK
+    rows: List[List[str]] = []
+    table: List[List[str]] = []
+    buffer = ""
+    eof = False
+    while not eof:
+        block = stream.read(chunk_size)
+        eof = not block
+        buffer += block
+        # Walk the buffer from start; a partial last line or a header that may be
+        # split between blocks waits for the next block
+        start = 0
+        while True:
+            if state == SEEK:
+                match = header.search(buffer, start)
+                if match is None:
+                    start = max(start, len(buffer) - HEADER_OVERLAP)
+                    break
+                end = buffer.find("\n", match.end())
+                if end == -1 and not eof:
+                    start = match.start()
+                    break
+                # Skip the rest of the header line
+                start = len(buffer) if end == -1 else end + 1
+                state, rows = HEADER, []
+                continue
+            end = buffer.find("\n", start)
+            if end == -1:
+                if not eof or start >= len(buffer):
+                    break
+                end = len(buffer)
+            line = buffer[start:end]
+            tokens = line.split()
+            if state == HEADER:
+                if SEPARATOR.match(line):
+                    state = ROWS
+            elif tokens and tokens[0].isdigit():
+                rows.append(tokens)
+            elif rows or tokens:
+                # The table ended; this line may already open the next one
+                table, state = rows, SEEK
+                continue
+            start = end + 1
+        buffer = buffer[start:]
+    # A table still open at the end of the output is the last one
+    return table if state == SEEK else rows
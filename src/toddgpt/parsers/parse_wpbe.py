@@ -1,30 +1,32 @@
-import re
-from pathlib import Path
-from typing import Union
-
-def extract_energy_data(output_file):
-    with open(output_file, "r") as file:
-        content = file.read()
-
-        pattern = r"Final Excited State Results:\n\n\s*Root\s+Total Energy \(a.u.\)\s+Ex\. Energy \(eV\)\s+Osc\. \(a.u.\)\s+< S\^2 >\s+Max CI Coeff\.\s+Excitation\n-+\n((?:\s+\d+\s+[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s+[-+]?\d+\.\d+\s+\d+\s+->\s+\d+\s+:\s+\w+\s+->\s+\w+\n?)+)"
-        matches = re.findall(pattern, content)
-        excited_state_data = []
-        for match in matches:
-            terms = match.strip().splitlines()
-            for term in terms:
-                values = term.split()
-                excited_state_data.append({
-                    "root": int(values[0]),
-                    "total_energy": float(values[1]),
-                    "ex_energy_eV": float(values[2]),
-                    "oscillator_strength": float(values[3]),
-                    "squared_spin": float(values[4]),
-                    "max_ci_coeff": float(values[5]),
-                    "excitation": values[6:]
-                })
-        return excited_state_data
-
-def get_uv_vis_data(file: Union[str, Path]):
+from typing import Optional
+
+from src.toddgpt.parsers.excitations import make_excitations, sample_id
+from src.toddgpt.parsers.parse_tc_stream import (
+    WPBE_HEADER,
+    OutputSource,
+    open_output,
+    stream_results_table,
+)
+
+
+def extract_energy_data(output_file: OutputSource):
+    with open_output(output_file) as file:
+        rows = stream_results_table(file, WPBE_HEADER)
+
+    excited_state_data = []
+    for values in rows:
+        excited_state_data.append({
+            "root": int(values[0]),
+            "total_energy": float(values[1]),
+            "ex_energy_eV": float(values[2]),
+            "oscillator_strength": float(values[3]),
+            "squared_spin": float(values[4]),
+            "max_ci_coeff": float(values[5]),
+            "excitation": values[6:]
+        })
+    return excited_state_data
+
+def get_uv_vis_data(file: OutputSource):
     """
     Get the UV-Vis data from the energy data.
     """
@@ -35,5 +37,22 @@ def get_uv_vis_data(file: Union[str, Path]):
     return uv_vis_data
 
 
+def get_excitations(file: OutputSource, sample: Optional[int] = None):
+    """
+    Excited states as a structured array with EXCITATION_DTYPE, from an output
+    file or stream. The sample id defaults to the number in the file name (-1
+    for in-memory output).
+    """
+    energy_data = extract_energy_data(file)
+    return make_excitations(
+        sample_id(file) if sample is None else sample,
+        root=[state["root"] for state in energy_data],
+        total_energy=[state["total_energy"] for state in energy_data],
+        ex_energy_ev=[state["ex_energy_eV"] for state in energy_data],
+        osc_strength=[state["oscillator_strength"] for state in energy_data],
+        s2=[state["squared_spin"] for state in energy_data],
+    )
+
+
 if __name__ == "__main__":
     print(get_uv_vis_data("scratch/wpbe/x0000.out"))
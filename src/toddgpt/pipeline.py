@@ -0,0 +1,234 @@
+import logging
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Optional, Type, Union
+
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel, ConfigDict
+
+from .tools.bootstrap import DEFAULT_RESAMPLES
+from .tools.broadening import BroadeningParams
+from .tools.datatypes import AtomsDict
+from .tools.excitation_db import ExcitationDB
+from .tools.experimental_data import CALIBRATED_IMAGES, MaxWavelengthTool
+from .tools.experimental_spectra import ExperimentalSpectraStore
+from .tools.grab_geom import fetch_pubchem_geometry
+from .tools.molecule_registry import REGISTRY, resolve_molecule
+from .tools.spectra import (
+    GenerateSpectrum,
+    OptimizeMolecule,
+    RunHessian,
+    RunTDDFT,
+)
+from .tools.spectrum_comparison import compare_spectra
+from .tools.spectrum_data import Spectrum
+
+STAGES = ("pubchem", "mace", "optimize", "hessian", "tddft", "spectrum", "compare")
+
+
+class PipelineOptions(BaseModel):
+    """
+    Settings of every stage of the UV-Vis routine.
+    """
+
+    method: str = "hhtda"
+    params: BroadeningParams = BroadeningParams()
+    n_resamples: int = DEFAULT_RESAMPLES
+    parallel_hessian: bool = False
+    warm_start: bool = False
+    packing: bool = False
+    auto_roots: bool = False
+    # Skip straight to the spectrum when excitations are already stored
+    reuse: bool = True
+    render: bool = True
+
+
+class PipelineResult(BaseModel):
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    molecule: str
+    method: str
+    geometry: Optional[AtomsDict] = None
+    molecule_id: Optional[str] = None
+    spectrum: Optional[Spectrum] = None
+    comparison: Optional[dict] = None
+    paths: Dict[str, str] = {}
+    timings: Dict[str, float] = {}
+    skipped: List[str] = []
+
+    def summary(self) -> dict:
+        """
+        Compact result for the agent: no coordinates or arrays.
+        """
+        summary = {
+            "molecule": self.molecule,
+            "method": self.method,
+            "molecule_id": self.molecule_id,
+            "timings_s": {stage: round(t, 2) for stage, t in self.timings.items()},
+            "skipped": self.skipped,
+            "paths": self.paths,
+        }
+        if self.spectrum is not None:
+            summary["lambda_max_nm"] = self.spectrum.lambda_max_nm
+            if "lambda_max_ci_nm" in self.spectrum.summary:
+                summary["lambda_max_ci_nm"] = self.spectrum.summary["lambda_max_ci_nm"]
+        if self.comparison is not None:
+            summary["comparison"] = self.comparison
+        return summary
+
+
+class UVVisPipeline:
+    """
+    The UV-Vis routine of the system prompt run directly in Python: PubChem,
+    MACE pre-optimization, TeraChem optimization, Hessian and Wigner sampling,
+    TD-DFT, spectrum and comparison with experiment. Geometries and spectra
+    are passed between stages in memory and every stage is timed.
+    """
+
+    def __init__(self, options: Optional[PipelineOptions] = None):
+        self.options = options or PipelineOptions()
+
+    @contextmanager
+    def stage(self, name: str, result: PipelineResult):
+        logging.info(f"Pipeline stage {name} started")
+        start = time.perf_counter()
+        yield
+        result.timings[name] = time.perf_counter() - start
+        logging.info(f"Pipeline stage {name} took {result.timings[name]:.1f} s")
+
+    def run(
+        self, molecule: str, atoms_dict: Optional[AtomsDict] = None
+    ) -> PipelineResult:
+        """
+        Run every stage for molecule. With atoms_dict, the PubChem stage is
+        skipped and that geometry is used instead.
+        """
+        options = self.options
+        result = PipelineResult(molecule=molecule, method=options.method)
+        stored = options.reuse and ExcitationDB().runs(options.method, molecule)
+        if stored:
+            logging.info(f"Reusing stored {options.method} excitations for {molecule}")
+            result.skipped = list(STAGES[:5])
+        else:
+            if atoms_dict is None:
+                with self.stage("pubchem", result):
+                    atoms_dict = self.fetch(molecule)
+            else:
+                result.skipped.append("pubchem")
+            with self.stage("mace", result):
+                atoms_dict = self.pre_optimize(atoms_dict)
+            with self.stage("optimize", result):
+                atoms_dict = self.optimize(atoms_dict)
+            result.geometry = atoms_dict
+            # Registered so that follow-up tool calls can refer to it by ID
+            result.molecule_id = REGISTRY.register(atoms_dict, molecule, "pipeline").id
+            with self.stage("hessian", result):
+                RunHessian()._run(atoms_dict, parallel=options.parallel_hessian)
+            with self.stage("tddft", result):
+                RunTDDFT()._run(
+                    atoms_dict,
+                    options.method,
+                    warm_start=options.warm_start,
+                    packing=options.packing,
+                    auto_roots=options.auto_roots,
+                    molecule=molecule,
+                )
+
+        with self.stage("spectrum", result):
+            result.spectrum = self.spectrum(molecule, result)
+        with self.stage("compare", result):
+            result.comparison = self.compare(molecule, result.spectrum)
+        return result
+
+    def fetch(self, molecule: str) -> AtomsDict:
+        atoms_dict = fetch_pubchem_geometry(molecule)
+        if not isinstance(atoms_dict, AtomsDict):
+            raise ValueError(f"PubChem lookup of {molecule} failed: {atoms_dict}")
+        return atoms_dict
+
+    def pre_optimize(self, atoms_dict: AtomsDict) -> AtomsDict:
+        # MACE loads torch, so it is only imported when the stage runs
+        from .tools.mace_calc import MaceCalculator
+
+        _, minimized = MaceCalculator().minimize(atoms_dict)
+        return minimized
+
+    def optimize(self, atoms_dict: AtomsDict) -> AtomsDict:
+        return OptimizeMolecule().optimize(atoms_dict)
+
+    def spectrum(self, molecule: str, result: PipelineResult) -> Spectrum:
+        options = self.options
+        spectrum = GenerateSpectrum().compute_spectrum(
+            options.method, molecule, options.params, options.n_resamples
+        )
+        if spectrum is None:
+            raise ValueError(f"No {options.method} excitations stored for {molecule}")
+        result.paths.update(
+            {kind: str(path) for kind, path in spectrum.save().items()}
+        )
+        if options.render:
+            result.paths["png"] = str(spectrum.render())
+        return spectrum
+
+    def compare(self, molecule: str, spectrum: Spectrum) -> Optional[dict]:
+        """
+        Score the spectrum against the stored experimental spectrum, digitizing
+        a calibrated plot first when the store has none. None without data.
+        """
+        store = ExperimentalSpectraStore()
+        experiment = store.spectrum(molecule)
+        if experiment is None and molecule.strip().lower() in CALIBRATED_IMAGES:
+            MaxWavelengthTool()._run(molecule)
+            experiment = ExperimentalSpectraStore().spectrum(molecule)
+        if experiment is None:
+            logging.info(f"No experimental spectrum of {molecule} to compare with")
+            return None
+        (comparison,) = compare_spectra(
+            spectrum.grid, spectrum.intensity, *experiment, labels=[spectrum.label]
+        )
+        return comparison
+
+
+class RunUVVisPipelineInput(BaseModel):
+    molecule: str
+    method: str = "hhtda"
+    atoms_dict: Optional[Union[AtomsDict, str]] = None
+    parallel_hessian: bool = False
+    warm_start: bool = False
+    packing: bool = False
+    auto_roots: bool = False
+    reuse: bool = True
+
+
+class RunUVVisPipeline(BaseTool):
+    name: str = "run_uv_vis_pipeline"
+    description: str = (
+        "Use this tool to run the whole UV-Vis routine for a molecule in one call: PubChem, MACE, optimization, "
+        "Hessian and Wigner sampling, TD-DFT with 'method', spectrum and comparison with the experimental spectrum. "
+        "Pass a molecule ID or AtomsDict as 'atoms_dict' to start from that geometry instead of PubChem. Stored results are reused unless 'reuse' is false. "
+        "Returns lambda max, the comparison with experiment, the spectrum files and the time taken by each stage."
+    )
+    args_schema: Type[BaseModel] = RunUVVisPipelineInput
+
+    def _run(
+        self,
+        molecule: str,
+        method: str = "hhtda",
+        atoms_dict: Optional[Union[AtomsDict, str]] = None,
+        parallel_hessian: bool = False,
+        warm_start: bool = False,
+        packing: bool = False,
+        auto_roots: bool = False,
+        reuse: bool = True,
+    ):
+        options = PipelineOptions(
+            method=method,
+            parallel_hessian=parallel_hessian,
+            warm_start=warm_start,
+            packing=packing,
+            auto_roots=auto_roots,
+            reuse=reuse,
+        )
+        if atoms_dict is not None:
+            atoms_dict = resolve_molecule(atoms_dict)
+        return UVVisPipeline(options).run(molecule, atoms_dict).summary()
@@ -0,0 +1,134 @@
+import hashlib
+import importlib
+import io
+import json
+import re
+from pathlib import Path
+from typing import Any, Optional, Type, Union
+
+import numpy as np
+from langchain_core.tools import BaseTool
+from pydantic import BaseModel
+
+from .datatypes import AtomsDict
+
+ARTIFACT_DIR = Path("./scratch/artifacts")
+HANDLE = re.compile(r"^artifact:([a-z_]+)/([0-9a-f]{12})$")
+# Longest text ReadArtifact returns to the agent
+DEFAULT_MAX_CHARS = 2000
+
+
+def is_handle(value: Any) -> bool:
+    return isinstance(value, str) and HANDLE.match(value.strip()) is not None
+
+
+class ArtifactStore:
+    """
+    Content-addressed store for large tool outputs. Tools save a payload under
+    a kind and hand the agent a short handle ("artifact:<kind>/<hash>") in place
+    of the payload; other tools load it back from disk by that handle.
+    """
+
+    def __init__(self, directory: Path = ARTIFACT_DIR):
+        self.directory = Path(directory)
+
+    def path(self, handle: str) -> Path:
+        match = HANDLE.match(handle.strip())
+        if match is None:
+            raise ValueError(f"Not an artifact handle: {handle}")
+        kind, digest = match.groups()
+        return self.directory / kind / digest
+
+    def save(self, kind: str, payload: Any) -> str:
+        if isinstance(payload, BaseModel):
+            cls = type(payload)
+            meta = {"format": "model", "type": f"{cls.__module__}.{cls.__qualname__}"}
+            data = payload.model_dump_json().encode()
+        elif isinstance(payload, np.ndarray):
+            meta = {"format": "npy"}
+            buffer = io.BytesIO()
+            np.save(buffer, payload)
+            data = buffer.getvalue()
+        elif isinstance(payload, str):
+            meta = {"format": "text"}
+            data = payload.encode()
+        else:
+            meta = {"format": "json"}
+            data = json.dumps(payload).encode()
+        digest = hashlib.sha256(data).hexdigest()[:12]
+        handle = f"artifact:{kind}/{digest}"
+        path = self.path(handle)
+        if not path.exists():
+            path.parent.mkdir(parents=True, exist_ok=True)
+            path.write_bytes(data)
+            path.with_suffix(".meta.json").write_text(json.dumps(meta))
+        return handle
+
+    def load(self, handle: str) -> Any:
+        path = self.path(handle)
+        if not path.exists():
+            raise ValueError(f"Unknown artifact {handle}")
+        meta = json.loads(path.with_suffix(".meta.json").read_text())
+        data = path.read_bytes()
+        if meta["format"] == "model":
+            module, _, name = meta["type"].rpartition(".")
+            cls = getattr(importlib.import_module(module), name)
+            return cls.model_validate_json(data)
+        if meta["format"] == "npy":
+            return np.load(io.BytesIO(data))
+        if meta["format"] == "text":
+            return data.decode()
+        return json.loads(data)
+
+
+def stash(kind: str, payload: Any, summary: dict) -> dict:
+    """
+    Save payload and return its handle with a short summary for the agent.
+    """
+    return {"artifact": ArtifactStore().save(kind, payload), **summary}
+
+
+def resolve_atoms_dict(atoms_dict: Union[AtomsDict, str]) -> AtomsDict:
+    """
+    The geometry behind a geometry artifact handle, or atoms_dict itself.
+    """
+    if isinstance(atoms_dict, AtomsDict):
+        return atoms_dict
+    geometry = ArtifactStore().load(atoms_dict)
+    if not isinstance(geometry, AtomsDict):
+        raise ValueError(f"{atoms_dict} is not a geometry")
+    return geometry
+
+
+class ReadArtifactInput(BaseModel):
+    handle: str
+    field: Optional[str] = None
+    max_chars: int = DEFAULT_MAX_CHARS
+
+
+class ReadArtifact(BaseTool):
+    name: str = "read_artifact"
+    description: str = (
+        "Use this tool to look inside an artifact handle returned by another tool, e.g. 'stdout' or 'traceback' "
+        "of a run_terachem artifact. Pass 'field' to read one attribute or key; long text is cut to its last 'max_chars' characters. "
+        "Pass handles of geometries directly as 'atoms_dict' to other tools instead of reading them."
+    )
+    args_schema: Type[BaseModel] = ReadArtifactInput
+
+    def _run(
+        self,
+        handle: str,
+        field: Optional[str] = None,
+        max_chars: int = DEFAULT_MAX_CHARS,
+    ) -> str:
+        payload = ArtifactStore().load(handle)
+        if field is not None:
+            if isinstance(payload, dict):
+                payload = payload[field]
+            else:
+                payload = getattr(payload, field)
+        if isinstance(payload, BaseModel):
+            text = payload.model_dump_json(indent=1)
+        else:
+            text = str(payload)
+        return text[-max_chars:]
@@ -0,0 +1,62 @@
+from typing import Optional, Tuple
+
+import numpy as np
+
+from .broadening import BroadeningParams, broaden_groups
+
+DEFAULT_RESAMPLES = 2000
+DEFAULT_CONFIDENCE = 0.95
+
+
+def sample_spectra(
+    excitations: np.ndarray,
+    grid: np.ndarray,
+    params: Optional[BroadeningParams] = None,
+    osc_scale: float = 1.0,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Broadened spectrum of every Wigner sample, shape (n_samples, len(grid)), and
+    the sample ids of the rows. Oscillator strengths are divided by osc_scale.
+    """
+    samples, groups = np.unique(excitations["sample"], return_inverse=True)
+    spectra = broaden_groups(
+        excitations["ex_energy_ev"],
+        excitations["osc_strength"] / osc_scale,
+        groups,
+        len(samples),
+        grid,
+        params,
+    )
+    return samples, spectra
+
+
+def bootstrap_bands(
+    spectra: np.ndarray,
+    grid: np.ndarray,
+    n_resamples: int = DEFAULT_RESAMPLES,
+    confidence: float = DEFAULT_CONFIDENCE,
+    seed: Optional[int] = None,
+) -> dict:
+    """
+    Bootstrap confidence bands of the summed spectrum and of its lambda max by
+    resampling the rows of spectra (one per Wigner sample) with replacement.
+    All resamples are one (n_resamples, n_samples) @ (n_samples, n_grid) product.
+    """
+    n_samples = len(spectra)
+    rng = np.random.default_rng(seed)
+    counts = rng.multinomial(n_samples, np.full(n_samples, 1 / n_samples), n_resamples)
+    resampled = counts @ spectra
+    tail = (1 - confidence) / 2
+    lower, upper = np.quantile(resampled, [tail, 1 - tail], axis=0)
+    lambda_max = grid[np.argmax(resampled, axis=1)]
+    lambda_low, lambda_high = np.quantile(lambda_max, [tail, 1 - tail])
+    return {
+        "n_samples": int(n_samples),
+        "n_resamples": int(n_resamples),
+        "confidence": confidence,
+        "lower": lower,
+        "upper": upper,
+        "lambda_max_nm": float(grid[np.argmax(spectra.sum(axis=0))]),
+        "lambda_max_std_nm": float(lambda_max.std()),
+        "lambda_max_ci_nm": (float(lambda_low), float(lambda_high)),
+    }
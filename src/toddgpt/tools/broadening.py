@@ -0,0 +1,443 @@
+from typing import List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+from scipy.special import voigt_profile
+
+from src.toddgpt.parsers.excitations import HC_EV_NM
+from .root_count import DEFAULT_WINDOW_NM
+
+LINESHAPES = ("gaussian", "lorentzian", "voigt")
+DOMAINS = ("wavelength", "energy")
+# Default Gaussian standard deviation in each domain, nm or eV
+DEFAULT_SIGMA_NM = 5.0
+DEFAULT_SIGMA_EV = 0.15
+DEFAULT_GRID_POINTS = 551
+# Lines beyond this many widths from a grid point are left out of the FFT
+# padding: 1e-8 of the peak for a Gaussian, 4e-4 for a Lorentzian
+GAUSSIAN_CUTOFF = 6.0
+LORENTZIAN_CUTOFF = 50.0
+# Above this many lines "auto" bins and convolves instead of evaluating every
+# line on the grid
+FFT_MIN_LINES = 256
+# Uniform grid points per linewidth the FFT method bins onto
+FFT_POINTS_PER_WIDTH = 8
+# Automatic grids extend this many widths past the outermost bright lines, with
+# this many points per width
+GRID_PAD_WIDTHS = 4.0
+GRID_POINTS_PER_WIDTH = 5
+MIN_GRID_POINTS = 101
+MAX_GRID_POINTS = 20001
+# Lines weaker than this fraction of the brightest do not widen the grid
+GRID_MIN_INTENSITY = 1e-3
+# Lines evaluated at once by the direct method, to bound the memory of the
+# (lines, grid) array
+DIRECT_CHUNK = 256
+# Neighbouring lines the windowed method evaluates together on the grid points
+# that any of them reaches
+WINDOW_CHUNK = 256
+
+
+class BroadeningParams(BaseModel):
+    """
+    Lineshape and widths, in nm or eV depending on domain. None widths take the
+    defaults of broaden.
+    """
+
+    lineshape: str = "gaussian"
+    sigma: Optional[float] = None
+    gamma: Optional[float] = None
+    domain: str = "wavelength"
+
+
+def default_grid() -> np.ndarray:
+    return np.linspace(*DEFAULT_WINDOW_NM, DEFAULT_GRID_POINTS)
+
+
+def default_sigma(domain: str) -> float:
+    return DEFAULT_SIGMA_NM if domain == "wavelength" else DEFAULT_SIGMA_EV
+
+
+def profile(
+    x: np.ndarray, lineshape: str, sigma: float, gamma: float = 0.0
+) -> np.ndarray:
+    """
+    Unit-area lineshape centred at 0. sigma is the Gaussian standard deviation,
+    gamma the Lorentzian half width at half maximum.
+    """
+    if lineshape == "gaussian":
+        return np.exp(-(x**2) / (2 * sigma**2)) / (sigma * np.sqrt(2 * np.pi))
+    if lineshape == "lorentzian":
+        return gamma / (np.pi * (x**2 + gamma**2))
+    if lineshape == "voigt":
+        return voigt_profile(x, sigma, gamma)
+    raise ValueError(f"Unknown lineshape {lineshape}, expected one of {LINESHAPES}")
+
+
+def width(lineshape: str, sigma: float, gamma: float = 0.0) -> float:
+    """
+    Narrowest width parameter that shapes the line.
+    """
+    if lineshape == "gaussian":
+        return sigma
+    if lineshape == "lorentzian":
+        return gamma
+    return min(sigma, gamma)
+
+
+def cutoff(lineshape: str, sigma: float, gamma: float = 0.0) -> float:
+    """
+    Distance from a line beyond which its profile is negligible.
+    """
+    if lineshape == "gaussian":
+        return GAUSSIAN_CUTOFF * sigma
+    if lineshape == "lorentzian":
+        return LORENTZIAN_CUTOFF * gamma
+    return GAUSSIAN_CUTOFF * sigma + LORENTZIAN_CUTOFF * gamma
+
+
+def to_domain(values: np.ndarray, domain: str) -> np.ndarray:
+    """
+    Convert excitation energies (eV) or grid wavelengths (nm) to the other unit
+    when broadening in the other domain. The conversion is its own inverse.
+    """
+    if domain not in DOMAINS:
+        raise ValueError(f"Unknown domain {domain}, expected one of {DOMAINS}")
+    return HC_EV_NM / np.asarray(values, dtype=float)
+
+
+def broaden_direct(
+    positions: np.ndarray,
+    intensities: np.ndarray,
+    x: np.ndarray,
+    lineshape: str,
+    sigma: float,
+    gamma: float = 0.0,
+) -> np.ndarray:
+    """
+    Sum of every line's profile evaluated on x, a chunk of lines at a time.
+    """
+    output = np.zeros(len(x))
+    for start in range(0, len(positions), DIRECT_CHUNK):
+        stop = start + DIRECT_CHUNK
+        shapes = profile(
+            x[None, :] - positions[start:stop, None], lineshape, sigma, gamma
+        )
+        output += intensities[start:stop] @ shapes
+    return output
+
+
+def broaden_windowed(
+    positions: np.ndarray,
+    intensities: np.ndarray,
+    x: np.ndarray,
+    lineshape: str,
+    sigma: float,
+    gamma: float = 0.0,
+    groups: Optional[np.ndarray] = None,
+    n_groups: int = 1,
+) -> np.ndarray:
+    """
+    Evaluate each line only near the grid points within its cutoff, so cost
+    scales with the number of lines and the window size rather than the grid
+    size. Lines are sorted by position and taken WINDOW_CHUNK at a time; each
+    chunk is evaluated on the contiguous grid slice its lines reach and summed
+    into that slice with a matrix product, so a line also contributes just
+    past its cutoff when a neighbour reaches further. x may be non-uniform.
+    With groups (one index per line), returns one spectrum per group, shape
+    (n_groups, len(x)).
+    """
+    order = np.argsort(x)
+    x_sorted = x[order]
+    reach = cutoff(lineshape, sigma, gamma)
+    by_position = np.argsort(positions, kind="stable")
+    positions = positions[by_position]
+    intensities = intensities[by_position]
+    if groups is not None:
+        groups = np.asarray(groups)[by_position]
+    lower = np.searchsorted(x_sorted, positions - reach)
+    upper = np.searchsorted(x_sorted, positions + reach)
+    output = np.zeros((n_groups, len(x)))
+    for start in range(0, len(positions), WINDOW_CHUNK):
+        chunk = slice(start, start + WINDOW_CHUNK)
+        # Sorted positions make the window of a chunk the span of its ends
+        low, high = lower[chunk].min(), upper[chunk].max()
+        if high <= low:
+            continue
+        shapes = profile(
+            x_sorted[None, low:high] - positions[chunk, None], lineshape, sigma, gamma
+        )
+        if groups is None:
+            output[0, low:high] += intensities[chunk] @ shapes
+        else:
+            # One row of weights per group present in the chunk
+            members, row = np.unique(groups[chunk], return_inverse=True)
+            weights = np.zeros((len(members), len(row)))
+            weights[row, np.arange(len(row))] = intensities[chunk]
+            output[members, low:high] += weights @ shapes
+    unsorted = np.empty_like(output)
+    unsorted[:, order] = output
+    return unsorted if groups is not None else unsorted[0]
+
+
+def auto_grid(
+    energies_ev: Sequence[float],
+    intensities: Optional[Sequence[float]] = None,
+    params: Optional[BroadeningParams] = None,
+) -> np.ndarray:
+    """
+    Increasing wavelength grid covering every bright line plus a few linewidths,
+    with a spacing set by the linewidth. Grids for energy domain broadening are
+    uniform in energy.
+    """
+    params = params or BroadeningParams()
+    energies_ev = np.asarray(energies_ev, dtype=float)
+    if len(energies_ev) == 0:
+        return default_grid()
+    if intensities is not None:
+        intensities = np.abs(np.asarray(intensities, dtype=float))
+        bright = intensities >= GRID_MIN_INTENSITY * intensities.max()
+        if bright.any():
+            energies_ev = energies_ev[bright]
+    sigma = default_sigma(params.domain) if params.sigma is None else params.sigma
+    gamma = sigma if params.gamma is None else params.gamma
+    line_width = width(params.lineshape, sigma, gamma)
+    pad = GRID_PAD_WIDTHS * max(
+        sigma if params.lineshape != "lorentzian" else 0.0,
+        gamma if params.lineshape != "gaussian" else 0.0,
+    )
+
+    if params.domain == "wavelength":
+        positions = to_domain(energies_ev, params.domain)
+    else:
+        positions = energies_ev
+    low = max(positions.min() - pad, line_width)
+    high = positions.max() + pad
+    n_points = int(np.ceil((high - low) / line_width * GRID_POINTS_PER_WIDTH)) + 1
+    x = np.linspace(low, high, min(max(n_points, MIN_GRID_POINTS), MAX_GRID_POINTS))
+    if params.domain == "wavelength":
+        return x
+    return to_domain(x, params.domain)[::-1]
+
+
+def trim_spectrum(
+    grid: np.ndarray, intensity: np.ndarray, threshold: float = GRID_MIN_INTENSITY
+):
+    """
+    Cut a spectrum down to the part of the grid above threshold times its maximum.
+    """
+    if not intensity.any():
+        return grid, intensity
+    above = np.flatnonzero(intensity >= threshold * intensity.max())
+    keep = slice(above[0], above[-1] + 1)
+    return grid[keep], intensity[keep]
+
+
+def broaden_fft(
+    positions: np.ndarray,
+    intensities: np.ndarray,
+    x: np.ndarray,
+    lineshape: str,
+    sigma: float,
+    gamma: float = 0.0,
+    groups: Optional[np.ndarray] = None,
+    n_groups: int = 1,
+) -> np.ndarray:
+    """
+    Bin the lines onto a uniform grid padded by the lineshape cutoff, splitting
+    each line between its two nearest points, convolve with the lineshape by FFT
+    and interpolate onto x. Cost is O(lines + n log n) instead of O(lines * n).
+    With groups, every group is binned into its own row and all rows are
+    convolved together, shape (n_groups, len(x)).
+    """
+    order = np.argsort(x)
+    x_sorted = x[order]
+    dx = width(lineshape, sigma, gamma) / FFT_POINTS_PER_WIDTH
+    # Duplicate grid points share a value and do not set the spacing
+    spacing = np.diff(x_sorted)
+    spacing = spacing[spacing > 0]
+    if spacing.size:
+        dx = min(dx, spacing.min())
+    pad = cutoff(lineshape, sigma, gamma)
+    start = x_sorted[0] - pad
+    n = int(np.ceil((x_sorted[-1] + pad - start) / dx)) + 1
+
+    index = (positions - start) / dx
+    keep = (index >= 0) & (index < n - 1)
+    lower = np.floor(index[keep]).astype(int)
+    if groups is not None:
+        lower = lower + n * np.asarray(groups)[keep]
+    frac = index[keep] - np.floor(index[keep])
+    binned = np.bincount(lower, intensities[keep] * (1 - frac), minlength=n_groups * n)
+    binned += np.bincount(lower + 1, intensities[keep] * frac, minlength=n_groups * n)
+    binned = binned.reshape(n_groups, n)
+
+    half = int(np.ceil(pad / dx))
+    kernel = profile(dx * np.arange(-half, half + 1), lineshape, sigma, gamma)
+    size = n + len(kernel) - 1
+    convolved = np.fft.irfft(
+        np.fft.rfft(binned, size, axis=-1) * np.fft.rfft(kernel, size), size, axis=-1
+    )[:, half : half + n]
+    # Linear interpolation from the uniform grid onto x, shared by every row
+    point = np.clip((x_sorted - start) / dx, 0, n - 1)
+    left = np.minimum(np.floor(point).astype(int), n - 2)
+    weight = point - left
+    output = np.empty((n_groups, len(x)))
+    output[:, order] = (
+        convolved[:, left] * (1 - weight) + convolved[:, left + 1] * weight
+    )
+    return output if groups is not None else output[0]
+
+
+def domain_coordinates(
+    energies_ev: np.ndarray, grid_nm: np.ndarray, domain: str
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Line positions and grid points in the broadening domain.
+    """
+    if domain == "wavelength":
+        return to_domain(energies_ev, domain), grid_nm
+    return energies_ev, to_domain(grid_nm, domain)
+
+
+def broaden_groups(
+    energies_ev: Sequence[float],
+    intensities: Sequence[float],
+    groups: Sequence[int],
+    n_groups: int,
+    grid_nm: np.ndarray,
+    params: Optional[BroadeningParams] = None,
+    method: str = "windowed",
+) -> np.ndarray:
+    """
+    One broadened spectrum per group (e.g. Wigner sample) in a single windowed
+    or FFT pass, shape (n_groups, len(grid_nm)). groups holds each line's group
+    index.
+    """
+    params = params or BroadeningParams()
+    if params.lineshape not in LINESHAPES:
+        raise ValueError(
+            f"Unknown lineshape {params.lineshape}, expected one of {LINESHAPES}"
+        )
+    sigma = default_sigma(params.domain) if params.sigma is None else params.sigma
+    gamma = sigma if params.gamma is None else params.gamma
+    positions, x = domain_coordinates(
+        np.asarray(energies_ev, dtype=float),
+        np.asarray(grid_nm, dtype=float),
+        params.domain,
+    )
+    if method not in ("windowed", "fft"):
+        raise ValueError(f"Unknown broadening method {method}")
+    broaden_pass = broaden_fft if method == "fft" else broaden_windowed
+    return broaden_pass(
+        positions,
+        np.asarray(intensities, dtype=float),
+        x,
+        params.lineshape,
+        sigma,
+        gamma,
+        groups=np.asarray(groups, dtype=int),
+        n_groups=n_groups,
+    )
+
+
+def broaden(
+    energies_ev: Sequence[float],
+    intensities: Sequence[float],
+    grid_nm: np.ndarray,
+    lineshape: str = "gaussian",
+    sigma: Optional[float] = None,
+    gamma: Optional[float] = None,
+    domain: str = "wavelength",
+    method: str = "auto",
+) -> np.ndarray:
+    """
+    Broadened stick spectrum on a wavelength grid. Widths are in the units of
+    domain (nm or eV); sigma defaults to 5 nm or 0.15 eV and gamma to sigma.
+    method is "direct", "windowed", "fft" or "auto", which evaluates few lines
+    in their windows and bins and convolves many.
+    """
+    if lineshape not in LINESHAPES:
+        raise ValueError(f"Unknown lineshape {lineshape}, expected one of {LINESHAPES}")
+    energies_ev = np.asarray(energies_ev, dtype=float)
+    intensities = np.asarray(intensities, dtype=float)
+    grid_nm = np.asarray(grid_nm, dtype=float)
+    if len(energies_ev) == 0:
+        return np.zeros(len(grid_nm))
+    sigma = default_sigma(domain) if sigma is None else sigma
+    gamma = sigma if gamma is None else gamma
+
+    positions, x = domain_coordinates(energies_ev, grid_nm, domain)
+    if method == "auto":
+        method = "fft" if len(positions) >= FFT_MIN_LINES else "windowed"
+    if method == "windowed":
+        return broaden_windowed(positions, intensities, x, lineshape, sigma, gamma)
+    if method == "fft":
+        return broaden_fft(positions, intensities, x, lineshape, sigma, gamma)
+    if method == "direct":
+        return broaden_direct(positions, intensities, x, lineshape, sigma, gamma)
+    raise ValueError(f"Unknown broadening method {method}")
+
+
+class BatchSpectra(BaseModel):
+    """
+    Spectra of many molecules on one shared wavelength grid, one row per id.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    ids: List[str]
+    grid: np.ndarray
+    intensity: np.ndarray
+    lambda_max_nm: np.ndarray
+
+    def rank(self, target_nm: float) -> List[Tuple[str, float]]:
+        """
+        (id, lambda max) pairs ordered by distance of lambda max from target_nm.
+        Molecules without any intensity come last.
+        """
+        distance = np.abs(self.lambda_max_nm - target_nm)
+        distance = np.where(np.isnan(distance), np.inf, distance)
+        order = np.argsort(distance, kind="stable")
+        return [(self.ids[i], float(self.lambda_max_nm[i])) for i in order]
+
+
+def broaden_batch(
+    sticks: Sequence[Tuple[str, Sequence[float], Sequence[float]]],
+    grid_nm: Optional[np.ndarray] = None,
+    params: Optional[BroadeningParams] = None,
+    method: str = "auto",
+) -> BatchSpectra:
+    """
+    Broaden the stick spectra (id, energies in eV, oscillator strengths) of many
+    molecules, with any number of lines each, in a single pass. Without grid_nm
+    the shared grid covers the bright lines of every molecule. method is
+    "windowed", "fft" or "auto", which convolves all rows by FFT once there are
+    many lines. Molecules without intensity get a lambda max of nan.
+    """
+    ids = [str(stick[0]) for stick in sticks]
+    energies = [np.asarray(stick[1], dtype=float).ravel() for stick in sticks]
+    intensities = [np.asarray(stick[2], dtype=float).ravel() for stick in sticks]
+    counts = np.array([len(energy) for energy in energies], dtype=int)
+    groups = np.repeat(np.arange(len(sticks)), counts)
+    energies = np.concatenate(energies) if len(sticks) else np.zeros(0)
+    intensities = np.concatenate(intensities) if len(sticks) else np.zeros(0)
+
+    if grid_nm is None:
+        # Brightness is judged per molecule, so weak absorbers keep their lines
+        strongest = np.zeros(len(sticks))
+        np.maximum.at(strongest, groups, np.abs(intensities))
+        bright = np.abs(intensities) >= GRID_MIN_INTENSITY * strongest[groups]
+        bright &= strongest[groups] > 0
+        grid_nm = auto_grid(energies[bright], params=params)
+    grid_nm = np.asarray(grid_nm, dtype=float)
+    if method == "auto":
+        method = "fft" if len(energies) >= FFT_MIN_LINES else "windowed"
+    spectra = broaden_groups(
+        energies, intensities, groups, len(sticks), grid_nm, params, method
+    )
+    lambda_max = grid_nm[spectra.argmax(axis=1)] if len(sticks) else np.zeros(0)
+    lambda_max = np.where(spectra.any(axis=1), lambda_max, np.nan)
+    return BatchSpectra(
+        ids=ids, grid=grid_nm, intensity=spectra, lambda_max_nm=lambda_max
+    )
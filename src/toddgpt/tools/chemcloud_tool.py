@@ -1,4 +1,8 @@
+import logging
 import os
+import re
+import time
+from collections import deque
 from pathlib import Path
 import numpy as np
 
@@ -12,6 +16,16 @@ from langchain.tools import BaseTool
 from qcio import CalcType, FileInput, ProgramInput, ProgramOutput, Structure
 
 from src.toddgpt.tools.datatypes import AtomsDict
+from src.toddgpt.tools.artifacts import stash
+from src.toddgpt.tools.molecule_registry import resolve_molecule
+from src.toddgpt.tools.cost_model import (
+    DEFAULT_QUEUE,
+    DEFAULT_QUEUES,
+    CostModel,
+    job_features,
+    longest_first,
+    pick_queue,
+)
 
 try:
     from chemcloud import CCClient
@@ -20,7 +34,13 @@ try:
 except ImportError as e:
     print(f"Import error: {e}")
 
-from typing import Optional, Type
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Type, Union
+
+FINAL_ENERGY = re.compile(r"FINAL ENERGY:\s+(-?\d+\.\d+)")
+# Futures whose status is checked per polling round of a batch
+POLL_BATCH = 20
+# Longest wait between polling rounds while no job completes
+MAX_POLL_INTERVAL = 30.0
 
 
 class JobDescription(BaseModel):
@@ -49,15 +69,43 @@ class FindJobExample(BaseTool):
         raise ValueError(f"No example input found for job {job_name}")
 
 
+def atoms_dict_to_xyz(atoms_dict: AtomsDict) -> str:
+    structure = Structure(
+        symbols=atoms_dict.symbols,
+        geometry=np.array(atoms_dict.positions) / units.Bohr,
+    )
+    xyz_str = structure.to_xyz()
+    return xyz_str if xyz_str.endswith("\n") else xyz_str + "\n"
+
+
+def terachem_summary(prog_output: ProgramOutput) -> dict:
+    """
+    The few facts about a TeraChem run the agent needs: whether it worked, how
+    long it took, the final energy and, on failure, the end of the traceback.
+    """
+    summary = {
+        "success": prog_output.success,
+        "wall_time": prog_output.provenance.wall_time,
+    }
+    energies = FINAL_ENERGY.findall(prog_output.stdout or "")
+    if energies:
+        summary["final_energy"] = float(energies[-1])
+    if not prog_output.success and prog_output.traceback:
+        summary["error"] = prog_output.traceback.strip().splitlines()[-1]
+    return summary
+
+
 class TerachemInput(BaseModel):
     tc_input: str
-    atoms_dict: AtomsDict
+    atoms_dict: Union[AtomsDict, str]
 
 
 class RunTerachem(BaseTool):
     name: str = "run_terachem"
     description: str = (
-        "Use this tool to run a terachem calculation using the ChemCloud API."
+        "Use this tool to run a terachem calculation using the ChemCloud API. "
+        "'atoms_dict' is a molecule ID or an AtomsDict. Returns an artifact handle of the full output "
+        "with a short summary; use read_artifact to see its stdout."
     )
     args_schema: Type[BaseModel] = TerachemInput
 
@@ -69,49 +117,152 @@ class RunTerachem(BaseTool):
     def _run(
         self,
         tc_input: str,
-        atoms_dict: AtomsDict,
-    ) -> ProgramOutput:
-        return self.run_terachem(tc_input, atoms_dict)
+        atoms_dict: Union[AtomsDict, str],
+    ) -> dict:
+        prog_output = self.run_terachem(tc_input, resolve_molecule(atoms_dict))
+        return stash("terachem", prog_output, terachem_summary(prog_output))
 
-    def setup_file_qcio(self, tc_input: str, atoms_dict: AtomsDict) -> FileInput:
+    def setup_file_qcio(
+        self,
+        tc_input: str,
+        atoms_dict: Union[AtomsDict, List[AtomsDict]],
+        extra_files: Optional[Dict[str, Union[str, bytes]]] = None,
+    ) -> FileInput:
         """
         Useful for creating a FileInput object for run_terachem.
+        A list of AtomsDict is written as a multi-frame geom.xyz, one frame per
+        geometry. extra_files are shipped alongside tc.in, e.g. initial guess files.
         """
-        structure = Structure(
-            symbols=atoms_dict.symbols,
-            geometry=np.array(atoms_dict.positions) / units.Bohr,
-        )
-        xyz_str = structure.to_xyz()
-        file_inp = FileInput(
-            files={"tc.in": tc_input, "geom.xyz": xyz_str}, cmdline_args=["tc.in"]
-        )
+        atoms_dicts = atoms_dict if isinstance(atoms_dict, list) else [atoms_dict]
+        xyz_str = "".join(atoms_dict_to_xyz(frame) for frame in atoms_dicts)
+        files = {"tc.in": tc_input, "geom.xyz": xyz_str}
+        if extra_files:
+            files.update(extra_files)
+        file_inp = FileInput(files=files, cmdline_args=["tc.in"])
         return file_inp
 
     def run_terachem(
         self,
         tc_input: str,
-        atoms_dict: AtomsDict,
+        atoms_dict: Union[AtomsDict, List[AtomsDict]],
+        extra_files: Optional[Dict[str, Union[str, bytes]]] = None,
     ) -> ProgramOutput:
         """
         Useful for running a TeraChem calculation.
         """
-        if self._chemcloud_client is None:
-            self._chemcloud_client = self.initialize_chemcloud_client()
-
         if tc_input:
             # Use FileInput if tc_input is provided
-            input_obj = self.setup_file_qcio(tc_input, atoms_dict)
+            input_obj = self.setup_file_qcio(tc_input, atoms_dict, extra_files)
         else:
             raise ValueError("Non file based input not supported at this time.")
 
-        future_result = self._chemcloud_client.compute(
+        future_result = self.submit(input_obj)
+        prog_output: ProgramOutput = future_result.get()
+        return prog_output
+
+    def submit(self, input_obj: FileInput, queue: str = DEFAULT_QUEUE):
+        """
+        Submit a FileInput to ChemCloud without waiting for it to finish.
+        """
+        if self._chemcloud_client is None:
+            self._chemcloud_client = self.initialize_chemcloud_client()
+
+        return self._chemcloud_client.compute(
             "terachem",
             input_obj,
             collect_files=True,
-            queue="pablo",
+            queue=queue,
         )
-        prog_output: ProgramOutput = future_result.get()
-        return prog_output
+
+    def iter_terachem_batch(
+        self,
+        tc_input: str,
+        jobs: Sequence[Union[AtomsDict, List[AtomsDict]]],
+        extra_files: Optional[Dict[str, Union[str, bytes]]] = None,
+        cost_model: Optional[CostModel] = None,
+        queues: Sequence[Tuple[float, str]] = DEFAULT_QUEUES,
+        interval: float = 1.0,
+        poll_batch: int = POLL_BATCH,
+        max_interval: float = MAX_POLL_INTERVAL,
+    ) -> Iterator[Tuple[int, Optional[ProgramOutput]]]:
+        """
+        Submit a batch of TeraChem jobs longest predicted job first, and yield
+        (job index, ProgramOutput) pairs as the jobs complete. Each job is an
+        AtomsDict, or a list of them for a packed job. A job that failed without
+        any output is yielded with None. Actual runtimes are recorded in the cost
+        model next to their predictions.
+
+        At most poll_batch futures are checked per round, in turn, and the wait
+        between rounds doubles up to max_interval while nothing completes.
+        """
+        if cost_model is None:
+            cost_model = CostModel()
+
+        features = [
+            job_features(
+                tc_input,
+                len(job[0].numbers) if isinstance(job, list) else len(job.numbers),
+                len(job) if isinstance(job, list) else 1,
+            )
+            for job in jobs
+        ]
+        predictions = [cost_model.predict(f) for f in features]
+
+        pending = {}
+        for i in longest_first(predictions):
+            queue = pick_queue(predictions[i], queues)
+            logging.info(
+                f"Submitting job {i} to queue {queue}, predicted {predictions[i]:.1f} s"
+            )
+            pending[i] = self.submit(
+                self.setup_file_qcio(tc_input, jobs[i], extra_files), queue=queue
+            )
+
+        queue_order = deque(pending)
+        wait = interval
+        while pending:
+            completed = False
+            for _ in range(min(poll_batch, len(queue_order))):
+                i = queue_order.popleft()
+                future = pending[i]
+                if future.status not in {"COMPLETE", "FAILURE"}:
+                    queue_order.append(i)
+                    continue
+                completed = True
+                prog_output: Optional[ProgramOutput] = future.get()
+                del pending[i]
+                if prog_output is None:
+                    logging.warning(f"Job {i} failed without any output")
+                elif (
+                    prog_output.provenance
+                    and prog_output.provenance.wall_time is not None
+                ):
+                    cost_model.record(
+                        features[i], prog_output.provenance.wall_time, predictions[i]
+                    )
+                yield i, prog_output
+            if pending:
+                wait = interval if completed else min(2 * wait, max_interval)
+                time.sleep(wait)
+
+    def run_terachem_batch(
+        self,
+        tc_input: str,
+        jobs: Sequence[Union[AtomsDict, List[AtomsDict]]],
+        extra_files: Optional[Dict[str, Union[str, bytes]]] = None,
+        cost_model: Optional[CostModel] = None,
+        queues: Sequence[Tuple[float, str]] = DEFAULT_QUEUES,
+    ) -> List[Optional[ProgramOutput]]:
+        """
+        Run a batch of TeraChem jobs concurrently and return their outputs in job
+        order, None for jobs that failed without output.
+        """
+        outputs: List[Optional[ProgramOutput]] = [None] * len(jobs)
+        for i, prog_output in self.iter_terachem_batch(
+            tc_input, jobs, extra_files, cost_model, queues
+        ):
+            outputs[i] = prog_output
+        return outputs
 
     def initialize_chemcloud_client(self) -> CCClient:
         """
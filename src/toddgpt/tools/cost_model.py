@@ -0,0 +1,171 @@
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from .update_tc_input import get_tc_keyword
+
+DEFAULT_QUEUE = "pablo"
+# (max predicted seconds, queue) pairs, checked in order
+DEFAULT_QUEUES: List[Tuple[float, str]] = [(float("inf"), DEFAULT_QUEUE)]
+# Used until there are timings to learn from: ~30 s for an 11 atom, 10 root job
+PRIOR_SECONDS_PER_ATOM3 = 0.01
+MIN_RECORDS_TO_FIT = 4
+
+
+class JobFeatures(BaseModel):
+    natoms: int
+    basis: str
+    method: str
+    nroots: int
+    run_type: str
+    nframes: int = 1
+
+    @property
+    def level(self) -> str:
+        return f"{self.method}/{self.basis}/{self.run_type}"
+
+
+class RuntimeRecord(BaseModel):
+    features: JobFeatures
+    actual: float
+    predicted: Optional[float] = None
+
+
+def job_features(tc_input: str, natoms: int, nframes: int = 1) -> JobFeatures:
+    """
+    Extract the features the cost model uses from a tc_input string.
+    """
+    nroots = 0
+    if (get_tc_keyword(tc_input, "hhtda") or "").lower() == "yes":
+        nroots = int(get_tc_keyword(tc_input, "hhtdasinglets") or 0) + int(
+            get_tc_keyword(tc_input, "hhtdatriplets") or 0
+        )
+    elif (get_tc_keyword(tc_input, "cis") or "").lower() == "yes":
+        nroots = int(get_tc_keyword(tc_input, "cisnumstates") or 0)
+    return JobFeatures(
+        natoms=natoms,
+        basis=(get_tc_keyword(tc_input, "basis") or "").lower(),
+        method=(get_tc_keyword(tc_input, "method") or "").lower(),
+        nroots=nroots,
+        run_type=(get_tc_keyword(tc_input, "run") or "energy").lower(),
+        nframes=nframes,
+    )
+
+
+def _design(features: Sequence[JobFeatures]) -> np.ndarray:
+    return np.array(
+        [
+            [1.0, np.log(f.natoms), np.log1p(f.nroots), np.log(f.nframes)]
+            for f in features
+        ]
+    )
+
+
+class CostModel:
+    """
+    Log-linear runtime model fitted to past TeraChem timings:
+
+        log(t) = c0 + c1 log(natoms) + c2 log(1 + nroots) + c3 log(nframes) + offset
+
+    with one offset per method/basis/run type. Every observed runtime is appended,
+    together with the prediction made for it, to a JSON lines file.
+    """
+
+    def __init__(self, path: Path = Path("./scratch/cost_model/runtimes.jsonl")):
+        self.path = Path(path)
+        self.records: List[RuntimeRecord] = []
+        if self.path.exists():
+            with open(self.path, "r") as f:
+                self.records = [
+                    RuntimeRecord.model_validate_json(line) for line in f if line.strip()
+                ]
+        self._coefficients: Optional[np.ndarray] = None
+        self._offsets: Dict[str, float] = {}
+        self.fit()
+
+    def fit(self):
+        if len(self.records) < MIN_RECORDS_TO_FIT:
+            self._coefficients = None
+            self._offsets = {}
+            return
+        features = [record.features for record in self.records]
+        X = _design(features)
+        y = np.log([max(record.actual, 1e-3) for record in self.records])
+        # Small ridge term keeps the fit stable when a feature never varies
+        ridge = 1e-6 * np.eye(X.shape[1])
+        self._coefficients = np.linalg.solve(X.T @ X + ridge, X.T @ y)
+        residuals = y - X @ self._coefficients
+        levels = np.array([f.level for f in features])
+        self._offsets = {
+            level: float(residuals[levels == level].mean()) for level in set(levels)
+        }
+
+    def predict(self, features: JobFeatures) -> float:
+        """
+        Predicted wall time in seconds.
+        """
+        if self._coefficients is None:
+            return (
+                PRIOR_SECONDS_PER_ATOM3
+                * features.natoms**3
+                * (1 + features.nroots / 10)
+                * features.nframes
+            )
+        log_t = _design([features])[0] @ self._coefficients
+        return float(np.exp(log_t + self._offsets.get(features.level, 0.0)))
+
+    def record(
+        self, features: JobFeatures, actual: float, predicted: Optional[float] = None
+    ):
+        record = RuntimeRecord(features=features, actual=actual, predicted=predicted)
+        self.records.append(record)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with open(self.path, "a") as f:
+            f.write(record.model_dump_json() + "\n")
+        if predicted is not None:
+            logging.info(
+                f"{features.level} job took {actual:.1f} s, predicted {predicted:.1f} s"
+            )
+        self.fit()
+
+    def accuracy(self) -> Dict[str, float]:
+        """
+        Summary of predicted versus actual runtimes over all recorded predictions.
+        """
+        pairs = np.array(
+            [
+                [record.predicted, record.actual]
+                for record in self.records
+                if record.predicted is not None
+            ]
+        ).reshape(-1, 2)
+        if len(pairs) == 0:
+            return {"n": 0}
+        predicted, actual = np.maximum(pairs, 1e-3).T
+        log_ratio = np.log(predicted / actual)
+        return {
+            "n": len(pairs),
+            "mean_abs_error_s": float(np.abs(predicted - actual).mean()),
+            "median_abs_rel_error": float(np.median(np.abs(predicted / actual - 1))),
+            "rms_log_ratio": float(np.sqrt((log_ratio**2).mean())),
+        }
+
+
+def pick_queue(
+    predicted: float, queues: Sequence[Tuple[float, str]] = DEFAULT_QUEUES
+) -> str:
+    for max_seconds, queue in queues:
+        if predicted <= max_seconds:
+            return queue
+    return queues[-1][1]
+
+
+def longest_first(predictions: Sequence[float]) -> List[int]:
+    """
+    Submission order for a batch, longest predicted job first.
+    """
+    return sorted(range(len(predictions)), key=lambda i: -predictions[i])
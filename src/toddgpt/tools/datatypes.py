@@ -1,3 +1,5 @@
+import hashlib
+import json
 from typing import List, Optional
 
 from pydantic import BaseModel
@@ -134,3 +136,11 @@ class AtomsDict(BaseModel):
         super().__init__(**data)
         if self.symbols is None:
             self.symbols = [ATOMIC_SYMBOLS[num - 1] for num in self.numbers]
+
+
+def geometry_hash(atoms_dict: AtomsDict) -> str:
+    """
+    Hash of the atomic numbers and positions of a geometry.
+    """
+    geometry = json.dumps([list(atoms_dict.numbers), atoms_dict.positions])
+    return hashlib.sha256(geometry.encode()).hexdigest()
@@ -0,0 +1,171 @@
+import hashlib
+import io
+import json
+import logging
+from pathlib import Path
+from typing import Optional, Tuple, Union
+
+import numpy as np
+import requests
+from PIL import Image
+
+DIGITIZED_DIR = Path("./scratch/digitized")
+# Pixels darker than this in every channel are axis or frame lines
+DARK_THRESHOLD = 100
+# A row or column is an axis line when this fraction of it is dark
+AXIS_FRACTION = 0.5
+# Pixels within this RGB distance of the curve color belong to the curve
+COLOR_TOLERANCE = 90.0
+# Minimum channel spread of a pixel counted as colored when picking the curve
+MIN_SATURATION = 80
+# Columns of curve further apart than this are separate segments (e.g. the legend)
+MAX_GAP = 8
+# Pixels next to the frame that are ignored, to skip tick marks
+FRAME_MARGIN = 3
+
+NAMED_COLORS = {
+    "red": (255, 0, 0),
+    "green": (0, 128, 0),
+    "blue": (0, 0, 255),
+    "black": (0, 0, 0),
+    "cyan": (0, 255, 255),
+    "magenta": (255, 0, 255),
+    "orange": (255, 165, 0),
+}
+
+ImageSource = Union[str, Path, bytes]
+Color = Union[str, Tuple[int, int, int]]
+
+
+def read_image_bytes(source: ImageSource) -> bytes:
+    if isinstance(source, bytes):
+        return source
+    if str(source).startswith(("http://", "https://")):
+        response = requests.get(str(source))
+        response.raise_for_status()
+        return response.content
+    with open(source, "rb") as f:
+        return f.read()
+
+
+def find_axes(pixels: np.ndarray) -> Tuple[int, int, int, int]:
+    """
+    Pixel bounds (left, right, top, bottom) of the plot frame: the extents of the
+    bottom-most long dark row (x axis) and left-most long dark column (y axis).
+    """
+    dark = (pixels < DARK_THRESHOLD).all(axis=2)
+    rows = np.flatnonzero(dark.sum(axis=1) >= AXIS_FRACTION * dark.shape[1])
+    columns = np.flatnonzero(dark.sum(axis=0) >= AXIS_FRACTION * dark.shape[0])
+    if len(rows) == 0 or len(columns) == 0:
+        # Open axes shorter than the threshold: fall back to the longest lines
+        rows = [int(dark.sum(axis=1).argmax())]
+        columns = [int(dark.sum(axis=0).argmax())]
+    bottom, left = rows[-1], columns[0]
+    x_axis = np.flatnonzero(dark[bottom])
+    y_axis = np.flatnonzero(dark[:, left])
+    return int(x_axis.min()), int(x_axis.max()), int(y_axis.min()), int(bottom)
+
+
+def dominant_color(pixels: np.ndarray) -> Tuple[int, int, int]:
+    """
+    Most common strongly colored pixel value, quantized to 32 levels per channel.
+    """
+    flat = pixels.reshape(-1, 3).astype(int)
+    colored = flat[flat.max(axis=1) - flat.min(axis=1) >= MIN_SATURATION]
+    if len(colored) == 0:
+        return NAMED_COLORS["black"]
+    quantized = colored // 32
+    values, counts = np.unique(quantized, axis=0, return_counts=True)
+    members = (quantized == values[counts.argmax()]).all(axis=1)
+    return tuple(int(c) for c in colored[members].mean(axis=0))
+
+
+def longest_segment(columns: np.ndarray, max_gap: int = MAX_GAP) -> np.ndarray:
+    """
+    Longest run of columns without gaps wider than max_gap.
+    """
+    breaks = np.flatnonzero(np.diff(columns) > max_gap) + 1
+    segments = np.split(np.arange(len(columns)), breaks)
+    return max(segments, key=lambda segment: columns[segment[-1]] - columns[segment[0]])
+
+
+def extract_curve(
+    pixels: np.ndarray,
+    frame: Tuple[int, int, int, int],
+    color: Optional[Color] = None,
+    tolerance: float = COLOR_TOLERANCE,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Column and row (fractional pixel) of the curve in every frame column that
+    contains it. Legend entries and other short pieces are dropped by keeping
+    the longest connected run of columns.
+    """
+    left, right, top, bottom = frame
+    inner = pixels[
+        top + FRAME_MARGIN : bottom - FRAME_MARGIN + 1,
+        left + FRAME_MARGIN : right - FRAME_MARGIN + 1,
+    ].astype(float)
+    if color is None:
+        color = dominant_color(inner.astype(np.uint8))
+    elif isinstance(color, str):
+        color = NAMED_COLORS[color.lower()]
+    distance = np.linalg.norm(inner - np.asarray(color, dtype=float), axis=2)
+    mask = distance <= tolerance
+    columns = np.flatnonzero(mask.any(axis=0))
+    if len(columns) == 0:
+        raise ValueError(f"No curve of color {color} found in the plot")
+    columns = columns[longest_segment(columns)]
+    rows = np.array([np.median(np.flatnonzero(mask[:, column])) for column in columns])
+    return columns + left + FRAME_MARGIN, rows + top + FRAME_MARGIN
+
+
+def calibrate(
+    columns: np.ndarray,
+    rows: np.ndarray,
+    frame: Tuple[int, int, int, int],
+    x_range: Tuple[float, float],
+    y_range: Optional[Tuple[float, float]] = None,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Map pixels to data with the axis ranges at the frame edges. Without y_range
+    the curve is normalized to a maximum of 1.
+    """
+    left, right, top, bottom = frame
+    x = x_range[0] + (columns - left) / (right - left) * (x_range[1] - x_range[0])
+    height = (bottom - rows) / (bottom - top)
+    if y_range is None:
+        y = height / height.max()
+    else:
+        y = y_range[0] + height * (y_range[1] - y_range[0])
+    return x, y
+
+
+def digitize_image(
+    source: ImageSource,
+    x_range: Tuple[float, float],
+    y_range: Optional[Tuple[float, float]] = None,
+    color: Optional[Color] = None,
+    cache_dir: Path = DIGITIZED_DIR,
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    (wavelength, intensity) arrays read from a plot image. x_range and y_range are
+    the axis values at the left/right and bottom/top edges of the plot frame.
+    Results are cached under cache_dir by a hash of the image and the settings,
+    so each image is digitized once.
+    """
+    image_bytes = read_image_bytes(source)
+    settings = json.dumps([x_range, y_range, color]).encode()
+    digest = hashlib.sha256(image_bytes + settings).hexdigest()[:16]
+    cache_path = Path(cache_dir) / f"{digest}.npz"
+    if cache_path.exists():
+        with np.load(cache_path) as data:
+            return data["wavelength_nm"], data["intensity"]
+
+    pixels = np.asarray(Image.open(io.BytesIO(image_bytes)).convert("RGB"))
+    frame = find_axes(pixels)
+    columns, rows = extract_curve(pixels, frame, color)
+    wavelength, intensity = calibrate(columns, rows, frame, x_range, y_range)
+    Path(cache_dir).mkdir(parents=True, exist_ok=True)
+    np.savez(cache_path, wavelength_nm=wavelength, intensity=intensity)
+    logging.info(f"Digitized {len(wavelength)} points, cached at {cache_path}")
+    return wavelength, intensity
@@ -0,0 +1,231 @@
+import hashlib
+import sqlite3
+from contextlib import closing
+from pathlib import Path
+from typing import List, Optional
+
+import numpy as np
+from ase import Atoms
+from pydantic import BaseModel
+
+from src.toddgpt.parsers.excitations import EXCITATION_DTYPE
+from .datatypes import AtomsDict, geometry_hash
+from .update_tc_input import get_tc_keyword
+
+DEFAULT_DB_PATH = Path("./scratch/excitations.sqlite")
+
+RUNS_TABLE = """
+CREATE TABLE IF NOT EXISTS {name} (
+    id INTEGER PRIMARY KEY,
+    formula TEXT NOT NULL,
+    molecule TEXT NOT NULL,
+    method TEXT NOT NULL,
+    basis TEXT NOT NULL,
+    template_hash TEXT NOT NULL,
+    geometry_hash TEXT NOT NULL DEFAULT '',
+    updated REAL NOT NULL DEFAULT (julianday('now')),
+    UNIQUE (formula, molecule, method, basis, template_hash, geometry_hash)
+);
+"""
+
+SCHEMA = (
+    RUNS_TABLE.format(name="runs")
+    + """
+CREATE INDEX IF NOT EXISTS runs_molecule ON runs (molecule, method, basis);
+CREATE INDEX IF NOT EXISTS runs_formula ON runs (formula, method, basis);
+CREATE TABLE IF NOT EXISTS excitations (
+    run_id INTEGER NOT NULL REFERENCES runs (id),
+    sample INTEGER NOT NULL,
+    root INTEGER NOT NULL,
+    total_energy REAL,
+    ex_energy_ev REAL,
+    ex_energy_nm REAL,
+    osc_strength REAL,
+    s2 REAL,
+    PRIMARY KEY (run_id, sample, root)
+);
+"""
+)
+
+# Runs stored before the geometry hash was part of their identity keep an empty one
+MIGRATE_GEOMETRY_HASH = (
+    RUNS_TABLE.format(name="runs_new")
+    + """
+INSERT INTO runs_new (id, formula, molecule, method, basis, template_hash, updated)
+SELECT id, formula, molecule, method, basis, template_hash, updated FROM runs;
+DROP TABLE runs;
+ALTER TABLE runs_new RENAME TO runs;
+"""
+)
+
+KEY_COLUMNS = (
+    "formula",
+    "molecule",
+    "method",
+    "basis",
+    "template_hash",
+    "geometry_hash",
+)
+
+
+class RunKey(BaseModel):
+    """
+    Identity of a set of excitations: which molecule at which reference geometry,
+    at which level of theory, from which TeraChem input. molecule is a name or
+    InChIKey and may be empty when only the formula is known; the geometry hash
+    keeps unnamed isomers apart.
+    """
+
+    formula: str
+    molecule: str = ""
+    method: str
+    basis: str = ""
+    template_hash: str = ""
+    geometry_hash: str = ""
+
+    def row(self) -> tuple:
+        return tuple(getattr(self, column) for column in KEY_COLUMNS)
+
+
+def formula_of(atoms_dict: AtomsDict) -> str:
+    return Atoms(numbers=atoms_dict.numbers).get_chemical_formula(mode="hill")
+
+
+def template_hash(tc_input: str) -> str:
+    return hashlib.sha256(tc_input.strip().encode()).hexdigest()[:16]
+
+
+def run_key(
+    atoms_dict: AtomsDict, method: str, tc_input: str, molecule: Optional[str] = None
+) -> RunKey:
+    return RunKey(
+        formula=formula_of(atoms_dict),
+        molecule=(molecule or "").strip().lower(),
+        method=method,
+        basis=(get_tc_keyword(tc_input, "basis") or "").lower(),
+        template_hash=template_hash(tc_input),
+        geometry_hash=geometry_hash(atoms_dict)[:16],
+    )
+
+
+class ExcitationDB:
+    """
+    Persistent SQLite store of every parsed excitation, one row per sample and
+    root, so spectra of molecules computed before never need TeraChem again.
+    """
+
+    def __init__(self, path: Path = DEFAULT_DB_PATH):
+        self.path = Path(path)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        with closing(self.connect()) as conn, conn:
+            columns = {row[1] for row in conn.execute("PRAGMA table_info(runs)")}
+            if columns and "geometry_hash" not in columns:
+                conn.executescript(MIGRATE_GEOMETRY_HASH)
+            conn.executescript(SCHEMA)
+
+    def connect(self) -> sqlite3.Connection:
+        return sqlite3.connect(self.path)
+
+    def run_id(self, conn: sqlite3.Connection, key: RunKey) -> int:
+        """
+        Id of the run for key, created if needed and marked as updated now.
+        """
+        columns = ", ".join(KEY_COLUMNS)
+        placeholders = ", ".join("?" * len(KEY_COLUMNS))
+        matches = " AND ".join(f"{column} = ?" for column in KEY_COLUMNS)
+        conn.execute(
+            f"INSERT INTO runs ({columns}) VALUES ({placeholders}) "
+            f"ON CONFLICT ({columns}) DO UPDATE SET updated = julianday('now')",
+            key.row(),
+        )
+        (run_id,) = conn.execute(
+            f"SELECT id FROM runs WHERE {matches}", key.row()
+        ).fetchone()
+        return run_id
+
+    def start_run(self, key: RunKey):
+        """
+        Clear the stored excitations of key before a new ensemble is added, so that
+        samples of an earlier, larger ensemble do not stay in the run.
+        """
+        with closing(self.connect()) as conn, conn:
+            run_id = self.run_id(conn, key)
+            conn.execute("DELETE FROM excitations WHERE run_id = ?", (run_id,))
+
+    def add(self, key: RunKey, excitations: np.ndarray):
+        """
+        Store excitations under key, replacing earlier results for the same samples.
+        """
+        if len(excitations) == 0:
+            return
+        with closing(self.connect()) as conn, conn:
+            run_id = self.run_id(conn, key)
+            samples = np.unique(excitations["sample"]).tolist()
+            conn.executemany(
+                "DELETE FROM excitations WHERE run_id = ? AND sample = ?",
+                [(run_id, sample) for sample in samples],
+            )
+            conn.executemany(
+                "INSERT INTO excitations VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [(run_id, *record) for record in excitations.tolist()],
+            )
+
+    def runs(
+        self,
+        method: Optional[str] = None,
+        molecule: Optional[str] = None,
+        formula: Optional[str] = None,
+        basis: Optional[str] = None,
+    ) -> List[dict]:
+        """
+        Stored runs matching every given field, most recent first, with their
+        last update time (Julian day) and number of samples and states.
+        """
+        conditions, params = [], []
+        for column, value in [
+            ("method", method),
+            ("molecule", molecule and molecule.strip().lower()),
+            ("formula", formula),
+            ("basis", basis and basis.lower()),
+        ]:
+            if value is not None:
+                conditions.append(f"runs.{column} = ?")
+                params.append(value)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT runs.id, formula, molecule, method, basis, template_hash, "
+                "geometry_hash, updated, COUNT(DISTINCT sample), COUNT(*) FROM runs "
+                f"JOIN excitations ON excitations.run_id = runs.id {where} "
+                "GROUP BY runs.id ORDER BY updated DESC, runs.id DESC",
+                params,
+            ).fetchall()
+        keys = ["id", *KEY_COLUMNS, "updated"]
+        return [
+            {**dict(zip(keys, row[:8])), "n_samples": row[8], "n_excitations": row[9]}
+            for row in rows
+        ]
+
+    def excitations(self, run_id: int) -> np.ndarray:
+        with closing(self.connect()) as conn:
+            rows = conn.execute(
+                "SELECT sample, root, total_energy, ex_energy_ev, ex_energy_nm, "
+                "osc_strength, s2 FROM excitations WHERE run_id = ? "
+                "ORDER BY sample, root",
+                (run_id,),
+            ).fetchall()
+        # SQLite stores NaN (no < S^2 > in the output) as NULL
+        return np.array(
+            [row[:6] + (np.nan if row[6] is None else row[6],) for row in rows],
+            dtype=EXCITATION_DTYPE,
+        )
+
+    def lookup(self, method: str, molecule: Optional[str] = None, **fields) -> np.ndarray:
+        """
+        Excitations of the most recent run matching method, molecule and fields
+        (formula, basis), or an empty array.
+        """
+        runs = self.runs(method=method, molecule=molecule, **fields)
+        if not runs:
+            return np.empty(0, dtype=EXCITATION_DTYPE)
+        return self.excitations(runs[0]["id"])
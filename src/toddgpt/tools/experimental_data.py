@@ -1,14 +1,36 @@
 import base64
+import logging
 import os
+from functools import lru_cache
 from pathlib import Path
-from typing import Union
+from typing import Tuple, Union
 import requests
 from langchain.tools import BaseTool
 from pydantic import BaseModel
 from typing import Optional
 from openai import OpenAI
 
-client = OpenAI()
+from .digitizer import digitize_image
+from .experimental_spectra import ExperimentalSpectraStore
+from .peak_analysis import analyze_spectrum
+
+# Plot images with known axis ranges that can be digitized offline
+CALIBRATED_IMAGES = {
+    "cyclobutanone": {
+        "image": "assets/cyclobutanone_spectra.jpg",
+        "x_range": (160.0, 220.0),
+        "color": "red",
+    }
+}
+
+
+@lru_cache(maxsize=None)
+def openai_client() -> OpenAI:
+    """
+    OpenAI client, created on first use so that importing the tools needs no
+    API key.
+    """
+    return OpenAI()
 
 
 def encode_image(image_path):
@@ -23,20 +45,45 @@ class WavelengthResponse(BaseModel):
 class MaxWavelengthTool(BaseTool):
     name: str = "max_wavelength_tool"
     description: str = (
-        "Use this tool to find the wavelength where maximum absorbance occurs. It takes no path arguments to run."
+        "Use this tool to find the wavelength where maximum absorbance occurs in the experimental spectrum of 'molecule' "
+        "(name, synonym or InChIKey). It takes no path arguments to run. Returns lambda max and the other peaks. "
+        "For a plot image, pass 'image_url' with 'x_range' (wavelengths at the left and right edges of the plot frame) "
+        "to digitize it offline; set 'use_vision' to true only if that fails."
     )
 
     def _find_image_url(self, molecule: str):
         links = {
             "cyclobutanone": "https://uv-vis-spectral-atlas-mainz.org/uvvis_data/cross_sections_plots/Organics%20(carbonyls)/Ketones,ketenes/c-C4H6O_lin.jpg"
         }
-        return links[molecule]
-
-    def _run(self, molecule: Optional[str] = None, image_url: Optional[str] = None):
+        return links.get(molecule.strip().lower())
+
+    def _run(
+        self,
+        molecule: Optional[str] = None,
+        image_url: Optional[str] = None,
+        x_range: Optional[Tuple[float, float]] = None,
+        y_range: Optional[Tuple[float, float]] = None,
+        color: Optional[str] = None,
+        use_vision: bool = False,
+    ):
+        store = ExperimentalSpectraStore()
+        if image_url is None and molecule:
+            entry = store.lookup(molecule)
+            if entry is not None:
+                logging.info(f"Found experimental spectrum of {entry.name} in the local store")
+                return {"name": entry.name, "source": entry.source, **entry.analysis}
+            calibrated = CALIBRATED_IMAGES.get(molecule.strip().lower())
+            if calibrated is not None and Path(calibrated["image"]).exists():
+                image_url = calibrated["image"]
+                x_range, color = calibrated["x_range"], calibrated["color"]
+            else:
+                # find image url from resources
+                image_url = self._find_image_url(molecule)
         if image_url is None:
-            # find image url from resources
-            image_url = self._find_image_url(molecule)
-        response = client.beta.chat.completions.parse(
+            return f"No experimental spectrum of {molecule} available."
+        if x_range is not None and not use_vision:
+            return self.digitize(molecule, image_url, x_range, y_range, color, store)
+        response = openai_client().beta.chat.completions.parse(
             model="gpt-4o-mini",
             messages=[
                 {
@@ -61,6 +108,25 @@ class MaxWavelengthTool(BaseTool):
         )
         return response.choices[0]
 
+    def digitize(
+        self,
+        molecule: Optional[str],
+        image_url: str,
+        x_range: Tuple[float, float],
+        y_range: Optional[Tuple[float, float]],
+        color: Optional[str],
+        store: ExperimentalSpectraStore,
+    ) -> dict:
+        """
+        Digitize the plot offline and, for a named molecule, add the curve to the
+        store so later lookups skip the image.
+        """
+        wavelength, intensity = digitize_image(image_url, x_range, y_range, color)
+        if molecule:
+            entry = store.add(molecule, wavelength, intensity, source=image_url)
+            return {"name": entry.name, "source": entry.source, **entry.analysis}
+        return {"source": image_url, **analyze_spectrum(wavelength, intensity)}
+
 
 # Define a custom tool for image processing
 # class ImageQuestionTool(BaseTool):
@@ -0,0 +1,252 @@
+import json
+import re
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel
+
+from .peak_analysis import analyze_spectrum
+
+EXPERIMENTAL_DIR = Path("./scratch/experimental")
+JCAMP_SUFFIXES = (".jdx", ".dx", ".jcamp")
+JCAMP_DATA_LABELS = ("XYDATA", "XYPOINTS", "PEAK TABLE")
+NUMBER = re.compile(r"[+-]?(?:\d+\.?\d*|\.\d+)(?:[eE][+-]?\d+)?")
+
+
+class ExperimentalEntry(BaseModel):
+    """
+    Index record of one digitized experimental spectrum. The peak data is kept in
+    the index so that lookups never load the arrays.
+    """
+
+    key: str
+    name: str
+    synonyms: List[str] = []
+    inchikey: Optional[str] = None
+    source: Optional[str] = None
+    analysis: dict = {}
+
+
+def normalize_name(name: str) -> str:
+    return " ".join(name.strip().lower().split())
+
+
+def slug(name: str) -> str:
+    return re.sub(r"[^a-z0-9]+", "_", normalize_name(name)).strip("_")
+
+
+def to_nanometers(x: np.ndarray, units: str) -> np.ndarray:
+    units = units.strip().upper()
+    if units in ("", "NM", "NANOMETERS"):
+        return x
+    if units in ("MICROMETERS", "UM"):
+        return 1e3 * x
+    if units in ("1/CM", "CM-1", "CM^-1"):
+        return 1e7 / x
+    raise ValueError(f"Unsupported wavelength units {units}")
+
+
+def read_csv_spectrum(path: Path) -> Tuple[dict, np.ndarray, np.ndarray]:
+    """
+    Wavelength (nm) and cross-section columns from a CSV file. Leading
+    "# field: value" lines give the name, synonyms (separated by ";"), inchikey,
+    source and units; the name defaults to the file name.
+    """
+    path = Path(path)
+    metadata = {"name": path.stem}
+    rows = []
+    with open(path, "r") as f:
+        for line in f:
+            line = line.strip()
+            if line.startswith("#"):
+                field, _, value = line.lstrip("#").partition(":")
+                if value:
+                    metadata[field.strip().lower()] = value.strip()
+                continue
+            values = NUMBER.findall(line)
+            # Skips blank lines and column headers
+            if len(values) >= 2 and not re.search(r"[a-df-zA-DF-Z]", line):
+                rows.append([float(values[0]), float(values[1])])
+    if not rows:
+        raise ValueError(f"No spectrum data in {path}")
+    table = np.array(rows)
+    wavelength = to_nanometers(table[:, 0], metadata.get("units", "NM"))
+    return metadata, wavelength, table[:, 1]
+
+
+def read_jcamp_spectrum(path: Path) -> Tuple[dict, np.ndarray, np.ndarray]:
+    """
+    Spectrum from a JCAMP-DX file with uncompressed (AFFN) ##XYDATA=(X++(Y..Y))
+    or ##XYPOINTS/##PEAK TABLE=(XY..XY) data.
+    """
+    path = Path(path)
+    labels: Dict[str, str] = {}
+    form, data_lines, in_data = None, [], False
+    with open(path, "r") as f:
+        for line in f:
+            line = line.split("$$")[0].rstrip()
+            if line.startswith("##"):
+                label, _, value = line[2:].partition("=")
+                label = label.strip().upper()
+                in_data = label in JCAMP_DATA_LABELS
+                if in_data:
+                    form = value.strip().upper()
+                elif label == "END":
+                    break
+                else:
+                    labels[label] = value.strip()
+            elif in_data and line.strip():
+                data_lines.append(line)
+    if form is None:
+        raise ValueError(f"No XYDATA, XYPOINTS or PEAK TABLE in {path}")
+
+    x_factor = float(labels.get("XFACTOR", 1.0))
+    y_factor = float(labels.get("YFACTOR", 1.0))
+    if "X++(Y..Y)" in form:
+        first_x, last_x = float(labels["FIRSTX"]), float(labels["LASTX"])
+        n_points = int(labels["NPOINTS"])
+        delta_x = (last_x - first_x) / (n_points - 1) if n_points > 1 else 0.0
+        x, y = [], []
+        for line in data_lines:
+            # SQZ, DIF and DUP compressed forms encode digits as letters
+            if re.search(r"[@%A-DF-Za-df-z]", line):
+                raise ValueError(f"Compressed JCAMP-DX data is not supported: {path}")
+            values = [float(value) for value in NUMBER.findall(line)]
+            start = values[0] * x_factor
+            for i, value in enumerate(values[1:]):
+                x.append(start + i * delta_x)
+                y.append(value)
+        x, y = np.array(x), np.array(y) * y_factor
+    else:
+        values = np.array(
+            [float(value) for line in data_lines for value in NUMBER.findall(line)]
+        )
+        x, y = values[0::2] * x_factor, values[1::2] * y_factor
+
+    metadata = {
+        "name": labels.get("TITLE") or path.stem,
+        "synonyms": labels.get("NAMES", ""),
+        "inchikey": labels.get("$INCHIKEY") or labels.get("$INCHI KEY"),
+        "source": labels.get("ORIGIN"),
+    }
+    return metadata, to_nanometers(x, labels.get("XUNITS", "NM")), y
+
+
+class ExperimentalSpectraStore:
+    """
+    Local store of digitized experimental UV-Vis spectra: one .npz of wavelength
+    and cross-section per compound, and an index.json mapping every name, synonym
+    and InChIKey to its entry.
+    """
+
+    def __init__(self, directory: Path = EXPERIMENTAL_DIR):
+        self.directory = Path(directory)
+        self.index_path = self.directory / "index.json"
+        self.entries: Dict[str, ExperimentalEntry] = {}
+        self.keys: Dict[str, str] = {}
+        if self.index_path.exists():
+            with open(self.index_path, "r") as f:
+                index = json.load(f)
+            for key, entry in index["entries"].items():
+                self.entries[key] = ExperimentalEntry(**entry)
+            self.keys = index["keys"]
+
+    def save_index(self):
+        self.directory.mkdir(parents=True, exist_ok=True)
+        with open(self.index_path, "w") as f:
+            json.dump(
+                {
+                    "entries": {
+                        key: entry.model_dump() for key, entry in self.entries.items()
+                    },
+                    "keys": self.keys,
+                },
+                f,
+                indent=2,
+            )
+
+    def add(
+        self,
+        name: str,
+        wavelength_nm: np.ndarray,
+        cross_section: np.ndarray,
+        synonyms: Iterable[str] = (),
+        inchikey: Optional[str] = None,
+        source: Optional[str] = None,
+        save: bool = True,
+    ) -> ExperimentalEntry:
+        order = np.argsort(wavelength_nm)
+        wavelength_nm = np.asarray(wavelength_nm, dtype=float)[order]
+        cross_section = np.asarray(cross_section, dtype=float)[order]
+        entry = ExperimentalEntry(
+            key=slug(name),
+            name=name,
+            synonyms=[synonym.strip() for synonym in synonyms if synonym.strip()],
+            inchikey=inchikey.strip().upper() if inchikey else None,
+            source=source,
+            analysis=analyze_spectrum(wavelength_nm, cross_section),
+        )
+        self.directory.mkdir(parents=True, exist_ok=True)
+        np.savez(
+            self.directory / f"{entry.key}.npz",
+            wavelength_nm=wavelength_nm,
+            cross_section=cross_section,
+        )
+        self.entries[entry.key] = entry
+        for alias in [name, *entry.synonyms]:
+            self.keys[normalize_name(alias)] = entry.key
+        if entry.inchikey:
+            self.keys[entry.inchikey] = entry.key
+        if save:
+            self.save_index()
+        return entry
+
+    def lookup(self, compound: str) -> Optional[ExperimentalEntry]:
+        """
+        Entry for a compound name, synonym or InChIKey, or None.
+        """
+        key = self.keys.get(compound.strip().upper()) or self.keys.get(
+            normalize_name(compound)
+        )
+        return self.entries.get(key) if key else None
+
+    def spectrum(self, compound: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+        """
+        (wavelength_nm, cross_section) arrays of a compound, or None.
+        """
+        entry = self.lookup(compound)
+        if entry is None:
+            return None
+        with np.load(self.directory / f"{entry.key}.npz") as data:
+            return data["wavelength_nm"], data["cross_section"]
+
+    def import_file(self, path: Path, save: bool = True) -> ExperimentalEntry:
+        path = Path(path)
+        if path.suffix.lower() in JCAMP_SUFFIXES:
+            metadata, wavelength, cross_section = read_jcamp_spectrum(path)
+        else:
+            metadata, wavelength, cross_section = read_csv_spectrum(path)
+        synonyms = metadata.get("synonyms") or ""
+        return self.add(
+            metadata["name"],
+            wavelength,
+            cross_section,
+            synonyms=synonyms.split(";") if isinstance(synonyms, str) else synonyms,
+            inchikey=metadata.get("inchikey"),
+            source=metadata.get("source") or str(path),
+            save=save,
+        )
+
+    def import_directory(self, directory: Path) -> List[ExperimentalEntry]:
+        """
+        Import every CSV and JCAMP-DX file in directory, writing the index once.
+        """
+        files = sorted(
+            path
+            for path in Path(directory).iterdir()
+            if path.suffix.lower() in (".csv", *JCAMP_SUFFIXES)
+        )
+        entries = [self.import_file(path, save=False) for path in files]
+        self.save_index()
+        return entries
@@ -0,0 +1,38 @@
+from typing import Sequence
+
+import numpy as np
+
+# Central difference step in Bohr
+DEFAULT_STEP = 5.0e-3
+# Tighter SCF convergence so gradient noise stays well below step * curvature
+GRADIENT_CONVTHRE = "1.0e-7"
+
+
+def displaced_geometries(xyz: np.ndarray, step: float = DEFAULT_STEP) -> np.ndarray:
+    """
+    Central difference displacements of every Cartesian coordinate.
+
+    Returns a (6N, N, 3) array ordered +step, -step for coordinate 0, then
+    coordinate 1, and so on.
+    """
+    xyz = np.asarray(xyz, dtype=float)
+    ncoord = xyz.size
+    shifts = np.zeros((ncoord, 2, ncoord))
+    shifts[np.arange(ncoord), 0, np.arange(ncoord)] = step
+    shifts[np.arange(ncoord), 1, np.arange(ncoord)] = -step
+    displaced = xyz.reshape(1, ncoord) + shifts.reshape(2 * ncoord, ncoord)
+    return displaced.reshape(2 * ncoord, *xyz.shape)
+
+
+def assemble_hessian(
+    gradients: Sequence[np.ndarray], step: float = DEFAULT_STEP
+) -> np.ndarray:
+    """
+    Build the (3N, 3N) Hessian from the gradients at the geometries returned by
+    displaced_geometries, in the same order. The result is symmetrized.
+    """
+    gradients = np.asarray(gradients, dtype=float)
+    ncoord = gradients.shape[0] // 2
+    gradients = gradients.reshape(ncoord, 2, ncoord)
+    hess = (gradients[:, 0] - gradients[:, 1]) / (2.0 * step)
+    return 0.5 * (hess + hess.T)
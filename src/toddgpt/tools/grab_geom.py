@@ -1,7 +1,7 @@
 import os
 from difflib import get_close_matches
 from pathlib import Path
-from typing import Any, Dict
+from typing import Any, Dict, Union
 
 import numpy as np
 import requests
@@ -10,6 +10,7 @@ from ase.io import read
 from langchain.agents import tool
 
 from .datatypes import AtomsDict
+from .molecule_registry import REGISTRY
 
 
 @tool
@@ -41,20 +42,30 @@ def read_geometry_from_file(file_path: str) -> AtomsDict:
 
 
 @tool
-def extract_molecule_from_pubchem(compound_name: str) -> AtomsDict:
+def extract_molecule_from_pubchem(compound_name: str) -> Dict[str, Any]:
     """
     Use this tool if the user asks about a specific molecule, but does not provide a file path.
     Extract molecule information from PubChem based on the compound name using PUG REST API.
+    The geometry is registered for the session and passed to other tools by its ID.
 
     Args:
         compound_name (str): The name of the compound to search for.
 
     Returns:
         Dict[str, Any]: A dictionary containing the following information:
-            - 'atoms': List of atomic numbers
-            - 'positions': List of 3D coordinates for each atom
+            - 'molecule_id': ID to pass as 'atoms_dict' to the other tools
+            - 'name', 'formula', 'n_atoms' and 'source' of the molecule
     """
+    atoms_dict = fetch_pubchem_geometry(compound_name)
+    if not isinstance(atoms_dict, AtomsDict):
+        return atoms_dict
+    return REGISTRY.register(atoms_dict, compound_name, "pubchem").summary()
 
+
+def fetch_pubchem_geometry(compound_name: str) -> Union[AtomsDict, Dict[str, str]]:
+    """
+    3D geometry of a compound from PubChem, or a dictionary with an 'error'.
+    """
     try:
         # Search for the compound using PUG REST API
         search_url = f"https://pubchem.ncbi.nlm.nih.gov/rest/pug/compound/name/{compound_name}/JSON"
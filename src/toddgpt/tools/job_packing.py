@@ -0,0 +1,74 @@
+import re
+from typing import List, Sequence
+
+# Roughly how much TD-DFT work (in natoms**3 units) a single job should carry before
+# ChemCloud's per-job overhead (queueing, container startup, file transfer) stops
+# dominating. Cyclobutanone (11 atoms) packs 15 geometries per job.
+PACKING_TARGET_COST = 2.0e4
+MAX_PACK_SIZE = 32
+
+# Header of the excited state results table TeraChem prints once per frame
+RESULT_HEADERS = {
+    "hhtda": re.compile(r"Root\s+Mult\.\s+Total Energy"),
+    "wpbe": re.compile(r"Final Excited State Results:"),
+}
+
+
+def auto_pack_size(natoms: int, max_pack_size: int = MAX_PACK_SIZE) -> int:
+    """
+    Number of geometries to bundle into one TeraChem job for a molecule of natoms.
+    """
+    pack_size = int(PACKING_TARGET_COST / max(natoms, 1) ** 3)
+    return max(1, min(max_pack_size, pack_size))
+
+
+def chunk(items: Sequence, size: int) -> List[Sequence]:
+    return [items[i : i + size] for i in range(0, len(items), size)]
+
+
+def _results_table_end(lines: List[str], start: int) -> int:
+    """
+    Index of the line following the results table whose header is at lines[start].
+    """
+    i = start + 1
+    # Skip to the dashed separator under the column titles
+    while i < len(lines) and not re.match(r"^\s*[-=]{5,}\s*$", lines[i]):
+        i += 1
+    i += 1
+    # Consume the rows, each starting with the root number
+    while i < len(lines) and re.match(r"^\s*\d+\s", lines[i]):
+        i += 1
+    return i
+
+
+def split_packed_output(stdout: str, method: str, n_frames: int) -> List[str]:
+    """
+    Demultiplex the stdout of a multi-frame TeraChem job into one output per frame.
+    Each frame's output ends with its excited state results table; anything after
+    the last table is kept with the last frame.
+    """
+    if method not in RESULT_HEADERS:
+        raise ValueError(f"Job packing is not supported for method {method}")
+
+    lines = stdout.splitlines(keepends=True)
+    cuts = []
+    i = 0
+    while i < len(lines):
+        if RESULT_HEADERS[method].search(lines[i]):
+            i = _results_table_end(lines, i)
+            cuts.append(i)
+        else:
+            i += 1
+
+    if len(cuts) != n_frames:
+        raise ValueError(
+            f"Expected {n_frames} {method} results blocks in packed output, found {len(cuts)}"
+        )
+
+    cuts[-1] = len(lines)
+    outputs = []
+    start = 0
+    for end in cuts:
+        outputs.append("".join(lines[start:end]))
+        start = end
+    return outputs
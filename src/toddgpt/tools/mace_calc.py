@@ -1,14 +1,17 @@
 import os
 import sys
 import warnings
-from typing import Dict, List, Type, Union
+from typing import Dict, Tuple, Type, Union
 
+import numpy as np
 from ase import Atoms
 from ase.optimize import LBFGS
 from pydantic import BaseModel
 from langchain.tools import BaseTool
 
+from .artifacts import stash
 from .datatypes import AtomsDict
+from .molecule_registry import REGISTRY, resolve_molecule
 
 # Suppress all warnings
 warnings.filterwarnings("ignore")
@@ -33,13 +36,16 @@ finally:
 
 
 class MaceCalculatorInput(BaseModel):
-    atoms_dict: AtomsDict
+    atoms_dict: Union[AtomsDict, str]
     run_type: str
 
 
 class MaceCalculator(BaseTool):
     name: str = "mace_calculator"
-    description: str = "Use this tool after grabbing a geometry from PubChem to minimize the geometry. If the user asks for a geometry optimization, set the run_type to minimize_positions. "
+    description: str = (
+        "Use this tool after grabbing a geometry from PubChem to minimize the geometry. If the user asks for a geometry optimization, set the run_type to minimize_positions. "
+        "'atoms_dict' is a molecule ID or an AtomsDict. The minimized geometry is registered under a new 'molecule_id' to pass to the next tool."
+    )
     args_schema: Type[BaseModel] = MaceCalculatorInput
 
     def __init__(self):
@@ -50,24 +56,45 @@ class MaceCalculator(BaseTool):
 
     def _run(
         self,
-        atoms_dict: AtomsDict,
+        atoms_dict: Union[AtomsDict, str],
         run_type: str,
-    ) -> Dict[str, Union[float, List[List[float]], List[float]]]:
+    ) -> Dict[str, Union[float, str]]:
+        parent = atoms_dict if isinstance(atoms_dict, str) else None
+        atoms_dict = resolve_molecule(atoms_dict)
+        if run_type == "minimize_positions":
+            energy, minimized = self.minimize(atoms_dict)
+            displacement = np.linalg.norm(
+                np.array(minimized.positions) - np.array(atoms_dict.positions), axis=1
+            )
+            molecule = REGISTRY.register(minimized, source="mace", parent=parent)
+            return {
+                **molecule.summary(),
+                "sp_energy": energy,
+                "max_displacement": float(displacement.max()),
+            }
+
         atoms = Atoms(symbols=atoms_dict.symbols, positions=atoms_dict.positions)
         atoms.calc = self.init_calc()
-
         if run_type == "sp_energy":
             return {"sp_energy": atoms.get_potential_energy()}
         elif run_type == "forces":
-            return {"forces": atoms.get_forces().tolist()}
-        elif run_type == "minimize_positions":
-            initial_positions = atoms.get_positions()
-            opt = LBFGS(atoms)
-            opt.run(fmax=0.001)
-            return {
-                "sp_energy": atoms.get_potential_energy(),
-                "initial_positions": initial_positions.tolist(),
-                "minimize_positions": atoms.get_positions().tolist(),
-            }
+            forces = atoms.get_forces()
+            return stash(
+                "forces",
+                forces,
+                {"max_force": float(np.linalg.norm(forces, axis=1).max())},
+            )
         else:
             raise ValueError(f"Invalid run type: {run_type}")
+
+    def minimize(self, atoms_dict: AtomsDict) -> Tuple[float, AtomsDict]:
+        """
+        Energy and geometry after an LBFGS minimization with MACE-OFF.
+        """
+        atoms = Atoms(symbols=atoms_dict.symbols, positions=atoms_dict.positions)
+        atoms.calc = self.init_calc()
+        opt = LBFGS(atoms)
+        opt.run(fmax=0.001)
+        return atoms.get_potential_energy(), AtomsDict(
+            numbers=atoms_dict.numbers, positions=atoms.get_positions().tolist()
+        )
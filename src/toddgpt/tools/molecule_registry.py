@@ -0,0 +1,97 @@
+import re
+from typing import Dict, List, Optional, Union
+
+from ase import Atoms
+from pydantic import BaseModel
+
+from .artifacts import is_handle, resolve_atoms_dict
+from .datatypes import AtomsDict
+
+MOLECULE_ID = re.compile(r"^mol\d+$")
+
+
+class RegisteredMolecule(BaseModel):
+    """
+    A geometry of the session with where it came from: PubChem, a MACE or
+    TeraChem optimization, or the user. parent is the ID it was derived from.
+    """
+
+    id: str
+    name: str = ""
+    source: str = ""
+    parent: Optional[str] = None
+    atoms_dict: AtomsDict
+
+    def summary(self) -> dict:
+        """
+        What the agent sees instead of the coordinates.
+        """
+        return {
+            "molecule_id": self.id,
+            "name": self.name,
+            "formula": Atoms(numbers=self.atoms_dict.numbers).get_chemical_formula(),
+            "n_atoms": len(self.atoms_dict.numbers),
+            "source": self.source,
+        }
+
+
+class MoleculeRegistry:
+    """
+    Geometries of the session under short IDs (mol1, mol2, ...), so that tools
+    pass molecules by ID and the LLM never has to copy coordinates.
+    """
+
+    def __init__(self):
+        self.molecules: Dict[str, RegisteredMolecule] = {}
+
+    def register(
+        self,
+        atoms_dict: AtomsDict,
+        name: str = "",
+        source: str = "",
+        parent: Optional[str] = None,
+    ) -> RegisteredMolecule:
+        if not name and parent in self.molecules:
+            name = self.molecules[parent].name
+        molecule = RegisteredMolecule(
+            id=f"mol{len(self.molecules) + 1}",
+            name=name,
+            source=source,
+            parent=parent,
+            atoms_dict=atoms_dict,
+        )
+        self.molecules[molecule.id] = molecule
+        return molecule
+
+    def get(self, molecule_id: str) -> RegisteredMolecule:
+        molecule = self.molecules.get(molecule_id.strip())
+        if molecule is None:
+            known = ", ".join(self.molecules) or "none"
+            raise ValueError(f"Unknown molecule ID {molecule_id} (registered: {known})")
+        return molecule
+
+    def list(self) -> List[dict]:
+        return [molecule.summary() for molecule in self.molecules.values()]
+
+
+REGISTRY = MoleculeRegistry()
+
+
+def resolve_molecule(atoms_dict: Union[AtomsDict, str]) -> AtomsDict:
+    """
+    The geometry for a molecule ID, a geometry artifact handle or an AtomsDict.
+    """
+    if isinstance(atoms_dict, AtomsDict):
+        return atoms_dict
+    if is_handle(atoms_dict):
+        return resolve_atoms_dict(atoms_dict)
+    return REGISTRY.get(atoms_dict).atoms_dict
+
+
+def molecule_name(atoms_dict: Union[AtomsDict, str]) -> Optional[str]:
+    """
+    Registered name of a molecule ID, if any.
+    """
+    if isinstance(atoms_dict, str) and MOLECULE_ID.match(atoms_dict.strip()):
+        return REGISTRY.get(atoms_dict).name or None
+    return None
@@ -0,0 +1,103 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
+
+# Basis set used for the cheap level of the multi-fidelity ensemble
+DEFAULT_CHEAP_BASIS = "6-31g"
+MIN_SUBSET_SIZE = 3
+SUBSET_FRACTION = 0.1
+
+
+def subset_size(n_samples: int) -> int:
+    """
+    Number of samples to run at the expensive level.
+    """
+    return min(n_samples, max(MIN_SUBSET_SIZE, int(np.ceil(SUBSET_FRACTION * n_samples))))
+
+
+def fit_state_correction(
+    cheap: np.ndarray, expensive: np.ndarray
+) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Fit expensive = shift + scale * cheap independently for every state.
+
+    Params:
+        cheap ((n_samples, n_states) np.ndarray) - cheap excitation energies
+        expensive ((n_samples, n_states) np.ndarray) - expensive excitation energies
+            of the same samples and states
+
+    Returns:
+        shift ((n_states) np.ndarray), scale ((n_states) np.ndarray)
+
+    A state whose cheap energies do not vary over the samples (or with fewer than
+    three samples) only gets a shift.
+    """
+    cheap = np.asarray(cheap, dtype=float)
+    expensive = np.asarray(expensive, dtype=float)
+    cheap_mean = cheap.mean(axis=0)
+    expensive_mean = expensive.mean(axis=0)
+    dc = cheap - cheap_mean
+    de = expensive - expensive_mean
+    var = (dc**2).sum(axis=0)
+    cov = (dc * de).sum(axis=0)
+    fit_scale = (len(cheap) >= MIN_SUBSET_SIZE) & (var > 1e-12)
+    scale = np.where(fit_scale, cov / np.where(fit_scale, var, 1.0), 1.0)
+    shift = expensive_mean - scale * cheap_mean
+    return shift, scale
+
+
+def apply_state_correction(
+    cheap: np.ndarray, shift: np.ndarray, scale: np.ndarray
+) -> np.ndarray:
+    return shift + scale * np.asarray(cheap, dtype=float)
+
+
+def loo_error(cheap: np.ndarray, expensive: np.ndarray) -> float:
+    """
+    Leave-one-out mean absolute error (eV) of the corrected energies on the subset.
+    """
+    cheap = np.asarray(cheap, dtype=float)
+    expensive = np.asarray(expensive, dtype=float)
+    if len(cheap) <= 1:
+        return float("nan")
+    errors = []
+    for i in range(len(cheap)):
+        keep = np.arange(len(cheap)) != i
+        shift, scale = fit_state_correction(cheap[keep], expensive[keep])
+        errors.append(
+            np.abs(apply_state_correction(cheap[i], shift, scale) - expensive[i])
+        )
+    return float(np.mean(errors))
+
+
+def benchmark_correction(
+    cheap: np.ndarray,
+    expensive: np.ndarray,
+    n_subset: Optional[int] = None,
+    seed: int = 0,
+) -> Dict[str, float]:
+    """
+    Error of the multi-fidelity correction against a full expensive ensemble.
+    A random subset is used for the fit and the rest are predicted.
+    """
+    cheap = np.asarray(cheap, dtype=float)
+    expensive = np.asarray(expensive, dtype=float)
+    n_samples = len(cheap)
+    n_subset = n_subset or subset_size(n_samples)
+    order = np.random.default_rng(seed).permutation(n_samples)
+    fit, held_out = order[:n_subset], order[n_subset:]
+    shift, scale = fit_state_correction(cheap[fit], expensive[fit])
+    corrected = apply_state_correction(cheap[held_out], shift, scale)
+    error = np.abs(corrected - expensive[held_out])
+    return {
+        "n_subset": int(n_subset),
+        "n_predicted": int(len(held_out)),
+        "mae_ev": float(error.mean()) if error.size else float("nan"),
+        "max_error_ev": float(error.max()) if error.size else float("nan"),
+        "uncorrected_mae_ev": (
+            float(np.abs(cheap[held_out] - expensive[held_out]).mean())
+            if error.size
+            else float("nan")
+        ),
+        "loo_mae_ev": loo_error(cheap[fit], expensive[fit]),
+    }
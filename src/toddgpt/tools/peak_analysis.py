@@ -0,0 +1,91 @@
+from typing import List
+
+import numpy as np
+
+# Peaks less prominent than this fraction of the maximum intensity are ignored
+DEFAULT_MIN_PROMINENCE = 0.05
+
+
+def grid_at(grid: np.ndarray, index: np.ndarray) -> np.ndarray:
+    """
+    Wavelengths at fractional grid indices, for grids that need not be uniform.
+    """
+    return np.interp(index, np.arange(len(grid)), grid)
+
+
+def find_spectrum_peaks(
+    grid: np.ndarray,
+    intensity: np.ndarray,
+    min_prominence: float = DEFAULT_MIN_PROMINENCE,
+) -> List[dict]:
+    """
+    Peaks of a spectrum, brightest first, with their prominence and full width at
+    half maximum in nm. The width of a peak is cut at the valleys to its
+    neighbours when they lie above its half maximum.
+    """
+    # scipy takes most of a second to import, so only on first use
+    from scipy.signal import find_peaks, peak_widths
+
+    grid = np.asarray(grid, dtype=float)
+    intensity = np.asarray(intensity, dtype=float)
+    if not intensity.any():
+        return []
+    # Pad so that a maximum at the edge of the grid still counts as a peak
+    padded = np.concatenate([[0.0], intensity, [0.0]])
+    index, properties = find_peaks(
+        padded, prominence=min_prominence * intensity.max()
+    )
+    # Measured at half the height of each peak rather than half its prominence
+    _, _, left, right = peak_widths(
+        padded,
+        index,
+        rel_height=0.5,
+        prominence_data=(
+            padded[index],
+            properties["left_bases"],
+            properties["right_bases"],
+        ),
+    )
+    index, left, right = index - 1, left - 1, right - 1
+    fwhm = grid_at(grid, np.clip(right, 0, len(grid) - 1)) - grid_at(
+        grid, np.clip(left, 0, len(grid) - 1)
+    )
+    peaks = [
+        {
+            "wavelength_nm": float(grid[i]),
+            "intensity": float(intensity[i]),
+            "prominence": float(prominence),
+            "fwhm_nm": float(width),
+        }
+        for i, prominence, width in zip(index, properties["prominences"], fwhm)
+    ]
+    return sorted(peaks, key=lambda peak: peak["intensity"], reverse=True)
+
+
+def analyze_spectrum(
+    grid: np.ndarray,
+    intensity: np.ndarray,
+    min_prominence: float = DEFAULT_MIN_PROMINENCE,
+) -> dict:
+    """
+    Lambda max, its FWHM, the secondary peaks and the integrated intensity of a
+    spectrum on an increasing wavelength grid.
+    """
+    from scipy.integrate import trapezoid
+
+    peaks = find_spectrum_peaks(grid, intensity, min_prominence)
+    if not peaks:
+        return {
+            "lambda_max_nm": None,
+            "max_intensity": 0.0,
+            "fwhm_nm": None,
+            "secondary_peaks": [],
+            "integrated_intensity": 0.0,
+        }
+    return {
+        "lambda_max_nm": peaks[0]["wavelength_nm"],
+        "max_intensity": peaks[0]["intensity"],
+        "fwhm_nm": peaks[0]["fwhm_nm"],
+        "secondary_peaks": peaks[1:],
+        "integrated_intensity": float(trapezoid(intensity, grid)),
+    }
@@ -0,0 +1,96 @@
+from typing import Callable, Optional, Sequence, Tuple
+
+import numpy as np
+
+from src.toddgpt.parsers.excitations import HC_EV_NM
+from .update_tc_input import get_tc_keyword, set_tc_keyword
+
+# Wavelength window plotted by GenerateSpectrum
+DEFAULT_WINDOW_NM = (100.0, 350.0)
+# Extra roots on top of those inside the window at the reference geometry, since
+# Wigner sampling spreads the excitation energies
+DEFAULT_MARGIN = 2
+MAX_ROOTS = 60
+MIN_GUESS_VECTOR_PADDING = 5
+
+
+def get_root_count(tc_input: str) -> int:
+    """
+    Number of excited states a tc_input asks for. For hh-TDA the ground state is
+    one of the hhtdasinglets roots, so it is not counted.
+    """
+    if (get_tc_keyword(tc_input, "hhtda") or "").lower() == "yes":
+        return int(get_tc_keyword(tc_input, "hhtdasinglets") or 1) - 1
+    return int(get_tc_keyword(tc_input, "cisnumstates") or 0)
+
+
+def set_root_count(tc_input: str, nroots: int) -> str:
+    """
+    Ask for nroots excited states, keeping enough Davidson guess vectors.
+    """
+    if (get_tc_keyword(tc_input, "hhtda") or "").lower() == "yes":
+        tc_input = set_tc_keyword(tc_input, "hhtdasinglets", nroots + 1)
+        tc_input = set_tc_keyword(tc_input, "cisnumstates", nroots + 1)
+        nvectors = nroots + 1
+    else:
+        tc_input = set_tc_keyword(tc_input, "cisnumstates", nroots)
+        nvectors = nroots
+    guess_vectors = int(get_tc_keyword(tc_input, "cisguessvecs") or 0)
+    if guess_vectors < nvectors + MIN_GUESS_VECTOR_PADDING:
+        tc_input = set_tc_keyword(
+            tc_input, "cisguessvecs", nvectors + MIN_GUESS_VECTOR_PADDING
+        )
+    return tc_input
+
+
+def highest_root_in_window(
+    ex_energies_ev: Sequence[float], window_nm: Tuple[float, float] = DEFAULT_WINDOW_NM
+) -> bool:
+    """
+    True if the highest computed root still absorbs at or above the short
+    wavelength edge of the window, i.e. there may be more roots inside it.
+    """
+    if len(ex_energies_ev) == 0:
+        return True
+    return HC_EV_NM / np.max(ex_energies_ev) >= min(window_nm)
+
+
+def roots_for_window(
+    ex_energies_ev: Sequence[float],
+    window_nm: Tuple[float, float] = DEFAULT_WINDOW_NM,
+    margin: int = DEFAULT_MARGIN,
+) -> int:
+    """
+    Roots needed to cover the window. Roots to the red of the window are still
+    counted, since the solver returns the lowest roots first.
+    """
+    ex_energies_ev = np.asarray(ex_energies_ev, dtype=float)
+    max_energy = HC_EV_NM / min(window_nm)
+    return max(1, int(np.sum(ex_energies_ev <= max_energy)) + margin)
+
+
+def probe_root_count(
+    run_probe: Callable[[str], Sequence[float]],
+    tc_input: str,
+    window_nm: Tuple[float, float] = DEFAULT_WINDOW_NM,
+    margin: int = DEFAULT_MARGIN,
+    max_roots: int = MAX_ROOTS,
+    start_roots: Optional[int] = None,
+) -> int:
+    """
+    Pick the root count for the window from probe calculations. run_probe takes a
+    tc_input and returns the excitation energies in eV. The root count is doubled
+    until the highest computed root falls outside the window. A probe without any
+    excitation energies is an error, since asking for more roots will not help.
+    """
+    nroots = max(start_roots or get_root_count(tc_input), 1)
+    while True:
+        ex_energies_ev = run_probe(set_root_count(tc_input, nroots))
+        if len(ex_energies_ev) == 0:
+            raise ValueError(
+                f"Probe calculation with {nroots} roots returned no excitations"
+            )
+        if not highest_root_in_window(ex_energies_ev, window_nm) or nroots >= max_roots:
+            break
+        nroots = min(2 * nroots, max_roots)
+    return min(roots_for_window(ex_energies_ev, window_nm, margin), max_roots)
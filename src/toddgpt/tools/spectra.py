@@ -1,34 +1,101 @@
-from typing import List, Type
+from typing import List, Optional, Tuple, Type, Union
 from pydantic import BaseModel
 from langchain_core.tools import BaseTool
 from .datatypes import AtomsDict
+from .artifacts import stash
+from .molecule_registry import REGISTRY, molecule_name, resolve_molecule
 from .chemcloud_tool import RunTerachem, FindJobExample
 from pathlib import Path
+from ase import units
 from ase.io import read
+import io
 import os
-from .wigner.wigner import run_wigner
+from .wigner.wigner import run_wigner, write_tc_hessian
+from .fd_hessian import (
+    DEFAULT_STEP,
+    GRADIENT_CONVTHRE,
+    assemble_hessian,
+    displaced_geometries,
+)
+from .update_tc_input import get_tc_keyword, set_tc_keyword
+from .multi_fidelity import (
+    DEFAULT_CHEAP_BASIS,
+    apply_state_correction,
+    benchmark_correction,
+    fit_state_correction,
+    loo_error,
+    subset_size,
+)
+from .root_count import (
+    DEFAULT_WINDOW_NM,
+    get_root_count,
+    probe_root_count,
+    set_root_count,
+)
+from .excitation_db import ExcitationDB, RunKey, run_key
+from .job_packing import auto_pack_size, chunk, split_packed_output
+from .warm_start import (
+    collect_guess_files,
+    load_guess_files,
+    reference_tc_input,
+    save_guess_files,
+    warm_start_tc_input,
+)
 import logging
-from src.toddgpt.parsers.parse_hhtda import get_uv_vis_data as get_uv_vis_data_hhtda
-from src.toddgpt.parsers.parse_wpbe import get_uv_vis_data as get_uv_vis_data_wpbe
+from src.toddgpt.parsers.parse_hhtda import get_excitations as get_excitations_hhtda
+from src.toddgpt.parsers.parse_wpbe import get_excitations as get_excitations_wpbe
+from src.toddgpt.parsers.excitations import (
+    HC_EV_NM,
+    concatenate_excitations,
+    sample_id,
+)
+from src.toddgpt.parsers.parse_gradient import extract_gradient
+from src.toddgpt.parsers.parse_cache import parse_outputs, sidecar_path, write_sidecar
+from .bootstrap import DEFAULT_RESAMPLES, bootstrap_bands, sample_spectra
+from .broadening import BroadeningParams, auto_grid, broaden
+from .peak_analysis import DEFAULT_MIN_PROMINENCE, analyze_spectrum
+from .spectrum_comparison import DEFAULT_SHIFTS_EV, common_grid, compare_spectra, resample
+from .spectrum_cache import (
+    CachedSpectrum,
+    SpectrumCache,
+    cache_key,
+    directory_stamp,
+    params_suffix,
+)
+from .spectrum_data import SPECTRA_DIR, Spectrum, render_overlay
+from .experimental_spectra import ExperimentalSpectraStore, read_csv_spectrum
+from .spectrum_accumulator import ACCUMULATORS, SpectrumAccumulator, current_spectrum
 import numpy as np
-import matplotlib.pyplot as plt
 import base64
 import requests
 import json
 
 logging.basicConfig(level=logging.INFO)
 
+EXCITATION_PARSERS = {
+    "hhtda": get_excitations_hhtda,
+    "wpbe": get_excitations_wpbe,
+}
+
 
 class OptimizeMoleculeInput(BaseModel):
-    atoms_dict: AtomsDict
+    atoms_dict: Union[AtomsDict, str]
 
 
 class OptimizeMolecule(BaseTool):
     name: str = "optimize_molecule_for_spectrum"
-    description: str = "This is the first tool you should use to optimize the geometry of a molecule to generate a UV-Visspectrum."
+    description: str = (
+        "This is the first tool you should use to optimize the geometry of a molecule to generate a UV-Visspectrum. "
+        "'atoms_dict' is a molecule ID or an AtomsDict; the optimized geometry is registered under a new 'molecule_id'."
+    )
     args_schema: Type[BaseModel] = OptimizeMoleculeInput
 
-    def _run(self, atoms_dict: AtomsDict):
+    def _run(self, atoms_dict: Union[AtomsDict, str]):
+        parent = atoms_dict if isinstance(atoms_dict, str) else None
+        optimized = self.optimize(resolve_molecule(atoms_dict))
+        return REGISTRY.register(optimized, source="terachem", parent=parent).summary()
+
+    def optimize(self, atoms_dict: AtomsDict) -> AtomsDict:
         output_opt_dir = Path("./scratch/minimize")
         output_opt_dir.mkdir(parents=True, exist_ok=True)
         logging.info("Directory for optimization created at %s", output_opt_dir)
@@ -36,7 +103,7 @@ class OptimizeMolecule(BaseTool):
         tc_input = FindJobExample()._run("minimize")
         logging.info("Running TeraChem with minimize job")
 
-        prog_output = RunTerachem()._run(tc_input, atoms_dict)
+        prog_output = RunTerachem().run_terachem(tc_input, atoms_dict)
         with open(output_opt_dir / "tc.out", "w") as f:
             f.write(prog_output.stdout)
         logging.info(f"TeraChem output written to {output_opt_dir}/tc.out")
@@ -44,7 +111,10 @@ class OptimizeMolecule(BaseTool):
         prog_output.results.save_files(output_opt_dir)
         logging.info(f"Results saved to {output_opt_dir}")
 
-        return self.grab_optimized_geom(output_opt_dir)
+        return AtomsDict(
+            numbers=atoms_dict.numbers,
+            positions=self.grab_optimized_geom(output_opt_dir).tolist(),
+        )
 
     def grab_optimized_geom(self, output_opt_dir: Path):
         atoms = read(output_opt_dir / "scr.geom/optim.xyz", index=-1, format="extxyz")
@@ -52,29 +122,37 @@ class OptimizeMolecule(BaseTool):
 
 
 class RunHessianInput(BaseModel):
-    atoms_dict: AtomsDict
+    atoms_dict: Union[AtomsDict, str]
+    parallel: bool = False
 
 
 class RunHessian(BaseTool):
     name: str = "run_hessian"
-    description: str = "Use this tool to run a Hessian calculation, only after running optimize_molecule_for_spectrum."
+    description: str = (
+        "Use this tool to run a Hessian calculation, only after running optimize_molecule_for_spectrum, on the molecule ID it returned. "
+        "Set 'parallel' to true to split the finite difference Hessian into concurrent gradient jobs for larger molecules."
+    )
     args_schema: Type[BaseModel] = RunHessianInput
 
-    def _run(self, atoms_dict: AtomsDict):
+    def _run(self, atoms_dict: Union[AtomsDict, str], parallel: bool = False):
+        atoms_dict = resolve_molecule(atoms_dict)
         output_hessian_dir = Path("./scratch/initcond")
         output_hessian_dir.mkdir(parents=True, exist_ok=True)
         logging.info(f"Directory for Hessian created at {output_hessian_dir}")
 
         tc_input = FindJobExample()._run("initcond")
-        logging.info("Running TeraChem with initcond job")
+        if parallel:
+            self.run_parallel_hessian(tc_input, atoms_dict, output_hessian_dir)
+        else:
+            logging.info("Running TeraChem with initcond job")
 
-        prog_output = RunTerachem()._run(tc_input, atoms_dict)
-        with open(output_hessian_dir / "tc.out", "w") as f:
-            f.write(prog_output.stdout)
-        logging.info(f"TeraChem output written to {output_hessian_dir}/tc.out")
+            prog_output = RunTerachem().run_terachem(tc_input, atoms_dict)
+            with open(output_hessian_dir / "tc.out", "w") as f:
+                f.write(prog_output.stdout)
+            logging.info(f"TeraChem output written to {output_hessian_dir}/tc.out")
 
-        prog_output.results.save_files(output_hessian_dir)
-        logging.info(f"Results saved to {output_hessian_dir}")
+            prog_output.results.save_files(output_hessian_dir)
+            logging.info(f"Results saved to {output_hessian_dir}")
 
         output_wigner_dir = Path("./scratch/wigner")
         output_wigner_dir.mkdir(parents=True, exist_ok=True)
@@ -85,101 +163,630 @@ class RunHessian(BaseTool):
             wigner_dir=output_wigner_dir,
         )
 
+    def run_parallel_hessian(
+        self,
+        tc_input: str,
+        atoms_dict: AtomsDict,
+        output_hessian_dir: Path,
+        step: float = DEFAULT_STEP,
+    ):
+        """
+        Finite difference Hessian from 6N concurrent gradient jobs, written to
+        scr.geom/Hessian.bin in the layout TeraChem's initcond job produces.
+        """
+        tc_input = set_tc_keyword(tc_input, "run", "gradient")
+        tc_input = set_tc_keyword(tc_input, "convthre", GRADIENT_CONVTHRE)
+
+        xyz = np.array(atoms_dict.positions) / units.Bohr
+        displaced = displaced_geometries(xyz, step)
+        jobs = [
+            AtomsDict(numbers=atoms_dict.numbers, positions=(x * units.Bohr).tolist())
+            for x in displaced
+        ]
+        logging.info(f"Running {len(jobs)} TeraChem gradient jobs for the Hessian")
+
+        gradients = [None] * len(jobs)
+        for i, prog_output in RunTerachem().iter_terachem_batch(tc_input, jobs):
+            if prog_output is None or not prog_output.success:
+                raise ValueError(
+                    f"Gradient job {i} for the finite difference Hessian failed"
+                )
+            gradients[i] = extract_gradient(prog_output.stdout)
+
+        hess = assemble_hessian(gradients, step)
+        hessian_file = output_hessian_dir / "scr.geom/Hessian.bin"
+        hessian_file.parent.mkdir(parents=True, exist_ok=True)
+        write_tc_hessian(hessian_file, atoms_dict.numbers, xyz, hess, step)
+        logging.info(f"Finite difference Hessian written to {hessian_file}")
+
 
 class RunTDDFTInput(BaseModel):
-    atoms_dict: AtomsDict
+    atoms_dict: Union[AtomsDict, str]
     method: str
+    warm_start: bool = False
+    packing: bool = False
+    auto_roots: bool = False
+    molecule: Optional[str] = None
 
 
 class RunTDDFT(BaseTool):
     name: str = "run_td_dft"
     description: str = (
         "Use this tool to run a TD-DFT calculation, only after using run_hessian. "
-        "Requires two separate inputs: 'atoms_dict' (an AtomsDict object) and 'method' (a string)."
+        "Requires two separate inputs: 'atoms_dict' (a molecule ID or an AtomsDict object) and 'method' (a string). "
+        "Set 'warm_start' to true to start every Wigner sample from a reference calculation at 'atoms_dict'. "
+        "Set 'packing' to true to bundle several Wigner samples into each TeraChem job for small molecules. "
+        "Set 'auto_roots' to true to pick the number of excited states from the spectral window. "
+        "Pass the molecule name as 'molecule' so the results are stored for lookup_excitations and generate_spectrum."
     )
     args_schema: Type[BaseModel] = RunTDDFTInput
 
-    def _run(self, atoms_dict: AtomsDict, method: str):
+    def _run(
+        self,
+        atoms_dict: Union[AtomsDict, str],
+        method: str,
+        warm_start: bool = False,
+        packing: bool = False,
+        pack_size: Optional[int] = None,
+        auto_roots: bool = False,
+        window_nm: Tuple[float, float] = DEFAULT_WINDOW_NM,
+        molecule: Optional[str] = None,
+    ):
+        molecule = molecule or molecule_name(atoms_dict)
+        atoms_dict = resolve_molecule(atoms_dict)
         output_wigner_dir = Path("./scratch/wigner")
         output_td_dir = Path(f"./scratch/{method}")
         output_td_dir.mkdir(parents=True, exist_ok=True)
         logging.info(f"Directory for TDDFT created at {output_td_dir}")
 
         tc_input = FindJobExample()._run(method)
+        if auto_roots:
+            nroots = self.probe_root_count(tc_input, atoms_dict, method, window_nm)
+            tc_input = set_root_count(tc_input, nroots)
+            logging.info(f"Solving for {nroots} excited states")
+        guess_files = {}
+        if warm_start:
+            guess_files = self.prepare_warm_start(
+                tc_input, atoms_dict, Path(f"./scratch/reference/{method}")
+            )
+            tc_input = warm_start_tc_input(tc_input, guess_files)
         logging.info(f"Running TeraChem with {method} job")
 
-        for file in output_wigner_dir.glob("x*.xyz"):
-            atoms = read(file)
-            logging.info(f"Running TeraChem with {method} job")
-            prog_output = RunTerachem()._run(
-                tc_input,
-                AtomsDict(
-                    numbers=atoms.get_atomic_numbers(), positions=atoms.get_positions()
-                ),
-            )
-            with open(output_td_dir / file.name.replace(".xyz", ".out"), "w") as f:
+        files = sorted(output_wigner_dir.glob("x*.xyz"))
+        if packing and pack_size is None:
+            pack_size = auto_pack_size(len(atoms_dict.numbers))
+        self.run_ensemble(
+            tc_input,
+            method,
+            files,
+            output_td_dir,
+            guess_files=guess_files,
+            pack_size=pack_size if packing else None,
+            key=run_key(atoms_dict, method, tc_input, molecule),
+        )
+
+    def run_ensemble(
+        self,
+        tc_input: str,
+        method: str,
+        files: List[Path],
+        output_td_dir: Path,
+        guess_files: Optional[dict] = None,
+        pack_size: Optional[int] = None,
+        key: Optional[RunKey] = None,
+    ) -> List[int]:
+        """
+        Run tc_input on every Wigner sample in files and write one .out per sample
+        to output_td_dir. With pack_size, that many samples share a TeraChem job.
+        Each output is parsed from memory as its job completes and added to the
+        spectrum accumulated under output_td_dir.name and, with key, to the
+        excitation database. Returns the sample ids that succeeded; outputs left
+        by earlier runs for failed samples are removed.
+        """
+        output_td_dir.mkdir(parents=True, exist_ok=True)
+        accumulator = SpectrumAccumulator()
+        ACCUMULATORS[output_td_dir.name] = accumulator
+        db = ExcitationDB() if key is not None else None
+        if db is not None:
+            db.start_run(key)
+        packing = pack_size is not None
+        if packing:
+            logging.info(f"Packing {pack_size} geometries per TeraChem job")
+
+        file_chunks = chunk(files, pack_size if packing else 1)
+        jobs = []
+        for packed_files in file_chunks:
+            samples = []
+            for file in packed_files:
+                atoms = read(file)
+                samples.append(
+                    AtomsDict(
+                        numbers=atoms.get_atomic_numbers(),
+                        positions=atoms.get_positions(),
+                    )
+                )
+            jobs.append(samples if packing else samples[0])
+
+        logging.info(f"Submitting {len(jobs)} TeraChem {method} jobs")
+        succeeded = []
+        for i, prog_output in RunTerachem().iter_terachem_batch(
+            tc_input, jobs, extra_files=guess_files
+        ):
+            packed_files = file_chunks[i]
+            names = ", ".join(file.name for file in packed_files)
+            if prog_output is None or not prog_output.success or not prog_output.stdout:
+                # A failed job must not cost the other samples of the batch
+                logging.warning(f"TeraChem job for {names} failed, skipping it")
+                self.discard_outputs(output_td_dir, packed_files)
+                continue
+            if packing:
+                try:
+                    outputs = split_packed_output(
+                        prog_output.stdout, method, len(packed_files)
+                    )
+                except ValueError as e:
+                    logging.warning(f"Skipping packed job for {names}: {e}")
+                    self.discard_outputs(output_td_dir, packed_files)
+                    continue
+            else:
+                outputs = [prog_output.stdout]
+            for file, stdout in zip(packed_files, outputs):
+                out_file = self.write_output(output_td_dir, file, stdout)
+                excitations = EXCITATION_PARSERS[method](
+                    io.StringIO(stdout), sample=sample_id(file)
+                )
+                accumulator.add(excitations)
+                if db is not None:
+                    db.add(key, excitations)
+                # Later reads of out_file from disk reuse this parse
+                write_sidecar(out_file, EXCITATION_PARSERS[method], excitations)
+                succeeded.append(sample_id(file))
+        return sorted(succeeded)
+
+    def output_path(self, output_td_dir: Path, file: Path) -> Path:
+        return output_td_dir / f"{file.stem}.out"
+
+    def discard_outputs(self, output_td_dir: Path, files: List[Path]):
+        """
+        Remove the outputs and parse sidecars of files left by an earlier run, so
+        that they are not read as results of this one.
+        """
+        for file in files:
+            out_file = self.output_path(output_td_dir, file)
+            out_file.unlink(missing_ok=True)
+            sidecar_path(out_file).unlink(missing_ok=True)
+
+    def write_output(self, output_td_dir: Path, file: Path, stdout: str) -> Path:
+        out_file = self.output_path(output_td_dir, file)
+        with open(out_file, "w") as f:
+            f.write(stdout)
+        logging.info(f"TeraChem output written to {out_file}")
+        return out_file
+
+    def probe_root_count(
+        self,
+        tc_input: str,
+        atoms_dict: AtomsDict,
+        method: str,
+        window_nm: Tuple[float, float],
+    ) -> int:
+        """
+        Pick the number of excited states covering window_nm from probe
+        calculations at the reference geometry.
+        """
+        probe_dir = Path(f"./scratch/reference/{method}")
+        probe_dir.mkdir(parents=True, exist_ok=True)
+
+        def run_probe(probe_input: str):
+            nroots = get_root_count(probe_input)
+            logging.info(f"Running probe calculation with {nroots} excited states")
+            prog_output = RunTerachem().run_terachem(probe_input, atoms_dict)
+            if not prog_output.success or not prog_output.stdout:
+                raise ValueError(
+                    f"Probe calculation with {nroots} roots failed: "
+                    f"{prog_output.traceback or 'no output'}"
+                )
+            probe_file = probe_dir / f"probe_{nroots}.out"
+            with open(probe_file, "w") as f:
                 f.write(prog_output.stdout)
-            logging.info(
-                f"TeraChem output written to {output_td_dir}/{file.name.replace('.xyz', '.out')}"
+            return EXCITATION_PARSERS[method](probe_file)["ex_energy_ev"]
+
+        return probe_root_count(run_probe, tc_input, window_nm)
+
+    def prepare_warm_start(
+        self, tc_input: str, atoms_dict: AtomsDict, reference_dir: Path
+    ):
+        """
+        Run, or reuse, a reference calculation at the equilibrium geometry and
+        return its orbitals and excitation vectors as initial guess files.
+        """
+        ref_input = reference_tc_input(tc_input)
+        guess_files = load_guess_files(reference_dir, ref_input, atoms_dict)
+        if guess_files:
+            logging.info(f"Reusing reference calculation in {reference_dir}")
+            return guess_files
+
+        logging.info("Running reference calculation at the equilibrium geometry")
+        prog_output = RunTerachem().run_terachem(ref_input, atoms_dict)
+        reference_dir.mkdir(parents=True, exist_ok=True)
+        with open(reference_dir / "tc.out", "w") as f:
+            f.write(prog_output.stdout)
+        guess_files = collect_guess_files(prog_output.results.files)
+        save_guess_files(reference_dir, ref_input, atoms_dict, guess_files)
+        logging.info(f"Reference guess files saved to {reference_dir}")
+        return guess_files
+
+
+class RunMultiFidelityTDDFTInput(BaseModel):
+    method: str
+    expensive_basis: Optional[str] = None
+    cheap_basis: str = DEFAULT_CHEAP_BASIS
+    cheap_roots: Optional[int] = None
+    benchmark: bool = False
+    tc_input: Optional[str] = None
+
+
+class RunMultiFidelityTDDFT(BaseTool):
+    name: str = "run_multi_fidelity_td_dft"
+    description: str = (
+        "Use this tool instead of rerunning run_td_dft when escalating to a larger basis set. "
+        "It runs every Wigner sample with 'cheap_basis', only a small subset with 'expensive_basis', "
+        "and corrects the remaining samples with a per-state shift and scale fitted on the subset. "
+        "Set 'benchmark' to true to also run the expensive level on every sample and report the error of the correction. "
+        "Pass the tc_input returned by update_tc_input as 'tc_input' to use it instead of the method's template. "
+        "Afterwards use generate_spectrum with method '<method>_mf'."
+    )
+    args_schema: Type[BaseModel] = RunMultiFidelityTDDFTInput
+
+    def _run(
+        self,
+        method: str,
+        expensive_basis: Optional[str] = None,
+        cheap_basis: str = DEFAULT_CHEAP_BASIS,
+        cheap_roots: Optional[int] = None,
+        benchmark: bool = False,
+        tc_input: Optional[str] = None,
+    ):
+        files = sorted(Path("./scratch/wigner").glob("x*.xyz"))
+        tc_input = tc_input or FindJobExample()._run(method)
+        if expensive_basis:
+            tc_input = set_tc_keyword(tc_input, "basis", expensive_basis)
+        cheap_input = set_tc_keyword(tc_input, "basis", cheap_basis)
+        if cheap_roots:
+            cheap_input = set_root_count(cheap_input, cheap_roots)
+
+        n_fit = subset_size(len(files))
+        expensive_files = files if benchmark else files[:n_fit]
+        cheap_dir = Path(f"./scratch/{method}_cheap")
+        expensive_dir = Path(f"./scratch/{method}_expensive")
+        logging.info(
+            f"Running {len(files)} samples with {cheap_basis} and {len(expensive_files)} "
+            f"with {get_tc_keyword(tc_input, 'basis')}"
+        )
+        tddft = RunTDDFT()
+        cheap_ids = tddft.run_ensemble(cheap_input, method, files, cheap_dir)
+        expensive_ids = tddft.run_ensemble(
+            tc_input, method, expensive_files, expensive_dir
+        )
+
+        # Only samples that succeeded at both levels pair up, matched by sample id
+        by_id = {sample_id(file): file for file in files}
+        both_ids = sorted(set(cheap_ids) & set(expensive_ids))
+        subset_ids = {sample_id(file) for file in files[:n_fit]}
+        fit_ids = [i for i in both_ids if i in subset_ids]
+        if not fit_ids:
+            raise ValueError(
+                "No sample succeeded at both the cheap and expensive level"
             )
+        failed = sorted(set(by_id) - set(cheap_ids))
+        if failed:
+            logging.warning(f"Leaving out failed samples {failed}")
+
+        cheap = self.read_ensemble(method, cheap_dir, [by_id[i] for i in cheap_ids])
+        expensive = self.read_ensemble(
+            method, expensive_dir, [by_id[i] for i in both_ids]
+        )
+        n_states = min(cheap.shape[1], expensive.shape[1])
+        cheap, expensive = cheap[:, :n_states], expensive[:, :n_states]
+        cheap_row = {i: row for row, i in enumerate(cheap_ids)}
+        cheap_both = cheap[[cheap_row[i] for i in both_ids]]
+        # fit_ids are the lowest ids in both_ids, so the fit rows come first
+        n_paired = len(fit_ids)
+
+        cheap_ev = cheap["ex_energy_ev"]
+        expensive_ev = expensive["ex_energy_ev"]
+        shift, scale = fit_state_correction(
+            cheap_both["ex_energy_ev"][:n_paired], expensive_ev[:n_paired]
+        )
+        corrected = cheap.copy()
+        corrected["ex_energy_ev"] = apply_state_correction(cheap_ev, shift, scale)
+        corrected["ex_energy_nm"] = HC_EV_NM / corrected["ex_energy_ev"]
+        corrected[[cheap_row[i] for i in fit_ids]] = expensive[:n_paired]
+
+        output_dir = Path(f"./scratch/{method}_mf")
+        output_dir.mkdir(parents=True, exist_ok=True)
+        np.save(output_dir / "excitations.npy", corrected.ravel())
+        logging.info(f"Corrected excitations written to {output_dir}/excitations.npy")
+
+        report = {
+            "n_samples": len(cheap_ids),
+            "n_expensive": n_paired,
+            "n_states": n_states,
+            "shift_ev": shift.round(4).tolist(),
+            "scale": scale.round(4).tolist(),
+            "loo_mae_ev": loo_error(
+                cheap_both["ex_energy_ev"][:n_paired], expensive_ev[:n_paired]
+            ),
+        }
+        if failed:
+            report["failed_samples"] = failed
+        if benchmark:
+            report["benchmark"] = benchmark_correction(
+                cheap_both["ex_energy_ev"], expensive_ev, n_paired
+            )
+        return report
+
+    def read_ensemble(self, method: str, output_td_dir: Path, files: List[Path]):
+        """
+        (n_samples, n_states) excitation array of files in order, truncated to
+        the smallest number of states found in any sample.
+        """
+        data = parse_outputs(
+            [output_td_dir / f"{file.stem}.out" for file in files],
+            EXCITATION_PARSERS[method],
+        )
+        n_states = min(len(sample) for sample in data)
+        return np.stack([sample[:n_states] for sample in data])
+
+
+def spectrum_label(
+    method: str,
+    molecule: Optional[str] = None,
+    params: Optional[BroadeningParams] = None,
+) -> str:
+    label = method
+    if molecule:
+        label = f"{'_'.join(molecule.strip().lower().split())}_{method}"
+    suffix = params_suffix(params)
+    return f"{label}_{suffix}" if suffix else label
+
+
+class LookupExcitationsInput(BaseModel):
+    molecule: Optional[str] = None
+    method: Optional[str] = None
+
+
+class LookupExcitations(BaseTool):
+    name: str = "lookup_excitations"
+    description: str = (
+        "Use this tool before running any calculation to check whether excitations for a molecule "
+        "(name or InChIKey) and method were already computed. If a run is listed, skip straight to "
+        "generate_spectrum with the same 'method' and 'molecule'."
+    )
+    args_schema: Type[BaseModel] = LookupExcitationsInput
+
+    def _run(self, molecule: Optional[str] = None, method: Optional[str] = None):
+        runs = ExcitationDB().runs(method=method, molecule=molecule)
+        if not runs:
+            return f"No stored excitations for {molecule or 'any molecule'} with {method or 'any method'}."
+        return runs
 
 
 class SpectraInput(BaseModel):
     method: str
+    molecule: Optional[str] = None
+    lineshape: str = "gaussian"
+    sigma: Optional[float] = None
+    gamma: Optional[float] = None
+    domain: str = "wavelength"
+    n_resamples: int = DEFAULT_RESAMPLES
+    render: bool = True
 
 
 class GenerateSpectrum(BaseTool):
     name: str = "generate_spectrum"
-    description: str = "Use this tool to generate a UV-Vis spectrum after using optimize_molecule_for_spectrum, run_hessian, and run_td_dft."
+    description: str = (
+        "Use this tool to generate a UV-Vis spectrum after using optimize_molecule_for_spectrum, run_hessian, and run_td_dft. "
+        "Pass 'molecule' to build the spectrum from stored results of an earlier run_td_dft instead. "
+        "'lineshape' is gaussian, lorentzian or voigt, broadened in the 'domain' wavelength (widths in nm) "
+        "or energy (widths in eV) with Gaussian standard deviation 'sigma' and Lorentzian half width 'gamma'. "
+        "Reports lambda max with a bootstrap confidence interval over the Wigner samples; a wide interval means more samples are needed. "
+        "The spectrum is always written as .npz and .csv data; set 'render' to false to skip the PNG."
+    )
     args_schema: Type[BaseModel] = SpectraInput
 
-    def _run(self, method: str):
-        logging.info(f"Generating spectrum for {method}")
+    def _run(
+        self,
+        method: str,
+        molecule: Optional[str] = None,
+        lineshape: str = "gaussian",
+        sigma: Optional[float] = None,
+        gamma: Optional[float] = None,
+        domain: str = "wavelength",
+        n_resamples: int = DEFAULT_RESAMPLES,
+        render: bool = True,
+    ):
+        params = BroadeningParams(
+            lineshape=lineshape, sigma=sigma, gamma=gamma, domain=domain
+        )
+        logging.info(f"Generating spectrum for {spectrum_label(method, molecule, params)}")
+        spectrum = self.compute_spectrum(method, molecule, params, n_resamples)
+        if spectrum is None:
+            return f"No stored {method} excitations for {molecule}. Run run_td_dft first."
+        paths = spectrum.save()
+        logging.info(f"Spectrum data written to {paths['npz']} and {paths['csv']}")
+        message = f"Spectrum data written to {paths['npz']} and {paths['csv']}"
+        if render:
+            png = spectrum.render()
+            logging.info(f"Writing output to {png}")
+            message = f"Generated spectra can be viewed at {png}. {message}"
+        if spectrum.lower is not None:
+            low, high = spectrum.summary["lambda_max_ci_nm"]
+            message += (
+                f". Lambda max {spectrum.summary['lambda_max_nm']:.1f} nm, "
+                f"{spectrum.summary['confidence']:.0%} bootstrap interval {low:.1f}-{high:.1f} nm "
+                f"over {spectrum.summary['n_samples']} Wigner samples"
+            )
+        return message
+
+    def compute_spectrum(
+        self,
+        method: str,
+        molecule: Optional[str] = None,
+        params: Optional[BroadeningParams] = None,
+        n_resamples: int = DEFAULT_RESAMPLES,
+    ) -> Optional[Spectrum]:
+        """
+        Spectrum of method, from the excitation database when molecule is given
+        and otherwise from the current run. None if nothing is stored for molecule.
+        Spectra are cached per molecule, method and broadening, and only rebuilt
+        when their excitations change.
+        """
+        params = params or BroadeningParams()
+        if molecule:
+            source = json.dumps(ExcitationDB().runs(method=method, molecule=molecule))
+        else:
+            source = directory_stamp(Path(f"./scratch/{method}"))
+        key = cache_key(method, molecule, params, n_resamples, source)
+        cache = SpectrumCache()
+        cached = cache.get(key)
+        if cached is not None:
+            logging.info(f"Using cached spectrum {cached.spectrum.label}")
+            return cached.spectrum
+
+        built = self.build_spectrum(method, molecule, params, n_resamples)
+        if built is None:
+            return None
+        excitations, spectrum = built
+        cache.put(
+            key,
+            CachedSpectrum(
+                method=method,
+                molecule=molecule or "",
+                params=params,
+                n_resamples=n_resamples,
+                spectrum=spectrum,
+                sticks=excitations,
+            ),
+        )
+        return spectrum
+
+    def build_spectrum(
+        self,
+        method: str,
+        molecule: Optional[str],
+        params: BroadeningParams,
+        n_resamples: int,
+    ) -> Optional[Tuple[np.ndarray, Spectrum]]:
+        label = spectrum_label(method, molecule, params)
+        if molecule:
+            excitations = ExcitationDB().lookup(method, molecule)
+            if len(excitations) == 0:
+                return None
+            logging.info(f"Read {len(excitations)} stored excitations for {label}")
+            return excitations, self.spectrum_from_excitations(
+                excitations, label, params, n_resamples
+            )
+
+        # The accumulated spectrum is broadened with the default lineshape
+        accumulated = current_spectrum(method)
+        if accumulated is not None and params == BroadeningParams():
+            logging.info(f"Using the spectrum accumulated while running {method}")
+            excitations = ACCUMULATORS[method].excitations()
+            return excitations, self.spectrum_from_excitations(
+                excitations, label, params, n_resamples, *accumulated
+            )
         logging.info(f"Reading files from ./scratch/{method}")
-        logging.info(f"Writing output to ./scratch/spectra/{method}.png")
-        self.plot_spectra(method)
-        return f"Generated spectra can be viewed at ./scratch/spectra/{method}.png"
+        excitations = self.load_excitations(method)
+        return excitations, self.spectrum_from_excitations(
+            excitations, label, params, n_resamples
+        )
 
-    def plot_spectra(self, method: str):
+    def plot_spectra(
+        self,
+        method: str,
+        params: Optional[BroadeningParams] = None,
+        n_resamples: int = DEFAULT_RESAMPLES,
+    ) -> Spectrum:
         logging.info(f"Plotting spectrum for {method}")
-        spectra_dir = Path("./scratch/spectra")
-        spectra_dir.mkdir(parents=True, exist_ok=True)
-        uv_vis_data = []
-        for file in Path(f"./scratch/{method}").glob("*.out"):
-            if method == "hhtda":
-                data = get_uv_vis_data_hhtda(file)
-            elif method == "wpbe":
-                data = get_uv_vis_data_wpbe(file)
-            uv_vis_data.extend(data)
-
-        uv_vis_data = np.array(
-            uv_vis_data
-        )  # first column is wavelengths, second is osc strength
-        energy_data = uv_vis_data[:, 0]
-        osc_strength_data = uv_vis_data[:, 1]
-        osc_strength_data /= osc_strength_data.max()
-
-        grid = np.linspace(100, 350, 551)
-        self.spectrum(energy_data, osc_strength_data, grid, plot_label=method)
-
-    def gaussian(self, x, x0, sigma):
-        return np.exp(-((x - x0) ** 2) / (2 * sigma**2)) / (sigma * np.sqrt(2 * np.pi))
-
-    def spectrum(self, energy, osc_strength, grid, plot_label):
-        output = np.zeros(len(grid))
-        for i, en in enumerate(energy):
-            gauss = self.gaussian(
-                grid, 1240 / en, 5
-            )  # Use wavelength instead of energy
-            output += gauss * osc_strength[i]
-
-        plt.plot(grid, output, linewidth=3, label=plot_label)
-        plt.xlabel("Wavelength (nm)")
-        plt.ylabel("Intensity")
-        plt.title(f"UV-Vis Spectrum - {plot_label}")
-        plt.legend()
-        plt.savefig(f"./scratch/spectra/{plot_label}.png")
-        plt.close()
+        spectrum = self.compute_spectrum(method, params=params, n_resamples=n_resamples)
+        spectrum.save()
+        spectrum.render()
+        return spectrum
+
+    def spectrum_from_excitations(
+        self,
+        excitations: np.ndarray,
+        label: str,
+        params: Optional[BroadeningParams] = None,
+        n_resamples: int = DEFAULT_RESAMPLES,
+        grid: Optional[np.ndarray] = None,
+        output: Optional[np.ndarray] = None,
+    ) -> Spectrum:
+        """
+        Spectrum of excitations with its bootstrap confidence band (only with two
+        or more samples). grid and output skip broadening when the spectrum is
+        already known.
+        """
+        energy_data = excitations["ex_energy_ev"]
+        osc_scale = excitations["osc_strength"].max()
+        osc_strength_data = excitations["osc_strength"] / osc_scale
+
+        if grid is None:
+            grid = auto_grid(energy_data, osc_strength_data, params)
+            output = self.broaden(energy_data, osc_strength_data, grid, params)
+        bands = self.bands(excitations, grid, params, osc_scale, n_resamples)
+        if bands is None:
+            return Spectrum(label=label, grid=grid, intensity=output)
+        return Spectrum(
+            label=label,
+            grid=grid,
+            intensity=output,
+            lower=bands.pop("lower"),
+            upper=bands.pop("upper"),
+            summary=bands,
+        )
+
+    def bands(
+        self,
+        excitations: np.ndarray,
+        grid: np.ndarray,
+        params: Optional[BroadeningParams] = None,
+        osc_scale: float = 1.0,
+        n_resamples: int = DEFAULT_RESAMPLES,
+    ) -> Optional[dict]:
+        _, spectra = sample_spectra(excitations, grid, params, osc_scale)
+        if len(spectra) < 2:
+            return None
+        return bootstrap_bands(spectra, grid, n_resamples)
+
+    def load_excitations(self, method: str):
+        """
+        Excitations of every sample as one structured array, read from a saved
+        excitations.npy (e.g. multi-fidelity results) or parsed from .out files.
+        """
+        method_dir = Path(f"./scratch/{method}")
+        if (method_dir / "excitations.npy").exists():
+            return np.load(method_dir / "excitations.npy")
+        files = sorted(method_dir.glob("*.out"))
+        return concatenate_excitations(
+            parse_outputs(files, EXCITATION_PARSERS[method])
+        )
+
+    def broaden(self, energy, osc_strength, grid, params=None):
+        return broaden(
+            energy, osc_strength, grid, **(params or BroadeningParams()).model_dump()
+        )
+
+
+def vision_summary(response: dict) -> dict:
+    """
+    The final answer of a structured vision response, or its error message.
+    """
+    if "error" in response:
+        return {"error": response["error"].get("message")}
+    content = json.loads(response["choices"][0]["message"]["content"])
+    return {"answer": content["final_answer"]}
 
 
 def encode_image(image_path):
@@ -193,14 +800,45 @@ class WavelengthResponse(BaseModel):
 
 class CheckGeneratedSpectraInput(BaseModel):
     path: str
+    use_vision: bool = False
+    min_prominence: float = DEFAULT_MIN_PROMINENCE
+
+
+def spectrum_data_path(path: Path) -> Optional[Path]:
+    """
+    The .npz or .csv data of a spectrum, given it or the PNG rendered from it.
+    """
+    path = Path(path)
+    candidates = [path] if path.suffix in (".npz", ".csv") else []
+    candidates += [path.with_suffix(".npz"), path.with_suffix(".csv")]
+    return next((candidate for candidate in candidates if candidate.exists()), None)
 
 
 class CheckGeneratedSpectra(BaseTool):
     name: str = "check_generated_spectra"
-    description: str = "Use this tool to analyze an UV-Vis spectrum and find the wavelength of the maximum absorbance."
+    description: str = (
+        "Use this tool to analyze an UV-Vis spectrum from generate_spectrum and find the wavelength of the maximum absorbance. "
+        "Pass the .png, .npz or .csv path. Returns lambda max, its FWHM, secondary peaks with their prominence and the integrated intensity. "
+        "Set 'use_vision' to true only for images without spectrum data."
+    )
     args_schema: Type[BaseModel] = CheckGeneratedSpectraInput
 
-    def _run(self, path: str):
+    def _run(
+        self,
+        path: str,
+        use_vision: bool = False,
+        min_prominence: float = DEFAULT_MIN_PROMINENCE,
+    ):
+        data_path = spectrum_data_path(Path(path))
+        if use_vision:
+            return self.vision_lambda_max(str(path))
+        if data_path is None:
+            return f"No spectrum data found for {path}. Set use_vision to true to read the image instead."
+        logging.info(f"Analyzing spectrum data in {data_path}")
+        spectrum = Spectrum.load(data_path)
+        return analyze_spectrum(spectrum.grid, spectrum.intensity, min_prominence)
+
+    def vision_lambda_max(self, path: str):
         # Load the image from the path or URL
         if isinstance(path, str):
             base64_image = encode_image(path)  # Encode the image to base64
@@ -263,7 +901,130 @@ class CheckGeneratedSpectra(BaseTool):
                 headers=headers,
                 json=payload,
             )
-            return response.json()
+            return stash("vision", response.json(), vision_summary(response.json()))
             # content = json.loads(response.json()["choices"][0]["message"]["content"])
             # return content
             # return f"Generated Spectra has a lambda max at {content['steps'][0]['output']} nm"
+
+
+class CompareSpectraInput(BaseModel):
+    paths: List[str]
+    molecule: Optional[str] = None
+    experimental_path: Optional[str] = None
+    max_shift_ev: float = 1.5
+
+
+class CompareSpectra(BaseTool):
+    name: str = "compare_spectra"
+    description: str = (
+        "Use this tool to compare computed spectra with the experimental spectrum of a molecule. "
+        "Pass the .png, .npz or .csv paths from generate_spectrum (any number of methods or settings at once) "
+        "and the 'molecule' stored by max_wavelength_tool, or an 'experimental_path' CSV. "
+        "For each spectrum returns the optimal uniform energy shift (positive means the computed spectrum is too red), "
+        "the cosine similarity and overlap (1 is a perfect match) before and after the shift, and the lambda max error. "
+        "Results are sorted best first."
+    )
+    args_schema: Type[BaseModel] = CompareSpectraInput
+
+    def _run(
+        self,
+        paths: List[str],
+        molecule: Optional[str] = None,
+        experimental_path: Optional[str] = None,
+        max_shift_ev: float = 1.5,
+    ):
+        if experimental_path:
+            _, wavelengths, intensity = read_csv_spectrum(Path(experimental_path))
+        elif molecule:
+            experiment = ExperimentalSpectraStore().spectrum(molecule)
+            if experiment is None:
+                return f"No experimental spectrum stored for {molecule}. Run max_wavelength_tool first."
+            wavelengths, intensity = experiment
+        else:
+            return "Pass either 'molecule' or 'experimental_path'."
+
+        spectra = []
+        for path in paths:
+            data_path = spectrum_data_path(Path(path))
+            if data_path is None:
+                return f"No spectrum data found for {path}. Run generate_spectrum first."
+            spectra.append(Spectrum.load(data_path))
+        # Spectra from different settings have different grids
+        grid = common_grid([spectrum.grid for spectrum in spectra])
+        stacked = np.stack(
+            [resample(spectrum.grid, spectrum.intensity, grid) for spectrum in spectra]
+        )
+        shifts = DEFAULT_SHIFTS_EV[np.abs(DEFAULT_SHIFTS_EV) <= max_shift_ev]
+        logging.info(
+            f"Comparing {len(spectra)} spectra over {len(shifts)} shifts against experiment"
+        )
+        results = compare_spectra(
+            grid,
+            stacked,
+            wavelengths,
+            intensity,
+            shifts_ev=shifts,
+            labels=[spectrum.label for spectrum in spectra],
+        )
+        return sorted(results, key=lambda result: result["cosine"], reverse=True)
+
+
+class OverlaySpectraInput(BaseModel):
+    methods: List[str]
+    molecule: Optional[str] = None
+    lineshape: str = "gaussian"
+    sigma: Optional[float] = None
+    gamma: Optional[float] = None
+    domain: str = "wavelength"
+    include_experiment: bool = True
+
+
+class OverlaySpectra(BaseTool):
+    name: str = "overlay_spectra"
+    description: str = (
+        "Use this tool to plot the spectra of several methods for a molecule on one figure, "
+        "together with the experimental spectrum stored by max_wavelength_tool. "
+        "Spectra already made by generate_spectrum with the same broadening are reused without recomputation."
+    )
+    args_schema: Type[BaseModel] = OverlaySpectraInput
+
+    def _run(
+        self,
+        methods: List[str],
+        molecule: Optional[str] = None,
+        lineshape: str = "gaussian",
+        sigma: Optional[float] = None,
+        gamma: Optional[float] = None,
+        domain: str = "wavelength",
+        include_experiment: bool = True,
+    ):
+        params = BroadeningParams(
+            lineshape=lineshape, sigma=sigma, gamma=gamma, domain=domain
+        )
+        generator = GenerateSpectrum()
+        spectra = []
+        for method in methods:
+            spectrum = generator.compute_spectrum(method, molecule, params)
+            if spectrum is None:
+                return f"No stored {method} excitations for {molecule}. Run run_td_dft first."
+            spectra.append(spectrum)
+        experiment = None
+        if include_experiment and molecule:
+            experiment = ExperimentalSpectraStore().spectrum(molecule)
+        name = "_".join(
+            ["overlay", spectrum_label("_".join(methods), molecule, params)]
+        )
+        path = render_overlay(
+            spectra,
+            SPECTRA_DIR / f"{name}.png",
+            experiment,
+            title=f"UV-Vis Spectra - {molecule}" if molecule else "UV-Vis Spectra",
+        )
+        logging.info(f"Overlay of {len(spectra)} spectra written to {path}")
+        peaks = ", ".join(
+            f"{spectrum.label} {spectrum.lambda_max_nm:.1f} nm" for spectrum in spectra
+        )
+        message = f"Overlay can be viewed at {path}. Lambda max: {peaks}"
+        if include_experiment and molecule and experiment is None:
+            message += f". No experimental spectrum stored for {molecule}"
+        return message
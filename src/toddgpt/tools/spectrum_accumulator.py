@@ -0,0 +1,91 @@
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from src.toddgpt.parsers.excitations import concatenate_excitations
+from .broadening import (
+    DEFAULT_SIGMA_NM,
+    GRID_POINTS_PER_WIDTH,
+    broaden,
+    trim_spectrum,
+)
+
+# The accumulator's grid is fixed before any excitation is known, so it spans
+# the whole UV-Vis range. Windowed broadening keeps adding a sample independent
+# of the grid size.
+ACCUMULATOR_RANGE_NM = (50.0, 1000.0)
+
+
+def accumulator_grid(sigma: float = DEFAULT_SIGMA_NM) -> np.ndarray:
+    step = sigma / GRID_POINTS_PER_WIDTH
+    return np.arange(ACCUMULATOR_RANGE_NM[0], ACCUMULATOR_RANGE_NM[1] + step, step)
+
+
+class SpectrumAccumulator:
+    """
+    Running UV-Vis spectrum. Each finished sample's broadened excitations are
+    added to the grid as soon as its job completes, so the spectrum of the samples
+    done so far is available at any moment without re-reading outputs. The
+    sticks are kept as well for per-sample analysis.
+    """
+
+    def __init__(
+        self, grid: Optional[np.ndarray] = None, sigma: float = DEFAULT_SIGMA_NM
+    ):
+        self.grid = (
+            accumulator_grid(sigma) if grid is None else np.asarray(grid, dtype=float)
+        )
+        self.sigma = sigma
+        self.total = np.zeros_like(self.grid)
+        self.max_osc = 0.0
+        self.samples = set()
+        self.sticks: List[np.ndarray] = []
+
+    @property
+    def n_samples(self) -> int:
+        return len(self.samples)
+
+    def add(self, excitations: np.ndarray):
+        """
+        Add a sample's excitations (EXCITATION_DTYPE records) to the spectrum.
+        """
+        if len(excitations) == 0:
+            return
+        osc = excitations["osc_strength"]
+        self.total += broaden(
+            excitations["ex_energy_ev"],
+            osc,
+            self.grid,
+            sigma=self.sigma,
+            method="windowed",
+        )
+        self.max_osc = max(self.max_osc, float(osc.max()))
+        self.samples.update(np.unique(excitations["sample"]).tolist())
+        self.sticks.append(excitations)
+
+    def excitations(self) -> np.ndarray:
+        return concatenate_excitations(self.sticks)
+
+    def intensity(self) -> np.ndarray:
+        """
+        Current spectrum, with oscillator strengths normalized to the largest one
+        seen so far as GenerateSpectrum does.
+        """
+        if self.max_osc == 0.0:
+            return np.zeros_like(self.total)
+        return self.total / self.max_osc
+
+
+# Accumulators of the current session, keyed by method (output directory name)
+ACCUMULATORS: Dict[str, SpectrumAccumulator] = {}
+
+
+def current_spectrum(method: str) -> Optional[Tuple[np.ndarray, np.ndarray]]:
+    """
+    (grid, intensity) of the spectrum accumulated so far for method, if any,
+    trimmed to where it absorbs.
+    """
+    accumulator = ACCUMULATORS.get(method)
+    if accumulator is None or accumulator.n_samples == 0:
+        return None
+    return trim_spectrum(accumulator.grid, accumulator.intensity())
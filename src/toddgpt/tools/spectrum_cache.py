@@ -0,0 +1,139 @@
+import hashlib
+import json
+import logging
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
+from .broadening import BroadeningParams
+from .spectrum_data import Spectrum
+
+SPECTRUM_CACHE_DIR = Path("./scratch/spectrum_cache")
+
+
+class CachedSpectrum(BaseModel):
+    """
+    Broadened spectrum together with the stick excitations it was built from and
+    the settings that identify it.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    method: str
+    molecule: str = ""
+    params: BroadeningParams
+    n_resamples: int
+    spectrum: Spectrum
+    sticks: np.ndarray
+
+
+def params_suffix(params: Optional[BroadeningParams]) -> str:
+    """
+    File name suffix for non-default broadening, so that spectra of the same
+    method with different settings do not overwrite each other.
+    """
+    if params is None or params == BroadeningParams():
+        return ""
+    parts = [params.lineshape, params.domain]
+    for name in ("sigma", "gamma"):
+        value = getattr(params, name)
+        if value is not None:
+            parts.append(f"{name[0]}{value:g}")
+    return "_".join(parts)
+
+
+def cache_key(
+    method: str,
+    molecule: Optional[str],
+    params: BroadeningParams,
+    n_resamples: int,
+    source: str,
+) -> str:
+    """
+    Hash of the spectrum settings and a stamp of its source data, which changes
+    whenever the excitations do.
+    """
+    settings = json.dumps(
+        [method, molecule or "", params.model_dump(), n_resamples, source]
+    )
+    return hashlib.sha256(settings.encode()).hexdigest()[:16]
+
+
+def directory_stamp(directory: Path) -> str:
+    """
+    Names, sizes and modification times of the outputs in a method directory.
+    """
+    files = sorted(Path(directory).glob("*.out"))
+    files += [path for path in [Path(directory) / "excitations.npy"] if path.exists()]
+    return json.dumps(
+        [(path.name, path.stat().st_size, path.stat().st_mtime_ns) for path in files]
+    )
+
+
+class SpectrumCache:
+    """
+    Computed spectra, sticks and broadened arrays, kept in memory and as one .npz
+    per key under directory.
+    """
+
+    memory: Dict[str, CachedSpectrum] = {}
+
+    def __init__(self, directory: Path = SPECTRUM_CACHE_DIR):
+        self.directory = Path(directory)
+
+    def path(self, key: str) -> Path:
+        return self.directory / f"{key}.npz"
+
+    def get(self, key: str) -> Optional[CachedSpectrum]:
+        path = self.path(key)
+        memory_key = str(path.resolve())
+        if memory_key in self.memory:
+            return self.memory[memory_key]
+        if not path.exists():
+            return None
+        with np.load(path) as data:
+            meta = json.loads(str(data["meta"]))
+            spectrum = Spectrum(
+                label=meta["label"],
+                grid=data["wavelength_nm"],
+                intensity=data["intensity"],
+                lower=data["lower"] if "lower" in data else None,
+                upper=data["upper"] if "upper" in data else None,
+                summary=meta["summary"],
+            )
+            cached = CachedSpectrum(
+                method=meta["method"],
+                molecule=meta["molecule"],
+                params=BroadeningParams(**meta["params"]),
+                n_resamples=meta["n_resamples"],
+                spectrum=spectrum,
+                sticks=data["sticks"],
+            )
+        self.memory[memory_key] = cached
+        return cached
+
+    def put(self, key: str, cached: CachedSpectrum):
+        spectrum = cached.spectrum
+        meta = {
+            "label": spectrum.label,
+            "summary": spectrum.summary,
+            "method": cached.method,
+            "molecule": cached.molecule,
+            "params": cached.params.model_dump(),
+            "n_resamples": cached.n_resamples,
+        }
+        self.directory.mkdir(parents=True, exist_ok=True)
+        path = self.path(key)
+        np.savez(
+            path,
+            meta=json.dumps(meta),
+            sticks=cached.sticks,
+            **spectrum.columns(),
+        )
+        self.memory[str(path.resolve())] = cached
+        logging.info(f"Cached spectrum {spectrum.label} at {path}")
+
+    def entries(self) -> List[CachedSpectrum]:
+        return [self.get(path.stem) for path in sorted(self.directory.glob("*.npz"))]
@@ -0,0 +1,121 @@
+from typing import List, Optional, Sequence
+
+import numpy as np
+
+from src.toddgpt.parsers.excitations import HC_EV_NM
+
+# Uniform energy shifts tried on the computed spectra, in eV. Positive shifts
+# move a computed spectrum to higher energy (shorter wavelength).
+DEFAULT_SHIFTS_EV = np.round(np.arange(-1.5, 1.5 + 1e-9, 0.01), 4)
+
+
+def trapezoid_weights(x: np.ndarray) -> np.ndarray:
+    """
+    Weights w such that (f * w).sum() is the trapezoid integral of f over x.
+    """
+    dx = np.diff(x)
+    weights = np.zeros(len(x))
+    weights[:-1] += dx / 2
+    weights[1:] += dx / 2
+    return weights
+
+
+def shifted_spectra(
+    grid: np.ndarray,
+    spectra: np.ndarray,
+    wavelengths: np.ndarray,
+    shifts_ev: np.ndarray,
+) -> np.ndarray:
+    """
+    Spectra on an increasing wavelength grid, shifted by every energy shift and
+    linearly interpolated at wavelengths. Shape (n_spectra, n_shifts, n_points),
+    zero outside the grid.
+    """
+    energies = HC_EV_NM / wavelengths
+    with np.errstate(divide="ignore", invalid="ignore"):
+        source = HC_EV_NM / (energies[None, :] - shifts_ev[:, None])
+    inside = np.isfinite(source) & (source >= grid[0]) & (source <= grid[-1])
+    source = np.where(inside, source, grid[0])
+    upper = np.clip(np.searchsorted(grid, source), 1, len(grid) - 1)
+    t = (source - grid[upper - 1]) / (grid[upper] - grid[upper - 1])
+    values = spectra[:, upper - 1] * (1 - t) + spectra[:, upper] * t
+    return np.where(inside, values, 0.0)
+
+
+def compare_spectra(
+    grid: np.ndarray,
+    spectra: np.ndarray,
+    wavelengths: np.ndarray,
+    intensity: np.ndarray,
+    shifts_ev: Optional[Sequence[float]] = None,
+    labels: Optional[Sequence[str]] = None,
+) -> List[dict]:
+    """
+    Score computed spectra (one per row, on grid) against an experimental
+    spectrum. Every spectrum is tried at every uniform energy shift in one array
+    operation, and for each the shift with the best cosine similarity is kept.
+    Returns per spectrum the optimal shift, the cosine similarity and overlap
+    (shared area of the area-normalized spectra) before and after it, and the
+    lambda max errors.
+    """
+    grid = np.asarray(grid, dtype=float)
+    spectra = np.atleast_2d(np.asarray(spectra, dtype=float))
+    order = np.argsort(wavelengths)
+    wavelengths = np.asarray(wavelengths, dtype=float)[order]
+    intensity = np.asarray(intensity, dtype=float)[order]
+    shifts_ev = DEFAULT_SHIFTS_EV if shifts_ev is None else np.asarray(shifts_ev)
+    # The unshifted spectrum is always scored
+    shifts_ev = np.union1d(shifts_ev, [0.0])
+    zero = int(np.flatnonzero(shifts_ev == 0.0)[0])
+
+    values = shifted_spectra(grid, spectra, wavelengths, shifts_ev)
+    weights = trapezoid_weights(wavelengths)
+    experiment = intensity / (intensity * weights).sum()
+    area = (values * weights).sum(axis=-1, keepdims=True)
+    normalized = np.divide(values, area, out=np.zeros_like(values), where=area > 0)
+    overlap = (np.minimum(normalized, experiment) * weights).sum(axis=-1)
+    norm = np.sqrt((values**2 * weights).sum(axis=-1) * (experiment**2 * weights).sum())
+    cosine = np.divide(
+        (values * experiment * weights).sum(axis=-1),
+        norm,
+        out=np.zeros_like(norm),
+        where=norm > 0,
+    )
+    best = cosine.argmax(axis=-1)
+
+    experiment_max = float(wavelengths[intensity.argmax()])
+    results = []
+    for i, spectrum in enumerate(spectra):
+        lambda_max = float(grid[spectrum.argmax()])
+        shift = float(shifts_ev[best[i]])
+        results.append(
+            {
+                "label": labels[i] if labels is not None else i,
+                "shift_ev": shift,
+                "cosine": float(cosine[i, best[i]]),
+                "overlap": float(overlap[i, best[i]]),
+                "unshifted_cosine": float(cosine[i, zero]),
+                "unshifted_overlap": float(overlap[i, zero]),
+                "lambda_max_nm": lambda_max,
+                "experimental_lambda_max_nm": experiment_max,
+                "peak_error_nm": lambda_max - experiment_max,
+                "peak_error_ev": HC_EV_NM / lambda_max - HC_EV_NM / experiment_max,
+                "shifted_lambda_max_nm": HC_EV_NM / (HC_EV_NM / lambda_max + shift),
+            }
+        )
+    return results
+
+
+def common_grid(grids: Sequence[np.ndarray]) -> np.ndarray:
+    """
+    Increasing grid spanning every grid, with the finest spacing among them.
+    """
+    low = min(grid.min() for grid in grids)
+    high = max(grid.max() for grid in grids)
+    step = min(np.diff(np.sort(grid)).min() for grid in grids)
+    return np.linspace(low, high, int(np.ceil((high - low) / step)) + 1)
+
+
+def resample(grid: np.ndarray, spectrum: np.ndarray, target: np.ndarray) -> np.ndarray:
+    order = np.argsort(grid)
+    return np.interp(target, grid[order], spectrum[order], left=0.0, right=0.0)
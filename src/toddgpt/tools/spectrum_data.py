@@ -0,0 +1,160 @@
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+from pydantic import BaseModel, ConfigDict
+
+SPECTRA_DIR = Path("./scratch/spectra")
+
+
+def pyplot():
+    """
+    matplotlib.pyplot on the non-interactive Agg backend. Imported on first use
+    so that tools which never render do not pay for it at startup.
+    """
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    return plt
+
+
+class Spectrum(BaseModel):
+    """
+    Broadened spectrum on a wavelength grid, with its bootstrap band when there
+    were enough Wigner samples.
+    """
+
+    model_config = ConfigDict(arbitrary_types_allowed=True)
+
+    label: str
+    grid: np.ndarray
+    intensity: np.ndarray
+    lower: Optional[np.ndarray] = None
+    upper: Optional[np.ndarray] = None
+    summary: dict = {}
+
+    @property
+    def lambda_max_nm(self) -> float:
+        return float(self.grid[np.argmax(self.intensity)])
+
+    def columns(self) -> Dict[str, np.ndarray]:
+        columns = {"wavelength_nm": self.grid, "intensity": self.intensity}
+        if self.lower is not None:
+            columns.update(lower=self.lower, upper=self.upper)
+        return columns
+
+    def save(self, directory: Path = SPECTRA_DIR) -> Dict[str, Path]:
+        """
+        Write the spectrum as <label>.npz and <label>.csv in directory.
+        """
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        columns = self.columns()
+        npz_path = directory / f"{self.label}.npz"
+        np.savez(npz_path, **columns)
+        csv_path = directory / f"{self.label}.csv"
+        np.savetxt(
+            csv_path,
+            np.column_stack(list(columns.values())),
+            delimiter=",",
+            header=",".join(columns),
+            comments="",
+        )
+        return {"npz": npz_path, "csv": csv_path}
+
+    @classmethod
+    def load(cls, path: Path) -> "Spectrum":
+        """
+        Read a spectrum written by save, from its .npz or .csv file.
+        """
+        path = Path(path)
+        if path.suffix == ".csv":
+            with open(path, "r") as f:
+                names = f.readline().strip().split(",")
+            table = np.loadtxt(path, delimiter=",", skiprows=1, ndmin=2)
+            columns = dict(zip(names, table.T))
+            return cls(
+                label=path.stem,
+                grid=columns["wavelength_nm"],
+                intensity=columns["intensity"],
+                lower=columns.get("lower"),
+                upper=columns.get("upper"),
+            )
+        with np.load(path) as data:
+            return cls(
+                label=path.stem,
+                grid=data["wavelength_nm"],
+                intensity=data["intensity"],
+                lower=data["lower"] if "lower" in data else None,
+                upper=data["upper"] if "upper" in data else None,
+            )
+
+    def render(self, directory: Path = SPECTRA_DIR) -> Path:
+        """
+        Plot the spectrum and its band to <label>.png in directory.
+        """
+        plt = pyplot()
+        directory = Path(directory)
+        directory.mkdir(parents=True, exist_ok=True)
+        if self.lower is not None:
+            plt.fill_between(
+                self.grid,
+                self.lower,
+                self.upper,
+                alpha=0.3,
+                label=f"{self.summary.get('confidence', 0.95):.0%} bootstrap interval",
+            )
+        plt.plot(self.grid, self.intensity, linewidth=3, label=self.label)
+        plt.xlabel("Wavelength (nm)")
+        plt.ylabel("Intensity")
+        plt.title(f"UV-Vis Spectrum - {self.label}")
+        plt.legend()
+        path = directory / f"{self.label}.png"
+        plt.savefig(path)
+        plt.close()
+        return path
+
+
+def render_overlay(
+    spectra: List[Spectrum],
+    path: Path,
+    experiment: Optional[Tuple[np.ndarray, np.ndarray]] = None,
+    title: str = "UV-Vis Spectra",
+) -> Path:
+    """
+    Plot spectra, each normalized to a maximum of 1, and optionally the
+    experimental (wavelength, intensity) curve on one figure.
+    """
+    plt = pyplot()
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+    for spectrum in spectra:
+        scale = spectrum.intensity.max() or 1.0
+        if spectrum.lower is not None:
+            plt.fill_between(
+                spectrum.grid, spectrum.lower / scale, spectrum.upper / scale, alpha=0.2
+            )
+        plt.plot(
+            spectrum.grid,
+            spectrum.intensity / scale,
+            linewidth=2,
+            label=spectrum.label,
+        )
+    if experiment is not None:
+        wavelength, intensity = experiment
+        plt.plot(
+            wavelength,
+            intensity / intensity.max(),
+            "k--",
+            linewidth=2,
+            label="experiment",
+        )
+    plt.xlabel("Wavelength (nm)")
+    plt.ylabel("Normalized intensity")
+    plt.title(title)
+    plt.legend()
+    plt.savefig(path)
+    plt.close()
+    return path
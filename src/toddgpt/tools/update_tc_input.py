@@ -1,6 +1,39 @@
 from pydantic import BaseModel
 from langchain_core.tools import BaseTool
-from typing import Type
+from typing import Optional, Type
+
+
+def get_tc_keyword(tc_input: str, keyword: str) -> Optional[str]:
+    """
+    Return the value of a keyword in a tc_input string, or None if it is not set.
+    TeraChem uses the last occurrence when a keyword is repeated.
+    """
+    value = None
+    for line in tc_input.split("\n"):
+        parts = line.split(None, 1)
+        if parts and parts[0].lower() == keyword.lower():
+            value = parts[1].strip() if len(parts) > 1 else ""
+    return value
+
+
+def set_tc_keyword(tc_input: str, keyword: str, value) -> str:
+    """
+    Set a keyword in a tc_input string, appending it if it is not already present.
+    """
+    lines = tc_input.rstrip("\n").split("\n")
+    updated_lines = []
+    found = False
+    for line in lines:
+        parts = line.split(None, 1)
+        if parts and parts[0].lower() == keyword.lower():
+            updated_lines.append(f"{parts[0]} {value}")
+            found = True
+        else:
+            updated_lines.append(line)
+    if not found:
+        updated_lines.append(f"{keyword} {value}")
+    return "\n".join(updated_lines)
+
 
 
 class TemplateTcInput(BaseModel):
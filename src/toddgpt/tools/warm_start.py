@@ -0,0 +1,95 @@
+import logging
+from pathlib import Path
+from typing import Dict, Union
+
+from .datatypes import AtomsDict, geometry_hash
+from .update_tc_input import set_tc_keyword
+
+# Orbital files TeraChem writes to its scratch directory (restricted / unrestricted)
+GUESS_ORBITAL_FILES = ("c0", "ca0", "cb0")
+# File TeraChem writes the CIS/hh-TDA excitation vectors to and reads them back from
+CIS_RESTART_FILE = "cisrestart"
+REFERENCE_INPUT_FILE = "tc.in"
+REFERENCE_GEOMETRY_FILE = "geometry.sha256"
+
+
+def reference_tc_input(tc_input: str) -> str:
+    """
+    Make the reference calculation write its excitation vectors to CIS_RESTART_FILE.
+    """
+    return set_tc_keyword(tc_input, "cisrestart", CIS_RESTART_FILE)
+
+
+def collect_guess_files(
+    files: Dict[str, Union[str, bytes]],
+) -> Dict[str, Union[str, bytes]]:
+    """
+    Pick the orbital and excitation vector files out of the files collected from a
+    reference calculation, keyed by the name they are shipped under.
+    """
+    guess_files = {}
+    for name, data in files.items():
+        basename = Path(name).name
+        if basename in GUESS_ORBITAL_FILES or basename == CIS_RESTART_FILE:
+            guess_files[basename] = data
+    return guess_files
+
+
+def warm_start_tc_input(tc_input: str, guess_files: Dict[str, Union[str, bytes]]) -> str:
+    """
+    Point the SCF and the excited state solver at the shipped guess files.
+    """
+    if "c0" in guess_files:
+        tc_input = set_tc_keyword(tc_input, "guess", "c0")
+    elif "ca0" in guess_files and "cb0" in guess_files:
+        tc_input = set_tc_keyword(tc_input, "guess", "ca0 cb0")
+    else:
+        logging.warning("No reference orbitals found, SCF will start from scratch")
+    if CIS_RESTART_FILE in guess_files:
+        tc_input = set_tc_keyword(tc_input, "cisrestart", CIS_RESTART_FILE)
+    else:
+        logging.warning("No reference excitation vectors found")
+    return tc_input
+
+
+def save_guess_files(
+    reference_dir: Path,
+    tc_input: str,
+    atoms_dict: AtomsDict,
+    guess_files: Dict[str, Union[str, bytes]],
+):
+    reference_dir.mkdir(parents=True, exist_ok=True)
+    # Files of an earlier reference must not be mixed with the new ones
+    for name in GUESS_ORBITAL_FILES + (CIS_RESTART_FILE,):
+        (reference_dir / name).unlink(missing_ok=True)
+    (reference_dir / REFERENCE_INPUT_FILE).write_text(tc_input)
+    (reference_dir / REFERENCE_GEOMETRY_FILE).write_text(geometry_hash(atoms_dict))
+    for name, data in guess_files.items():
+        if isinstance(data, str):
+            data = data.encode("utf-8")
+        (reference_dir / name).write_bytes(data)
+
+
+def load_guess_files(
+    reference_dir: Path, tc_input: str, atoms_dict: AtomsDict
+) -> Dict[str, bytes]:
+    """
+    Load guess files saved by a previous reference calculation. Returns an empty
+    dict if there are none, or if they were computed with a different tc_input
+    or at a different geometry.
+    """
+    saved_input = reference_dir / REFERENCE_INPUT_FILE
+    saved_geometry = reference_dir / REFERENCE_GEOMETRY_FILE
+    if not saved_input.exists() or saved_input.read_text() != tc_input:
+        return {}
+    if (
+        not saved_geometry.exists()
+        or saved_geometry.read_text() != geometry_hash(atoms_dict)
+    ):
+        return {}
+    guess_files = {}
+    for name in GUESS_ORBITAL_FILES + (CIS_RESTART_FILE,):
+        path = reference_dir / name
+        if path.exists():
+            guess_files[name] = path.read_bytes()
+    return guess_files
@@ -63,6 +63,39 @@ def read_tc_hessian(
     return geom, hess
 
 
+def write_tc_hessian(
+    filename,
+    numbers,
+    xyz,
+    hess,
+    displacement,
+    npoint=2,
+):
+    """Writes a Hessian in the TeraChem Hessian binary layout read by read_tc_hessian
+
+    Params:
+        filename (string) - name for TeraChem Hessian file
+        numbers ((natoms) array) - atomic numbers
+        xyz ((natoms,3) np.ndarray) - molecule geometry in au
+        hess ((natoms*3,natoms*3) np.ndarray) - molecule Hessian in au
+        displacement (float) - finite difference displacement in au
+        npoint=2 (int) - number of points in stencil
+
+    """
+
+    natom = len(numbers)
+    G = np.zeros((natom, 4))
+    G[:, :3] = np.reshape(xyz, (natom, 3))
+    G[:, 3] = numbers
+    with open(filename, "wb") as fh:
+        fh.write(np.array([natom, npoint], dtype=np.int32).tobytes())
+        fh.write(np.array([displacement], dtype=np.float64).tobytes())
+        fh.write(G.astype(np.float64).tobytes())
+        fh.write(
+            np.reshape(hess, (natom * 3, natom * 3)).astype(np.float64).tobytes()
+        )
+
+
 # => COM/Inertial Frame Transforms <= #
 
 
@@ -0,0 +1,53 @@
+"""
+Synthetic TeraChem outputs with the same results tables as the real hhtda and wpbe
+outputs, for tests and benchmarks that should not need ChemCloud.
+"""
+
+import numpy as np
+
+SCF_ITERATION = "  {it:>4d}    -230.{it:010d}    1.0e-04    0.000    0.02\n"
+
+
+def hhtda_output(ex_energies_ev, osc_strengths, n_scf=5, ground=-230.5632543125):
+    lines = ["                 *** Start SCF Iterations ***\n"]
+    lines += [SCF_ITERATION.format(it=it) for it in range(n_scf)]
+    lines.append("Final Excited State Results:\n\n")
+    lines.append(
+        " Root   Mult.   Total Energy (a.u.)   Ex. Energy (a.u.)     Ex. Energy (eV)     Ex. Energy (nm)    Osc. (a.u.)\n"
+    )
+    lines.append("-" * 110 + "\n")
+    lines.append(f"    1  singlet   {ground:.10f}\n")
+    for i, (en, osc) in enumerate(zip(ex_energies_ev, osc_strengths)):
+        ex_au = en / 27.211386
+        lines.append(
+            f"  {i + 2:>3d}  singlet   {ground + ex_au:.10f}   {ex_au:.10f}   "
+            f"{en:.4f}   {1239.84193 / en:.4f}   {osc:.4f}\n"
+        )
+    lines.append("\n Job finished\n")
+    return "".join(lines)
+
+
+def wpbe_output(ex_energies_ev, osc_strengths, n_scf=5, ground=-230.5632543125):
+    lines = ["                 *** Start SCF Iterations ***\n"]
+    lines += [SCF_ITERATION.format(it=it) for it in range(n_scf)]
+    lines.append("Final Excited State Results:\n\n")
+    lines.append(
+        "Root   Total Energy (a.u.)   Ex. Energy (eV)   Osc. (a.u.)   < S^2 >   Max CI Coeff.      Excitation\n"
+    )
+    lines.append("-" * 100 + "\n")
+    for i, (en, osc) in enumerate(zip(ex_energies_ev, osc_strengths)):
+        lines.append(
+            f"  {i + 1:>3d}   {ground + en / 27.211386:.10f}   {en:.8f}   {osc:.8f}   "
+            f"{0.0:.8f}   {0.7:.6f}   {14 + i:>3d} -> {15 + i:>3d} : alpha -> alpha\n"
+        )
+    lines.append("\n Job finished\n")
+    return "".join(lines)
+
+
+def random_output(method, n_roots=10, n_scf=5, seed=0):
+    rng = np.random.default_rng(seed)
+    energies = np.sort(rng.uniform(4.0, 9.0, n_roots))
+    osc = rng.uniform(0.0, 0.2, n_roots)
+    if method == "hhtda":
+        return hhtda_output(energies, osc, n_scf), energies, osc
+    return wpbe_output(energies, osc, n_scf), energies, osc
@@ -0,0 +1,87 @@
+from src.toddgpt.tools.artifacts import (
+    ArtifactStore,
+    ReadArtifact,
+    is_handle,
+    resolve_atoms_dict,
+)
+from src.toddgpt.tools.chemcloud_tool import RunTerachem
+from src.toddgpt.tools.datatypes import AtomsDict
+from src.toddgpt.tools.spectra import vision_summary
+from qcio import FileInput, Files, ProgramOutput, Provenance
+import json
+import numpy as np
+import pytest
+
+WATER = AtomsDict(
+    numbers=[8, 1, 1],
+    positions=[[0.0, 0.0, 0.0], [0.0, 0.76, 0.59], [0.0, -0.76, 0.59]],
+)
+
+
+def program_output(success=True):
+    return ProgramOutput(
+        input_data=FileInput(files={"tc.in": "run energy"}, cmdline_args=["tc.in"]),
+        success=success,
+        results=Files(files={"scr.geom/c0": b"\x00\x01\xff"}),
+        stdout="SCF iterations\nFINAL ENERGY: -76.0107465155 a.u.\n" * 200,
+        traceback=None if success else "Traceback\nRuntimeError: SCF did not converge",
+        provenance=Provenance(program="terachem", wall_time=12.5),
+    )
+
+
+def test_round_trip(tmp_path):
+    store = ArtifactStore(tmp_path)
+    array = np.arange(6.0).reshape(2, 3)
+    for payload in [program_output(), WATER, array, "text", {"a": [1, 2]}]:
+        handle = store.save("test", payload)
+        assert is_handle(handle) and len(handle) < 32
+        loaded = store.load(handle)
+        if isinstance(payload, np.ndarray):
+            np.testing.assert_array_equal(loaded, payload)
+        else:
+            assert loaded == payload
+    # Identical payloads share a handle
+    assert store.save("test", "text") == store.save("test", "text")
+    with pytest.raises(ValueError):
+        store.load("artifact:test/000000000000")
+
+
+def test_run_terachem_returns_handle(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    outputs = {}
+
+    def run_terachem(self, tc_input, atoms_dict, extra_files=None):
+        outputs["atoms_dict"] = atoms_dict
+        return program_output(success="fail" not in tc_input)
+
+    monkeypatch.setattr(RunTerachem, "run_terachem", run_terachem)
+    geometry = ArtifactStore().save("geometry", WATER)
+    result = RunTerachem()._run("run energy", geometry)
+    assert outputs["atoms_dict"] == WATER
+    assert len(json.dumps(result)) < 200
+    assert result["success"] and result["final_energy"] == pytest.approx(-76.0107465155)
+    assert result["wall_time"] == 12.5
+    files = ArtifactStore().load(result["artifact"]).results.files
+    assert files["scr.geom/c0"] == b"\x00\x01\xff"
+
+    stdout = ReadArtifact()._run(result["artifact"], field="stdout", max_chars=100)
+    assert len(stdout) == 100 and stdout.endswith("a.u.\n")
+
+    failed = RunTerachem()._run("run energy fail", WATER)
+    assert not failed["success"]
+    assert failed["error"] == "RuntimeError: SCF did not converge"
+
+
+def test_resolve_atoms_dict(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    assert resolve_atoms_dict(WATER) is WATER
+    assert resolve_atoms_dict(ArtifactStore().save("geometry", WATER)) == WATER
+    with pytest.raises(ValueError):
+        resolve_atoms_dict(ArtifactStore().save("vision", {"a": 1}))
+
+
+def test_vision_summary():
+    content = json.dumps({"steps": [{"output": 195.0}], "final_answer": "195 nm"})
+    response = {"choices": [{"message": {"content": content}}], "usage": {}}
+    assert vision_summary(response) == {"answer": "195 nm"}
+    assert vision_summary({"error": {"message": "bad key"}}) == {"error": "bad key"}
@@ -0,0 +1,58 @@
+from src.toddgpt.tools.bootstrap import bootstrap_bands, sample_spectra
+from src.toddgpt.tools.broadening import broaden, default_grid
+from src.toddgpt.parsers.excitations import HC_EV_NM, make_excitations
+from src.toddgpt.parsers.excitations import concatenate_excitations
+import numpy as np
+import pytest
+
+
+def wigner_ensemble(n_samples, spread_nm, seed=0):
+    rng = np.random.default_rng(seed)
+    samples = []
+    for sample in range(n_samples):
+        wavelengths = np.array([180.0, 240.0]) + rng.normal(0, spread_nm, 2)
+        samples.append(
+            make_excitations(
+                sample, [1, 2], [-1.0, -1.0], HC_EV_NM / wavelengths, [0.3, 1.0]
+            )
+        )
+    return concatenate_excitations(samples)
+
+
+def test_sample_spectra_sum_to_spectrum():
+    excitations = wigner_ensemble(10, 5.0)
+    grid = default_grid()
+    samples, spectra = sample_spectra(excitations, grid, osc_scale=2.0)
+    assert samples.tolist() == list(range(10))
+    assert spectra.shape == (10, len(grid))
+    expected = broaden(
+        excitations["ex_energy_ev"], excitations["osc_strength"] / 2.0, grid
+    )
+    assert np.allclose(spectra.sum(axis=0), expected)
+
+
+def test_bootstrap_bands():
+    excitations = wigner_ensemble(30, 5.0)
+    grid = default_grid()
+    _, spectra = sample_spectra(excitations, grid)
+    bands = bootstrap_bands(spectra, grid, n_resamples=500, seed=1)
+    spectrum = spectra.sum(axis=0)
+    assert bands["lower"].shape == bands["upper"].shape == grid.shape
+    assert np.all(bands["lower"] <= spectrum + 1e-12)
+    assert np.all(bands["upper"] >= spectrum - 1e-12)
+    assert bands["lambda_max_nm"] == pytest.approx(240, abs=3)
+    low, high = bands["lambda_max_ci_nm"]
+    assert low <= bands["lambda_max_nm"] <= high
+    assert bootstrap_bands(spectra, grid, n_resamples=500, seed=1)["lambda_max_ci_nm"] == (low, high)
+
+
+def test_bootstrap_narrows_with_samples():
+    grid = default_grid()
+    widths = []
+    for n_samples in [5, 80]:
+        _, spectra = sample_spectra(wigner_ensemble(n_samples, 8.0), grid)
+        bands = bootstrap_bands(spectra, grid, seed=0)
+        # Relative band width at the peak
+        peak = spectra.sum(axis=0).argmax()
+        widths.append((bands["upper"] - bands["lower"])[peak] / spectra.sum(axis=0)[peak])
+    assert widths[1] < widths[0]
@@ -0,0 +1,135 @@
+from src.toddgpt.tools.broadening import (
+    BroadeningParams,
+    auto_grid,
+    broaden,
+    broaden_batch,
+    default_grid,
+    profile,
+    trim_spectrum,
+)
+from src.toddgpt.parsers.excitations import HC_EV_NM
+import numpy as np
+import pytest
+
+rng = np.random.default_rng(0)
+ENERGIES = rng.uniform(3.5, 9.0, 500)
+OSC = rng.random(500)
+
+
+@pytest.mark.parametrize("lineshape", ["gaussian", "lorentzian", "voigt"])
+def test_profile_unit_area(lineshape):
+    x = np.linspace(-2000, 2000, 400_001)
+    area = profile(x, lineshape, 1.0, 1.0).sum() * (x[1] - x[0])
+    assert area == pytest.approx(1.0, abs=1e-3)
+
+
+def test_direct_matches_loop():
+    grid = default_grid()
+    expected = np.zeros(len(grid))
+    for en, osc in zip(ENERGIES[:20], OSC[:20]):
+        expected += osc * profile(grid - HC_EV_NM / en, "gaussian", 5.0)
+    output = broaden(ENERGIES[:20], OSC[:20], grid, method="direct")
+    assert np.allclose(output, expected)
+
+
+@pytest.mark.parametrize("lineshape", ["gaussian", "lorentzian", "voigt"])
+@pytest.mark.parametrize("domain", ["wavelength", "energy"])
+def test_fft_matches_direct(lineshape, domain):
+    grid = default_grid()
+    direct = broaden(ENERGIES, OSC, grid, lineshape, domain=domain, method="direct")
+    fft = broaden(ENERGIES, OSC, grid, lineshape, domain=domain, method="fft")
+    assert np.abs(fft - direct).max() < 2e-3 * direct.max()
+
+
+def test_fft_duplicate_grid_points():
+    grid = default_grid()
+    doubled = np.sort(np.concatenate([grid, grid[::50]]))
+    output = broaden(ENERGIES, OSC, doubled, method="fft")
+    expected = broaden(ENERGIES, OSC, grid, method="fft")
+    assert np.allclose(output[np.searchsorted(doubled, grid)], expected)
+
+
+def test_energy_domain_peak():
+    grid = np.linspace(150, 350, 2001)
+    output = broaden([HC_EV_NM / 250], [1.0], grid, domain="energy", sigma=0.1)
+    assert grid[output.argmax()] == pytest.approx(250, abs=0.1)
+    assert output.max() == pytest.approx(1 / (0.1 * np.sqrt(2 * np.pi)))
+
+
+def test_broaden_errors():
+    assert not broaden([], [], default_grid()).any()
+    with pytest.raises(ValueError):
+        broaden([5.0], [1.0], default_grid(), lineshape="triangle")
+    with pytest.raises(ValueError):
+        broaden([5.0], [1.0], default_grid(), domain="frequency")
+
+
+@pytest.mark.parametrize("lineshape", ["gaussian", "voigt"])
+@pytest.mark.parametrize("domain", ["wavelength", "energy"])
+def test_windowed_matches_direct(lineshape, domain):
+    grid = default_grid()
+    direct = broaden(ENERGIES, OSC, grid, lineshape, domain=domain, method="direct")
+    windowed = broaden(
+        ENERGIES, OSC, grid, lineshape, domain=domain, method="windowed"
+    )
+    assert np.abs(windowed - direct).max() < 1e-3 * direct.max()
+
+
+def test_windowed_lines_outside_grid():
+    grid = np.linspace(200, 300, 101)
+    assert not broaden([HC_EV_NM / 500], [1.0], grid, method="windowed").any()
+
+
+@pytest.mark.parametrize("domain", ["wavelength", "energy"])
+def test_auto_grid_covers_lines(domain):
+    # 150 nm and 600 nm bright lines, a dark one at 50 nm
+    energies = HC_EV_NM / np.array([150.0, 600.0, 50.0])
+    grid = auto_grid(energies, [1.0, 0.5, 1e-6], BroadeningParams(domain=domain))
+    assert np.all(np.diff(grid) > 0)
+    assert grid[0] < 150 - 10 and grid[-1] > 600 + 10
+    assert grid[0] > 50
+    output = broaden(energies, [1.0, 0.5, 1e-6], grid, domain=domain)
+    assert output[0] < 1e-2 * output.max() and output[-1] < 1e-2 * output.max()
+
+
+def test_auto_grid_resolution():
+    grid = auto_grid([5.0], [1.0], BroadeningParams(sigma=1.0))
+    assert np.diff(grid).max() <= 1.0 / 4
+    assert len(auto_grid([], [])) == len(default_grid())
+
+
+def test_trim_spectrum():
+    grid = np.linspace(100, 1000, 901)
+    intensity = broaden([HC_EV_NM / 300], [1.0], grid)
+    trimmed_grid, trimmed = trim_spectrum(grid, intensity)
+    assert 250 < trimmed_grid[0] < 300 < trimmed_grid[-1] < 350
+    assert trimmed.max() == intensity.max()
+
+
+@pytest.mark.parametrize("method", ["windowed", "fft"])
+@pytest.mark.parametrize("domain", ["wavelength", "energy"])
+def test_broaden_batch(method, domain):
+    rng = np.random.default_rng(3)
+    sticks = [
+        (f"mol{i}", rng.uniform(4.0, 8.0, n), rng.random(n))
+        for i, n in enumerate([1, 40, 300, 7])
+    ]
+    sticks.append(("dark", [5.0], [0.0]))
+    params = BroadeningParams(domain=domain)
+    batch = broaden_batch(sticks, params=params, method=method)
+    assert batch.intensity.shape == (5, len(batch.grid))
+    assert batch.ids == ["mol0", "mol1", "mol2", "mol3", "dark"]
+    for row, (_, energies, osc) in zip(batch.intensity, sticks):
+        expected = broaden(energies, osc, batch.grid, domain=domain, method="direct")
+        assert np.abs(row - expected).max() <= 5e-3 * max(expected.max(), 1.0)
+    np.testing.assert_array_equal(
+        batch.lambda_max_nm[:4], batch.grid[batch.intensity[:4].argmax(axis=1)]
+    )
+    assert np.isnan(batch.lambda_max_nm[4])
+    assert batch.rank(HC_EV_NM / 6.0)[-1] == ("dark", pytest.approx(np.nan, nan_ok=True))
+
+
+def test_broaden_batch_grid_keeps_weak_absorbers():
+    # The weak molecule's line is far below the bright one's but still on the grid
+    batch = broaden_batch([("bright", [6.0], [1.0]), ("weak", [3.0], [1e-5])])
+    assert batch.lambda_max_nm[1] == pytest.approx(HC_EV_NM / 3.0, abs=1.0)
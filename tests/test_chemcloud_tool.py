@@ -86,7 +86,7 @@ def test_run_terachem(tc_input, atoms_dict, output_dir):
     if not path.exists():
         path.mkdir(parents=True, exist_ok=True)
     tool = RunTerachem()
-    prog_output = tool._run(tc_input=tc_input, atoms_dict=atoms_dict)
+    prog_output = tool.run_terachem(tc_input, atoms_dict)
     with open(path / "tc.out", "w") as f:
         f.write(prog_output.stdout)
     prog_output.results.save_files(output_dir)
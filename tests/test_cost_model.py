@@ -0,0 +1,114 @@
+from src.toddgpt.tools.cost_model import (
+    CostModel,
+    job_features,
+    longest_first,
+    pick_queue,
+)
+from src.toddgpt.tools import chemcloud_tool
+from src.toddgpt.tools.chemcloud_tool import FindJobExample, RunTerachem
+from src.toddgpt.tools.datatypes import AtomsDict
+from qcio import FileInput, Files, ProgramOutput, Provenance
+import pytest
+
+
+@pytest.mark.parametrize(
+    "job_name, method, basis, nroots, run_type",
+    [
+        ("hhtda", "bhandhlyp", "def2-svp", 10, "energy"),
+        ("wpbe", "wpbe", "aug-cc-pvdz", 10, "energy"),
+        ("initcond", "wb97xd3", "def2-svp", 0, "initcond"),
+    ],
+)
+def test_job_features(job_name, method, basis, nroots, run_type):
+    tc_input = FindJobExample().find_job_example(job_name)
+    features = job_features(tc_input, natoms=11)
+    assert features.method == method
+    assert features.basis == basis
+    assert features.nroots == nroots
+    assert features.run_type == run_type
+
+
+def test_cost_model_fit(tmp_path):
+    tc_input = FindJobExample().find_job_example("wpbe")
+    model = CostModel(tmp_path / "runtimes.jsonl")
+    for natoms in [4, 6, 8, 12, 16, 24]:
+        model.record(job_features(tc_input, natoms), 0.05 * natoms**3)
+
+    prediction = model.predict(job_features(tc_input, 10))
+    assert prediction == pytest.approx(50.0, rel=1e-3)
+
+    # Records are persisted and reloaded
+    reloaded = CostModel(tmp_path / "runtimes.jsonl")
+    assert len(reloaded.records) == 6
+    assert reloaded.predict(job_features(tc_input, 10)) == pytest.approx(prediction)
+
+
+def test_cost_model_accuracy(tmp_path):
+    tc_input = FindJobExample().find_job_example("hhtda")
+    model = CostModel(tmp_path / "runtimes.jsonl")
+    assert model.accuracy() == {"n": 0}
+    model.record(job_features(tc_input, 11), actual=20.0, predicted=10.0)
+    model.record(job_features(tc_input, 11), actual=10.0, predicted=10.0)
+    accuracy = model.accuracy()
+    assert accuracy["n"] == 2
+    assert accuracy["mean_abs_error_s"] == pytest.approx(5.0)
+
+
+def test_longest_first_and_pick_queue():
+    assert longest_first([1.0, 30.0, 5.0]) == [1, 2, 0]
+    queues = [(60.0, "short"), (float("inf"), "long")]
+    assert pick_queue(10.0, queues) == "short"
+    assert pick_queue(600.0, queues) == "long"
+
+
+class FakeFuture:
+    def __init__(self, polls, state, result):
+        self.polls = polls
+        self.state = state
+        self.result = result
+        self.checked = 0
+
+    @property
+    def status(self):
+        self.checked += 1
+        return self.state if self.checked > self.polls else "PENDING"
+
+    def get(self):
+        return self.result
+
+
+def test_iter_terachem_batch(tmp_path, monkeypatch):
+    tc_input = FindJobExample().find_job_example("wpbe")
+    water = AtomsDict(
+        numbers=[8, 1, 1],
+        positions=[[0.0, 0.0, 0.0], [0.0, 0.76, 0.59], [0.0, -0.76, 0.59]],
+    )
+    done = ProgramOutput(
+        input_data=FileInput(files={"tc.in": tc_input}, cmdline_args=["tc.in"]),
+        success=True,
+        results=Files(),
+        stdout="done\n",
+        provenance=Provenance(program="terachem", wall_time=12.0),
+    )
+    # A failure without output and a slow and a quick success
+    futures = [
+        FakeFuture(0, "FAILURE", None),
+        FakeFuture(4, "COMPLETE", done),
+        FakeFuture(0, "COMPLETE", done),
+    ]
+    submitted = iter(futures)
+    monkeypatch.setattr(RunTerachem, "submit", lambda self, inp, queue: next(submitted))
+    sleeps = []
+    monkeypatch.setattr(chemcloud_tool.time, "sleep", sleeps.append)
+
+    model = CostModel(tmp_path / "runtimes.jsonl")
+    results = dict(
+        RunTerachem().iter_terachem_batch(
+            tc_input, [water] * 3, cost_model=model, poll_batch=2, max_interval=4.0
+        )
+    )
+    assert results == {0: None, 1: done, 2: done}
+    assert len(model.records) == 2
+    # Two futures per round; the wait grows while no job completes
+    assert sleeps == [1.0, 1.0, 2.0, 4.0]
+    assert sum(future.checked for future in futures) == 7
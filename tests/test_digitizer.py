@@ -0,0 +1,65 @@
+from src.toddgpt.tools.digitizer import digitize_image, find_axes
+import numpy as np
+import pytest
+from PIL import Image, ImageDraw
+
+LEFT, RIGHT, TOP, BOTTOM = 60, 560, 30, 330
+
+
+def draw_plot(path):
+    """
+    White 600x380 plot with a black frame from 150 to 350 nm, a red Gaussian
+    peaking at 250 nm with height 0.8 of the frame, and a red legend line.
+    """
+    image = Image.new("RGB", (600, 380), "white")
+    draw = ImageDraw.Draw(image)
+    draw.rectangle([LEFT, TOP, RIGHT, BOTTOM], outline="black", width=2)
+    columns = np.arange(LEFT + 5, RIGHT - 5)
+    wavelength = 150 + (columns - LEFT) / (RIGHT - LEFT) * 200
+    height = 0.8 * np.exp(-((wavelength - 250) ** 2) / (2 * 20**2))
+    rows = BOTTOM - height * (BOTTOM - TOP)
+    draw.line(list(zip(columns.tolist(), rows.tolist())), fill=(230, 20, 20), width=3)
+    draw.rectangle([LEFT + 20, TOP + 15, LEFT + 140, TOP + 45], outline="black")
+    legend = [(LEFT + 25, TOP + 30), (LEFT + 60, TOP + 30)]
+    draw.line(legend, fill=(230, 20, 20), width=3)
+    image.save(path)
+
+
+def test_find_axes(tmp_path):
+    draw_plot(tmp_path / "plot.png")
+    pixels = np.asarray(Image.open(tmp_path / "plot.png").convert("RGB"))
+    left, right, top, bottom = find_axes(pixels)
+    assert abs(left - LEFT) <= 1 and abs(right - RIGHT) <= 1
+    assert abs(top - TOP) <= 1 and abs(bottom - BOTTOM) <= 1
+
+
+def test_digitize_image(tmp_path):
+    draw_plot(tmp_path / "plot.png")
+    wavelength, intensity = digitize_image(
+        tmp_path / "plot.png", (150, 350), (0, 1), cache_dir=tmp_path / "cache"
+    )
+    assert wavelength[intensity.argmax()] == pytest.approx(250, abs=1.5)
+    assert intensity.max() == pytest.approx(0.8, abs=0.02)
+    # The legend line is not part of the curve
+    assert wavelength.min() > 150 + 200 * 4 / 500 - 1
+    expected = 0.8 * np.exp(-((wavelength - 250) ** 2) / (2 * 20**2))
+    assert np.abs(intensity - expected).max() < 0.02
+
+    # Second call is served from the cache
+    (cached,) = (tmp_path / "cache").glob("*.npz")
+    np.savez(cached, wavelength_nm=wavelength[:3], intensity=intensity[:3])
+    again, _ = digitize_image(
+        tmp_path / "plot.png", (150, 350), (0, 1), cache_dir=tmp_path / "cache"
+    )
+    assert len(again) == 3
+
+
+def test_digitize_cyclobutanone_asset(tmp_path):
+    wavelength, intensity = digitize_image(
+        "assets/cyclobutanone_spectra.jpg",
+        (160, 220),
+        color="red",
+        cache_dir=tmp_path,
+    )
+    assert wavelength[intensity.argmax()] == pytest.approx(193.7, abs=0.5)
+    assert 167 < wavelength.min() < 169 and 209 < wavelength.max() < 211
@@ -0,0 +1,122 @@
+from src.toddgpt.tools.excitation_db import ExcitationDB, run_key, template_hash
+from src.toddgpt.tools.datatypes import AtomsDict
+from src.toddgpt.parsers.parse_hhtda import get_excitations as get_excitations_hhtda
+from src.toddgpt.parsers.parse_wpbe import get_excitations as get_excitations_wpbe
+from src.toddgpt.parsers.excitations import concatenate_excitations
+from tests.tc_outputs import random_output
+from contextlib import closing
+import io
+import numpy as np
+import sqlite3
+
+WATER = AtomsDict(
+    numbers=[8, 1, 1],
+    positions=[[0.0, 0.0, 0.0], [0.0, 0.76, 0.59], [0.0, -0.76, 0.59]],
+)
+TC_INPUT = "method wpbe\nbasis 6-31g\ncis yes\ncisnumstates 4\n"
+
+
+def test_run_key():
+    key = run_key(WATER, "wpbe", TC_INPUT, molecule=" Water ")
+    assert key.formula == "H2O"
+    assert key.molecule == "water"
+    assert key.basis == "6-31g"
+    assert key.template_hash == template_hash(TC_INPUT)
+    assert key.template_hash != template_hash(TC_INPUT.replace("4", "8"))
+    assert len(key.geometry_hash) == 16
+
+
+def test_add_and_lookup(tmp_path):
+    db = ExcitationDB(tmp_path / "excitations.sqlite")
+    key = run_key(WATER, "wpbe", TC_INPUT, molecule="water")
+    samples = [
+        get_excitations_wpbe(
+            io.StringIO(random_output("wpbe", n_roots=4, seed=i)[0]), sample=i
+        )
+        for i in range(3)
+    ]
+    for excitations in samples:
+        db.add(key, excitations)
+    # Rerunning a sample replaces its rows
+    db.add(key, samples[1])
+
+    stored = ExcitationDB(tmp_path / "excitations.sqlite").lookup("wpbe", "Water")
+    assert np.array_equal(stored, concatenate_excitations(samples))
+    (run,) = db.runs(molecule="water")
+    assert run["n_samples"] == 3 and run["n_excitations"] == 12
+    assert len(db.lookup("hhtda", "water")) == 0
+    assert len(db.lookup("wpbe", "benzene")) == 0
+
+
+def test_lookup_keeps_nan_s2(tmp_path):
+    db = ExcitationDB(tmp_path / "excitations.sqlite")
+    key = run_key(WATER, "hhtda", TC_INPUT.replace("wpbe", "hhtda"))
+    output = random_output("hhtda", n_roots=3)[0]
+    excitations = get_excitations_hhtda(io.StringIO(output), sample=0)
+    db.add(key, excitations)
+    stored = db.lookup("hhtda", formula="H2O")
+    assert np.isnan(stored["s2"]).all()
+    assert np.allclose(stored["ex_energy_ev"], excitations["ex_energy_ev"])
+
+
+def test_lookup_most_recent_run(tmp_path):
+    db = ExcitationDB(tmp_path / "excitations.sqlite")
+    old_output = random_output("wpbe", n_roots=2, seed=1)[0]
+    new_output = random_output("wpbe", n_roots=5, seed=2)[0]
+    old = get_excitations_wpbe(io.StringIO(old_output), sample=0)
+    new = get_excitations_wpbe(io.StringIO(new_output), sample=0)
+    db.add(run_key(WATER, "wpbe", TC_INPUT, "water"), old)
+    db.add(run_key(WATER, "wpbe", TC_INPUT + "convthre 1e-6\n", "water"), new)
+    assert len(db.runs(method="wpbe")) == 2
+    assert np.array_equal(db.lookup("wpbe", "water"), new)
+
+
+def test_isomers_and_new_ensembles(tmp_path):
+    db = ExcitationDB(tmp_path / "excitations.sqlite")
+    # Same formula, different geometry and no name
+    flipped = AtomsDict(numbers=[1, 8, 1], positions=WATER.positions)
+    samples = [
+        get_excitations_wpbe(
+            io.StringIO(random_output("wpbe", n_roots=3, seed=i)[0]), sample=i
+        )
+        for i in range(3)
+    ]
+    water_key = run_key(WATER, "wpbe", TC_INPUT)
+    for excitations in samples:
+        db.add(water_key, excitations)
+    db.add(run_key(flipped, "wpbe", TC_INPUT), samples[0])
+    assert len(db.runs(formula="H2O")) == 2
+
+    # A new, smaller ensemble replaces the whole run
+    db.start_run(water_key)
+    db.add(water_key, samples[2])
+    (run,) = [
+        run for run in db.runs() if run["geometry_hash"] == water_key.geometry_hash
+    ]
+    assert run["n_samples"] == 1
+    assert np.array_equal(db.excitations(run["id"]), samples[2])
+
+
+def test_migrate_runs_without_geometry_hash(tmp_path):
+    path = tmp_path / "excitations.sqlite"
+    with closing(sqlite3.connect(path)) as conn, conn:
+        conn.executescript(
+            "CREATE TABLE runs (id INTEGER PRIMARY KEY, formula TEXT NOT NULL, "
+            "molecule TEXT NOT NULL, method TEXT NOT NULL, basis TEXT NOT NULL, "
+            "template_hash TEXT NOT NULL, updated REAL NOT NULL, "
+            "UNIQUE (formula, molecule, method, basis, template_hash));"
+            "INSERT INTO runs VALUES (1, 'H2O', 'water', 'wpbe', '6-31g', 'abc', 1.0);"
+        )
+    db = ExcitationDB(path)
+    excitations = get_excitations_wpbe(
+        io.StringIO(random_output("wpbe", n_roots=2)[0]), sample=0
+    )
+    with closing(db.connect()) as conn, conn:
+        conn.executemany(
+            "INSERT INTO excitations VALUES (1, ?, ?, ?, ?, ?, ?, ?)",
+            excitations.tolist(),
+        )
+    (run,) = db.runs(molecule="water")
+    assert run["id"] == 1 and run["geometry_hash"] == ""
+    db.add(run_key(WATER, "wpbe", TC_INPUT, "water"), excitations)
+    assert len(db.runs(molecule="water")) == 2
@@ -0,0 +1,95 @@
+from src.toddgpt.tools.experimental_spectra import (
+    ExperimentalSpectraStore,
+    read_csv_spectrum,
+    read_jcamp_spectrum,
+)
+from src.toddgpt.tools.experimental_data import MaxWavelengthTool
+import numpy as np
+import pytest
+
+WAVELENGTH = np.arange(180.0, 341.0, 1.0)
+CROSS_SECTION = 1e-18 * (
+    np.exp(-((WAVELENGTH - 280) ** 2) / 200)
+    + 0.3 * np.exp(-((WAVELENGTH - 195) ** 2) / 50)
+)
+
+JCAMP = """##TITLE=Cyclobutanone
+##JCAMP-DX=4.24
+##DATA TYPE=UV/VIS SPECTRUM
+##NAMES=cyclobutan-1-one
+##$INCHIKEY=SHQSVMDWKBRBGB-UHFFFAOYSA-N
+##ORIGIN=synthetic test data
+##XUNITS=NANOMETERS
+##YUNITS=ABSORBANCE
+##XFACTOR=1.0
+##YFACTOR=1.0E-20
+##FIRSTX=180
+##LASTX=340
+##NPOINTS=161
+##XYDATA=(X++(Y..Y))
+{rows}
+##END=
+"""
+
+
+def write_jcamp(path):
+    y = CROSS_SECTION / 1e-20
+    rows = "\n".join(
+        f"{WAVELENGTH[i]:.0f} " + " ".join(f"{value:.6f}" for value in y[i : i + 10])
+        for i in range(0, len(y), 10)
+    )
+    path.write_text(JCAMP.format(rows=rows))
+
+
+def write_csv(path):
+    lines = ["# name: Acetone", "# synonyms: propanone; dimethyl ketone"]
+    lines.append("wavelength_nm,cross_section")
+    lines += [f"{x},{y}" for x, y in zip(WAVELENGTH, CROSS_SECTION)]
+    path.write_text("\n".join(lines) + "\n")
+
+
+def test_read_jcamp(tmp_path):
+    write_jcamp(tmp_path / "cb.jdx")
+    metadata, wavelength, cross_section = read_jcamp_spectrum(tmp_path / "cb.jdx")
+    assert metadata["name"] == "Cyclobutanone"
+    assert metadata["inchikey"] == "SHQSVMDWKBRBGB-UHFFFAOYSA-N"
+    assert np.allclose(wavelength, WAVELENGTH)
+    assert np.allclose(cross_section, CROSS_SECTION, rtol=1e-5)
+
+
+def test_read_csv(tmp_path):
+    write_csv(tmp_path / "acetone.csv")
+    metadata, wavelength, cross_section = read_csv_spectrum(tmp_path / "acetone.csv")
+    assert metadata["synonyms"] == "propanone; dimethyl ketone"
+    assert np.allclose(wavelength, WAVELENGTH)
+    assert np.allclose(cross_section, CROSS_SECTION)
+
+
+def test_import_and_lookup(tmp_path):
+    write_jcamp(tmp_path / "cb.jdx")
+    write_csv(tmp_path / "acetone.csv")
+    store = ExperimentalSpectraStore(tmp_path / "store")
+    assert len(store.import_directory(tmp_path)) == 2
+
+    store = ExperimentalSpectraStore(tmp_path / "store")
+    for key in ["cyclobutanone", "Cyclobutan-1-one", "SHQSVMDWKBRBGB-UHFFFAOYSA-N"]:
+        assert store.lookup(key).name == "Cyclobutanone"
+    entry = store.lookup("  Dimethyl  Ketone ")
+    assert entry.name == "Acetone"
+    assert entry.analysis["lambda_max_nm"] == 280
+    assert entry.analysis["secondary_peaks"][0]["wavelength_nm"] == 195
+    wavelength, _ = store.spectrum("propanone")
+    assert np.array_equal(wavelength, WAVELENGTH)
+    assert store.lookup("benzene") is None
+
+
+def test_max_wavelength_tool_local(tmp_path, monkeypatch):
+    write_csv(tmp_path / "acetone.csv")
+    ExperimentalSpectraStore(tmp_path / "store").import_directory(tmp_path)
+    monkeypatch.setattr(
+        "src.toddgpt.tools.experimental_data.ExperimentalSpectraStore",
+        lambda: ExperimentalSpectraStore(tmp_path / "store"),
+    )
+    result = MaxWavelengthTool()._run(molecule="propanone")
+    assert result["lambda_max_nm"] == pytest.approx(280)
+    assert "No experimental spectrum" in MaxWavelengthTool()._run(molecule="benzene")
@@ -0,0 +1,58 @@
+from src.toddgpt.tools.fd_hessian import assemble_hessian, displaced_geometries
+from src.toddgpt.tools.wigner.wigner import read_tc_hessian, write_tc_hessian
+from src.toddgpt.parsers.parse_gradient import extract_gradient
+import numpy as np
+import pytest
+
+water_xyz = np.array(
+    [
+        [0.0, 0.0, -0.1294],
+        [0.0, -1.4941, 1.0274],
+        [0.0, 1.4941, 1.0274],
+    ]
+)
+
+gradient_stdout = """
+Gradient units are Hartree/Bohr
+---------------------------------------------------
+        dE/dX            dE/dY            dE/dZ
+   0.0000000000     0.0000000000    -0.0123456789
+  -0.0000000000    -0.0087654321     0.0061728394
+   0.0000000000     0.0087654321     0.0061728394
+---------------------------------------------------
+"""
+
+
+def test_displaced_geometries():
+    displaced = displaced_geometries(water_xyz, step=0.01)
+    assert displaced.shape == (18, 3, 3)
+    assert np.allclose(displaced[0] - water_xyz, [[0.01, 0, 0], [0, 0, 0], [0, 0, 0]])
+    assert np.allclose(displaced[5] - water_xyz, [[0, 0, -0.01], [0, 0, 0], [0, 0, 0]])
+
+
+def test_assemble_hessian_quadratic():
+    rng = np.random.default_rng(0)
+    A = rng.normal(size=(9, 9))
+    K = A @ A.T
+    x0 = water_xyz.ravel()
+    # Gradient of E = 0.5 (x - x0) K (x - x0)
+    gradients = [K @ (x.ravel() - x0) for x in displaced_geometries(water_xyz)]
+    assert np.allclose(assemble_hessian(gradients), K)
+
+
+def test_write_tc_hessian_roundtrip(tmp_path):
+    hess = np.arange(81, dtype=float).reshape(9, 9)
+    hess = hess + hess.T
+    write_tc_hessian(tmp_path / "Hessian.bin", [8, 1, 1], water_xyz, hess, 5.0e-3)
+    geom, hess_read = read_tc_hessian(tmp_path / "Hessian.bin")
+    assert [atom[0] for atom in geom] == ["O", "H", "H"]
+    assert np.allclose([atom[1:] for atom in geom], water_xyz)
+    assert np.allclose(hess_read, hess)
+
+
+def test_extract_gradient():
+    gradient = extract_gradient(gradient_stdout)
+    assert gradient.shape == (3, 3)
+    assert gradient[0, 2] == pytest.approx(-0.0123456789)
+    with pytest.raises(ValueError, match="No gradient"):
+        extract_gradient("no gradient here")
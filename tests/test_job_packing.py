@@ -0,0 +1,41 @@
+from src.toddgpt.tools.job_packing import auto_pack_size, chunk, split_packed_output
+from src.toddgpt.parsers.parse_hhtda import get_uv_vis_data as get_uv_vis_data_hhtda
+from src.toddgpt.parsers.parse_wpbe import get_uv_vis_data as get_uv_vis_data_wpbe
+from tests.tc_outputs import random_output
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize(
+    "natoms, expected",
+    [(11, 15), (3, 32), (40, 1)],
+)
+def test_auto_pack_size(natoms, expected):
+    assert auto_pack_size(natoms) == expected
+
+
+def test_chunk():
+    assert chunk(list(range(5)), 2) == [[0, 1], [2, 3], [4]]
+
+
+@pytest.mark.parametrize(
+    "method, get_uv_vis_data",
+    [("hhtda", get_uv_vis_data_hhtda), ("wpbe", get_uv_vis_data_wpbe)],
+)
+def test_split_packed_output(tmp_path, method, get_uv_vis_data):
+    frames = [random_output(method, n_roots=4, seed=seed) for seed in range(3)]
+    stdout = "TeraChem header\n" + "".join(frame[0] for frame in frames)
+    outputs = split_packed_output(stdout, method, len(frames))
+    assert len(outputs) == 3
+    assert "".join(outputs) == stdout
+    for output, (_, energies, _) in zip(outputs, frames):
+        path = tmp_path / "x.out"
+        path.write_text(output)
+        data = np.array(get_uv_vis_data(path))
+        assert np.allclose(data[:, 0], energies, atol=1e-4)
+
+
+def test_split_packed_output_missing_frame():
+    stdout = random_output("wpbe", n_roots=4)[0]
+    with pytest.raises(ValueError, match="Expected 2 wpbe results blocks"):
+        split_packed_output(stdout, "wpbe", 2)
@@ -0,0 +1,54 @@
+from src.toddgpt.llm_cache import SQLiteLLMCache
+from langchain.agents import AgentExecutor
+from langchain.agents.output_parsers.openai_tools import OpenAIToolsAgentOutputParser
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_core.prompts import ChatPromptTemplate
+
+
+RESPONSES = ["first", "second", "third"]
+
+
+def test_cache_replays_responses(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "llm_cache.sqlite")
+    llm = FakeListChatModel(responses=RESPONSES, cache=cache)
+    assert llm.invoke("hello").content == "first"
+    # A repeated prompt is served from the cache, not the next response
+    assert llm.invoke("hello").content == "first"
+    assert llm.invoke("goodbye").content == "second"
+    assert cache.stats() == {"hits": 1, "misses": 2, "hit_rate": 1 / 3, "entries": 2}
+
+    # Entries persist across sessions
+    reopened = SQLiteLLMCache(tmp_path / "llm_cache.sqlite")
+    llm = FakeListChatModel(responses=RESPONSES, cache=reopened)
+    assert llm.invoke("goodbye").content == "second"
+    assert reopened.stats()["hits"] == 1
+
+    reopened.clear()
+    assert reopened.stats()["entries"] == 0
+
+
+def test_cache_key_includes_model_config(tmp_path):
+    cache = SQLiteLLMCache(tmp_path / "llm_cache.sqlite")
+    FakeListChatModel(responses=["a"], cache=cache).invoke("hello")
+    # Different responses make a different model configuration
+    other = FakeListChatModel(responses=["b"], cache=cache)
+    assert other.invoke("hello").content == "b"
+    assert cache.stats()["misses"] == 2
+
+
+
+def test_cache_used_by_agent_executor(tmp_path):
+    # The agent executor streams the model; the Agent disables streaming when a
+    # cache is configured, as streamed calls never look up the cache
+    cache = SQLiteLLMCache(tmp_path / "llm_cache.sqlite")
+    llm = FakeListChatModel(responses=RESPONSES, cache=cache, disable_streaming=True)
+    assert [chunk.content for chunk in llm.stream("hello")] == ["first"]
+    assert [chunk.content for chunk in llm.stream("hello")] == ["first"]
+
+    prompt = ChatPromptTemplate.from_messages([("human", "{conversation}")])
+    executor = AgentExecutor(
+        agent=prompt | llm | OpenAIToolsAgentOutputParser(), tools=[]
+    )
+    assert executor.invoke({"conversation": "hi"})["output"] == "second"
+    assert executor.invoke({"conversation": "hi"})["output"] == "second"
+    assert cache.stats() == {"hits": 2, "misses": 2, "hit_rate": 0.5, "entries": 2}
@@ -0,0 +1,90 @@
+from src.toddgpt.tools import grab_geom
+from src.toddgpt.tools.artifacts import ArtifactStore
+from src.toddgpt.tools.chemcloud_tool import RunTerachem
+from src.toddgpt.tools.datatypes import AtomsDict
+from src.toddgpt.tools.grab_geom import extract_molecule_from_pubchem
+from src.toddgpt.tools.molecule_registry import REGISTRY, resolve_molecule
+from src.toddgpt.tools.spectra import OptimizeMolecule, RunTDDFT
+from qcio import FileInput, Files, ProgramOutput, Provenance
+import pytest
+
+WATER = AtomsDict(
+    numbers=[8, 1, 1],
+    positions=[[0.0, 0.0, 0.0], [0.0, 0.76, 0.59], [0.0, -0.76, 0.59]],
+)
+OPTIMIZED = AtomsDict(
+    numbers=[8, 1, 1],
+    positions=[[0.0, 0.0, 0.01], [0.0, 0.75, 0.58], [0.0, -0.75, 0.58]],
+)
+
+
+@pytest.fixture(autouse=True)
+def empty_registry(monkeypatch):
+    monkeypatch.setattr(REGISTRY, "molecules", {})
+
+
+def test_register_and_resolve(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    water = REGISTRY.register(WATER, "water", "pubchem")
+    assert water.id == "mol1"
+    assert water.summary() == {
+        "molecule_id": "mol1",
+        "name": "water",
+        "formula": "H2O",
+        "n_atoms": 3,
+        "source": "pubchem",
+    }
+    # Derived geometries keep the name of their parent
+    assert REGISTRY.register(OPTIMIZED, source="mace", parent="mol1").name == "water"
+    assert resolve_molecule("mol2") == OPTIMIZED
+    assert resolve_molecule(WATER) is WATER
+    assert resolve_molecule(ArtifactStore().save("geometry", WATER)) == WATER
+    with pytest.raises(ValueError, match="mol1, mol2"):
+        resolve_molecule("mol7")
+
+
+def test_pubchem_registers_geometry(monkeypatch):
+    monkeypatch.setattr(grab_geom, "fetch_pubchem_geometry", lambda name: WATER)
+    summary = extract_molecule_from_pubchem.invoke({"compound_name": "water"})
+    assert summary["molecule_id"] == "mol1" and "positions" not in summary
+    assert REGISTRY.get("mol1").atoms_dict == WATER
+
+    error = {"error": "No compound found for 'unobtainium'"}
+    monkeypatch.setattr(grab_geom, "fetch_pubchem_geometry", lambda name: error)
+    assert extract_molecule_from_pubchem.invoke({"compound_name": "x"}) == error
+
+
+def test_tools_accept_molecule_ids(monkeypatch):
+    seen = {}
+
+    def run_terachem(self, tc_input, atoms_dict, extra_files=None):
+        seen["terachem"] = atoms_dict
+        return ProgramOutput(
+            input_data=FileInput(files={"tc.in": tc_input}, cmdline_args=["tc.in"]),
+            success=True,
+            results=Files(),
+            stdout="FINAL ENERGY: -76.0 a.u.\n",
+            provenance=Provenance(program="terachem"),
+        )
+
+    def optimize(self, atoms_dict):
+        seen["optimize"] = atoms_dict
+        return OPTIMIZED
+
+    def run_ensemble(self, tc_input, method, files, output_td_dir, **kwargs):
+        seen["key"] = kwargs["key"]
+
+    monkeypatch.setattr(RunTerachem, "run_terachem", run_terachem)
+    monkeypatch.setattr(OptimizeMolecule, "optimize", optimize)
+    monkeypatch.setattr(RunTDDFT, "run_ensemble", run_ensemble)
+
+    water = REGISTRY.register(WATER, "water", "pubchem")
+    assert RunTerachem()._run("run energy", water.id)["success"]
+    assert seen["terachem"] == WATER
+
+    optimized = OptimizeMolecule()._run(water.id)
+    assert seen["optimize"] == WATER
+    assert optimized["molecule_id"] == "mol2" and optimized["name"] == "water"
+
+    RunTDDFT()._run("mol2", "hhtda")
+    assert seen["key"].molecule == "water" and seen["key"].formula == "H2O"
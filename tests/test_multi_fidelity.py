@@ -0,0 +1,97 @@
+from src.toddgpt.tools.multi_fidelity import (
+    apply_state_correction,
+    benchmark_correction,
+    fit_state_correction,
+    loo_error,
+    subset_size,
+)
+from src.toddgpt.tools.spectra import RunMultiFidelityTDDFT, RunTDDFT
+from src.toddgpt.parsers.excitations import sample_id
+from tests.tc_outputs import wpbe_output
+import numpy as np
+import pytest
+
+
+def ensembles(n_samples=50, n_states=4, noise=0.0, seed=0):
+    rng = np.random.default_rng(seed)
+    cheap = rng.normal(loc=[5.0, 6.0, 7.0, 8.0][:n_states], scale=0.2, size=(n_samples, n_states))
+    shift = np.array([-0.3, -0.2, 0.1, 0.4])[:n_states]
+    scale = np.array([1.1, 0.9, 1.0, 1.05])[:n_states]
+    expensive = shift + scale * cheap + rng.normal(scale=noise, size=cheap.shape)
+    return cheap, expensive, shift, scale
+
+
+def test_subset_size():
+    assert subset_size(2) == 2
+    assert subset_size(10) == 3
+    assert subset_size(100) == 10
+
+
+def test_fit_state_correction():
+    cheap, expensive, shift, scale = ensembles()
+    fit_shift, fit_scale = fit_state_correction(cheap[:5], expensive[:5])
+    assert np.allclose(fit_shift, shift)
+    assert np.allclose(fit_scale, scale)
+    assert np.allclose(apply_state_correction(cheap, fit_shift, fit_scale), expensive)
+
+
+def test_fit_state_correction_shift_only():
+    cheap, expensive, _, _ = ensembles()
+    fit_shift, fit_scale = fit_state_correction(cheap[:2], expensive[:2])
+    assert np.allclose(fit_scale, 1.0)
+    assert np.allclose(fit_shift, (expensive[:2] - cheap[:2]).mean(axis=0))
+
+
+def test_benchmark_correction():
+    cheap, expensive, _, _ = ensembles(noise=0.01)
+    report = benchmark_correction(cheap, expensive)
+    assert report["n_subset"] == 5
+    assert report["n_predicted"] == 45
+    assert report["mae_ev"] < 0.05 < report["uncorrected_mae_ev"]
+    assert report["loo_mae_ev"] < 0.05
+
+
+def test_loo_error():
+    cheap, expensive, _, _ = ensembles()
+    assert loo_error(cheap[:5], expensive[:5]) == pytest.approx(0.0, abs=1e-10)
+
+
+def test_multi_fidelity_pairs_samples_by_id(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    wigner_dir = tmp_path / "scratch" / "wigner"
+    wigner_dir.mkdir(parents=True)
+    for i in range(10):
+        (wigner_dir / f"x{i:04d}.xyz").write_text("")
+    # Sample 5 fails with the cheap basis and sample 0 with the expensive one
+    failures = {"wpbe_cheap": {5}, "wpbe_expensive": {0}}
+    inputs = []
+
+    def run_ensemble(self, tc_input, method, files, output_td_dir, **kwargs):
+        inputs.append(tc_input)
+        output_td_dir.mkdir(parents=True, exist_ok=True)
+        shift = 0.3 if output_td_dir.name == "wpbe_expensive" else 0.0
+        succeeded = []
+        for file in files:
+            i = sample_id(file)
+            if i in failures[output_td_dir.name]:
+                continue
+            energies = np.array([5.0 + 0.1 * i, 6.0 + 0.05 * i]) + shift
+            output = wpbe_output(energies, [0.1, 0.2])
+            (output_td_dir / f"{file.stem}.out").write_text(output)
+            succeeded.append(i)
+        return succeeded
+
+    monkeypatch.setattr(RunTDDFT, "run_ensemble", run_ensemble)
+    tc_input = "method wpbe\nbasis aug-cc-pvtz\ncisnumstates 2\nrun energy"
+    report = RunMultiFidelityTDDFT()._run("wpbe", tc_input=tc_input)
+    assert "aug-cc-pvtz" in inputs[1]
+    assert report["n_samples"] == 9 and report["failed_samples"] == [5]
+    # Samples 1 and 2 of the first three succeeded at both levels
+    assert report["n_expensive"] == 2
+    assert np.allclose(report["shift_ev"], 0.3) and np.allclose(report["scale"], 1.0)
+
+    corrected = np.load(tmp_path / "scratch" / "wpbe_mf" / "excitations.npy")
+    samples = corrected["sample"].reshape(9, 2)[:, 0]
+    assert samples.tolist() == [0, 1, 2, 3, 4, 6, 7, 8, 9]
+    expected = 5.3 + 0.1 * samples
+    assert np.allclose(corrected["ex_energy_ev"].reshape(9, 2)[:, 0], expected)
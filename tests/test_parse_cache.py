@@ -0,0 +1,57 @@
+from src.toddgpt.parsers.parse_cache import parse_outputs, sidecar_path
+from src.toddgpt.parsers.parse_wpbe import get_excitations, get_uv_vis_data
+from src.toddgpt.parsers.excitations import EXCITATION_DTYPE
+from tests.tc_outputs import random_output
+import numpy as np
+import os
+
+parsed_files = []
+
+
+def counting_parser(file):
+    parsed_files.append(file.name)
+    return get_uv_vis_data(file)
+
+
+def write_outputs(directory, n):
+    files = []
+    for i in range(n):
+        file = directory / f"x{i:04d}.out"
+        file.write_text(random_output("wpbe", n_roots=3, seed=i)[0])
+        files.append(file)
+    return files
+
+
+def test_parse_outputs_sidecar_cache(tmp_path):
+    files = write_outputs(tmp_path, 3)
+    parsed_files.clear()
+    first = parse_outputs(files, counting_parser, max_workers=1)
+    assert parsed_files == ["x0000.out", "x0001.out", "x0002.out"]
+    assert all(sidecar_path(file).exists() for file in files)
+
+    parsed_files.clear()
+    assert parse_outputs(files, counting_parser, max_workers=1) == first
+    assert parsed_files == []
+
+    # A changed output is parsed again
+    files[1].write_text(random_output("wpbe", n_roots=4, seed=10)[0])
+    os.utime(files[1], ns=(0, 0))
+    second = parse_outputs(files, counting_parser, max_workers=1)
+    assert parsed_files == ["x0001.out"]
+    assert len(second[1]) == 4
+    assert second[0] == first[0]
+
+
+def test_parse_outputs_process_pool(tmp_path):
+    files = write_outputs(tmp_path, 10)
+    results = parse_outputs(files, get_uv_vis_data, max_workers=2)
+    assert results == [get_uv_vis_data(file) for file in files]
+
+
+def test_parse_outputs_structured_sidecar(tmp_path):
+    files = write_outputs(tmp_path, 2)
+    first = parse_outputs(files, get_excitations, max_workers=1)
+    cached = parse_outputs(files, get_excitations, max_workers=1)
+    for parsed, reloaded in zip(first, cached):
+        assert reloaded.dtype == EXCITATION_DTYPE
+        assert np.array_equal(parsed, reloaded)
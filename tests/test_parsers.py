@@ -0,0 +1,90 @@
+from src.toddgpt.parsers.parse_hhtda import extract_energy_data as extract_hhtda
+from src.toddgpt.parsers.parse_hhtda import get_uv_vis_data as get_uv_vis_data_hhtda
+from src.toddgpt.parsers.parse_wpbe import extract_energy_data as extract_wpbe
+from src.toddgpt.parsers.parse_wpbe import get_uv_vis_data as get_uv_vis_data_wpbe
+from src.toddgpt.parsers.parse_hhtda import get_excitations as get_excitations_hhtda
+from src.toddgpt.parsers.parse_wpbe import get_excitations as get_excitations_wpbe
+from src.toddgpt.parsers.parse_tc_stream import WPBE_HEADER, stream_results_table
+from src.toddgpt.parsers.excitations import EXCITATION_DTYPE, concatenate_excitations
+from tests.tc_outputs import random_output
+import io
+import numpy as np
+import pytest
+
+
+def test_extract_hhtda(tmp_path):
+    output, energies, osc = random_output("hhtda", n_roots=5)
+    path = tmp_path / "x0000.out"
+    path.write_text(output)
+    energy_data = extract_hhtda(path)
+    # Ground state row only has the root and total energy
+    assert energy_data[0] == [1, pytest.approx(-230.5632543125)]
+    assert [row[0] for row in energy_data] == [1, 2, 3, 4, 5, 6]
+    uv_vis_data = np.array(get_uv_vis_data_hhtda(path))
+    assert np.allclose(uv_vis_data[:, 0], energies, atol=1e-4)
+    assert np.allclose(uv_vis_data[:, 1], osc, atol=1e-4)
+
+
+def test_extract_wpbe(tmp_path):
+    output, energies, osc = random_output("wpbe", n_roots=5)
+    path = tmp_path / "x0000.out"
+    path.write_text(output)
+    energy_data = extract_wpbe(path)
+    assert energy_data[0]["root"] == 1
+    assert energy_data[0]["excitation"] == ["14", "->", "15", ":", "alpha", "->", "alpha"]
+    uv_vis_data = np.array(get_uv_vis_data_wpbe(path))
+    assert np.allclose(uv_vis_data[:, 0], energies)
+    assert np.allclose(uv_vis_data[:, 1], osc)
+
+
+@pytest.mark.parametrize("chunk_size", [7, 64, 1 << 18])
+def test_stream_results_table_chunks(chunk_size):
+    output = random_output("wpbe", n_roots=12, n_scf=50)[0]
+    rows = stream_results_table(io.StringIO(output), WPBE_HEADER, chunk_size)
+    assert [int(row[0]) for row in rows] == list(range(1, 13))
+
+
+@pytest.mark.parametrize("chunk_size", [7, 1024, 1 << 18])
+def test_stream_results_table_keeps_last_table(chunk_size):
+    first = random_output("wpbe", n_roots=3, seed=1)[0]
+    last, energies, _ = random_output("wpbe", n_roots=5, seed=2)
+    output = first + "trailing\n" * 1000 + last + "trailing\n" * 1000
+    rows = stream_results_table(io.StringIO(output), WPBE_HEADER, chunk_size)
+    assert np.allclose([float(row[2]) for row in rows], energies)
+    # Outputs ending inside the last table
+    truncated = first + last.replace("\n Job finished\n", "")
+    rows = stream_results_table(io.StringIO(truncated), WPBE_HEADER, chunk_size)
+    assert len(rows) == 5
+
+
+def test_stream_results_table_missing():
+    assert stream_results_table(io.StringIO("no results\n"), WPBE_HEADER) == []
+
+
+@pytest.mark.parametrize(
+    "method, get_excitations",
+    [("hhtda", get_excitations_hhtda), ("wpbe", get_excitations_wpbe)],
+)
+def test_get_excitations(tmp_path, method, get_excitations):
+    output, energies, osc = random_output(method, n_roots=5)
+    path = tmp_path / "x0012.out"
+    path.write_text(output)
+    excitations = get_excitations(path)
+    assert excitations.dtype == EXCITATION_DTYPE
+    assert np.all(excitations["sample"] == 12)
+    assert np.allclose(excitations["ex_energy_ev"], energies, atol=1e-4)
+    assert np.allclose(excitations["ex_energy_nm"], 1239.84193 / energies, rtol=1e-4)
+    assert np.allclose(excitations["osc_strength"], osc, atol=1e-4)
+    assert np.isnan(excitations["s2"]).all() == (method == "hhtda")
+
+
+def test_concatenate_excitations(tmp_path):
+    arrays = []
+    for i in range(3):
+        path = tmp_path / f"x{i:04d}.out"
+        path.write_text(random_output("wpbe", n_roots=4, seed=i)[0])
+        arrays.append(get_excitations_wpbe(path))
+    excitations = concatenate_excitations(arrays)
+    assert excitations.shape == (12,)
+    assert excitations["sample"].tolist() == [0] * 4 + [1] * 4 + [2] * 4
+    assert concatenate_excitations([]).dtype == EXCITATION_DTYPE
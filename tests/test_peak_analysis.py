@@ -0,0 +1,54 @@
+from src.toddgpt.tools.peak_analysis import analyze_spectrum, find_spectrum_peaks
+from src.toddgpt.tools.spectra import CheckGeneratedSpectra
+from src.toddgpt.tools.spectrum_data import Spectrum
+import numpy as np
+import pytest
+
+GRID = np.linspace(150, 350, 2001)
+
+
+def gaussian(center, sigma, height):
+    return height * np.exp(-((GRID - center) ** 2) / (2 * sigma**2))
+
+
+def test_analyze_spectrum():
+    intensity = gaussian(250, 10, 1.0) + gaussian(190, 5, 0.4) + gaussian(300, 5, 0.01)
+    analysis = analyze_spectrum(GRID, intensity)
+    assert analysis["lambda_max_nm"] == pytest.approx(250, abs=0.1)
+    assert analysis["fwhm_nm"] == pytest.approx(2 * np.sqrt(2 * np.log(2)) * 10, rel=1e-2)
+    # The 300 nm shoulder is below the prominence threshold
+    (secondary,) = analysis["secondary_peaks"]
+    assert secondary["wavelength_nm"] == pytest.approx(190, abs=0.1)
+    assert secondary["prominence"] == pytest.approx(0.4, rel=1e-2)
+    expected_area = np.sqrt(2 * np.pi) * (10 * 1.0 + 5 * 0.4 + 5 * 0.01)
+    assert analysis["integrated_intensity"] == pytest.approx(expected_area, rel=1e-3)
+
+
+def test_secondary_fwhm_at_half_height():
+    # On a pedestal the prominence of the 190 nm peak is only its gaussian part
+    intensity = gaussian(250, 10, 1.0) + gaussian(190, 5, 0.4) + 0.3
+    (secondary,) = analyze_spectrum(GRID, intensity)["secondary_peaks"]
+    assert secondary["prominence"] == pytest.approx(0.4, rel=1e-2)
+    # Half of the 0.7 height is where the gaussian part is 0.05, i.e. 1/8 of its top
+    expected = 2 * np.sqrt(2 * np.log(8)) * 5
+    assert secondary["fwhm_nm"] == pytest.approx(expected, rel=1e-2)
+
+
+def test_peak_at_grid_edge():
+    peaks = find_spectrum_peaks(GRID, gaussian(140, 10, 1.0))
+    assert peaks[0]["wavelength_nm"] == 150
+
+
+def test_flat_spectrum():
+    analysis = analyze_spectrum(GRID, np.zeros_like(GRID))
+    assert analysis["lambda_max_nm"] is None
+    assert analysis["secondary_peaks"] == []
+
+
+def test_check_generated_spectra_numeric(tmp_path):
+    Spectrum(label="hhtda", grid=GRID, intensity=gaussian(230, 8, 2.0)).save(tmp_path)
+    tool = CheckGeneratedSpectra()
+    for path in ["hhtda.png", "hhtda.npz", "hhtda.csv"]:
+        analysis = tool._run(str(tmp_path / path))
+        assert analysis["lambda_max_nm"] == pytest.approx(230, abs=0.1)
+    assert "use_vision" in tool._run(str(tmp_path / "missing.png"))
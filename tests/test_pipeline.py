@@ -0,0 +1,81 @@
+from src.toddgpt.parsers.excitations import (
+    HC_EV_NM,
+    concatenate_excitations,
+    make_excitations,
+)
+from src.toddgpt.pipeline import (
+    STAGES,
+    PipelineOptions,
+    RunUVVisPipeline,
+    UVVisPipeline,
+)
+from src.toddgpt.tools.datatypes import AtomsDict
+from src.toddgpt.tools.excitation_db import ExcitationDB, run_key
+from src.toddgpt.tools.experimental_spectra import ExperimentalSpectraStore
+from src.toddgpt.tools.spectra import RunHessian, RunTDDFT
+import numpy as np
+import pytest
+
+WATER = AtomsDict(
+    numbers=[8, 1, 1],
+    positions=[[0.0, 0.0, 0.0], [0.0, 0.76, 0.59], [0.0, -0.76, 0.59]],
+)
+
+
+@pytest.fixture
+def offline_stages(tmp_path, monkeypatch):
+    """
+    Replace the PubChem, MACE and TeraChem stages with stand-ins that record
+    the geometry they were given and store a 5 eV absorption.
+    """
+    monkeypatch.chdir(tmp_path)
+    calls = []
+    monkeypatch.setattr(UVVisPipeline, "fetch", lambda self, molecule: WATER)
+    monkeypatch.setattr(UVVisPipeline, "pre_optimize", lambda self, atoms: atoms)
+    monkeypatch.setattr(UVVisPipeline, "optimize", lambda self, atoms: atoms)
+
+    def run_hessian(self, atoms_dict, parallel=False):
+        calls.append(("hessian", atoms_dict))
+
+    def run_tddft(self, atoms_dict, method, molecule=None, **kwargs):
+        calls.append(("tddft", atoms_dict))
+        rng = np.random.default_rng(0)
+        energies = 5.0 + rng.normal(0, 0.05, (4, 2))
+        samples = [
+            make_excitations(i, [1, 2], [-76.0] * 2, energies[i], [0.2, 0.01])
+            for i in range(4)
+        ]
+        key = run_key(atoms_dict, method, "method wpbe\nbasis 6-31g", molecule)
+        ExcitationDB().add(key, concatenate_excitations(samples))
+
+    monkeypatch.setattr(RunHessian, "_run", run_hessian)
+    monkeypatch.setattr(RunTDDFT, "_run", run_tddft)
+    return calls
+
+
+def test_pipeline_runs_every_stage(offline_stages):
+    grid = np.linspace(200, 300, 201)
+    ExperimentalSpectraStore().add(
+        "water", grid, np.exp(-((HC_EV_NM / grid - 5.2) ** 2) / 0.08)
+    )
+    options = PipelineOptions(method="wpbe", n_resamples=100, render=False)
+    result = UVVisPipeline(options).run("water")
+    assert list(result.timings) == list(STAGES)
+    assert [stage for stage, _ in offline_stages] == ["hessian", "tddft"]
+    # Geometries are passed between stages as objects
+    assert all(atoms is WATER for _, atoms in offline_stages)
+    assert result.spectrum.lambda_max_nm == pytest.approx(HC_EV_NM / 5.0, abs=3)
+    assert result.comparison["shift_ev"] == pytest.approx(0.2, abs=0.05)
+    assert set(result.paths) == {"npz", "csv"}
+
+
+def test_pipeline_reuses_stored_excitations(offline_stages):
+    summary = RunUVVisPipeline()._run("water", method="wpbe", atoms_dict=WATER)
+    assert summary["skipped"] == ["pubchem"]
+    assert "png" in summary["paths"] and "comparison" not in summary
+    assert "positions" not in str(summary)
+
+    summary = RunUVVisPipeline()._run("water", method="wpbe")
+    assert summary["skipped"] == list(STAGES[:5])
+    assert list(summary["timings_s"]) == ["spectrum", "compare"]
+    assert len(offline_stages) == 2
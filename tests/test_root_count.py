@@ -0,0 +1,68 @@
+from src.toddgpt.tools.root_count import (
+    get_root_count,
+    highest_root_in_window,
+    probe_root_count,
+    roots_for_window,
+    set_root_count,
+)
+from src.toddgpt.tools.chemcloud_tool import FindJobExample
+from src.toddgpt.tools.update_tc_input import get_tc_keyword
+import numpy as np
+import pytest
+
+
+@pytest.mark.parametrize(
+    "job_name, nroots, keyword, value",
+    [("hhtda", 9, "hhtdasinglets", "10"), ("wpbe", 10, "cisnumstates", "10")],
+)
+def test_root_count_keywords(job_name, nroots, keyword, value):
+    tc_input = FindJobExample().find_job_example(job_name)
+    assert get_root_count(tc_input) == nroots
+    assert get_tc_keyword(tc_input, keyword) == value
+
+    updated = set_root_count(tc_input, 20)
+    assert get_root_count(updated) == 20
+    assert int(get_tc_keyword(updated, "cisguessvecs")) >= 25
+
+
+def test_roots_for_window():
+    # 100 nm edge is 12.4 eV
+    energies = [4.0, 6.0, 8.0, 12.0, 13.0]
+    assert highest_root_in_window(energies[:4], (100.0, 350.0))
+    assert not highest_root_in_window(energies, (100.0, 350.0))
+    assert roots_for_window(energies, (100.0, 350.0), margin=2) == 6
+    assert roots_for_window(energies, (200.0, 350.0), margin=0) == 2
+
+
+def test_probe_root_count():
+    spectrum = np.linspace(4.0, 15.0, 45)  # states up to 15 eV
+    tc_input = FindJobExample().find_job_example("wpbe")
+    probed = []
+
+    def run_probe(probe_input):
+        nroots = get_root_count(probe_input)
+        probed.append(nroots)
+        return spectrum[:nroots]
+
+    nroots = probe_root_count(run_probe, tc_input, (100.0, 350.0), margin=2)
+    assert probed == [10, 20, 40]
+    assert nroots == int(np.sum(spectrum <= 1239.84193 / 100.0)) + 2
+
+
+def test_probe_root_count_without_roots():
+    tc_input = FindJobExample().find_job_example("wpbe")
+    probed = []
+
+    def run_probe(probe_input):
+        probed.append(get_root_count(probe_input))
+        return spectrum[: probed[-1]]
+
+    # A template without cisnumstates still asks for at least one root
+    spectrum = np.array([4.0, 13.0, 14.0])
+    assert probe_root_count(run_probe, tc_input.replace("cisnumstates", "#"), margin=0)
+    assert probed == [1, 2]
+
+    # A probe without excitations fails instead of escalating forever
+    spectrum = np.array([])
+    with pytest.raises(ValueError, match="no excitations"):
+        probe_root_count(run_probe, tc_input)
@@ -0,0 +1,93 @@
+from src.toddgpt.tools.spectrum_accumulator import (
+    ACCUMULATORS,
+    SpectrumAccumulator,
+    current_spectrum,
+)
+from src.toddgpt.tools.chemcloud_tool import RunTerachem
+from src.toddgpt.tools.spectra import GenerateSpectrum, RunTDDFT
+from src.toddgpt.parsers.parse_wpbe import get_excitations
+from src.toddgpt.parsers.excitations import concatenate_excitations
+from tests.tc_outputs import random_output
+from qcio import FileInput, Files, ProgramOutput, Provenance
+import io
+import numpy as np
+
+
+def test_parse_stdout_in_memory(tmp_path):
+    output = random_output("wpbe", n_roots=4)[0]
+    path = tmp_path / "x0003.out"
+    path.write_text(output)
+    from_disk = get_excitations(path)
+    from_stream = get_excitations(io.StringIO(output), sample=3)
+    assert np.array_equal(from_disk, from_stream)
+    assert np.all(get_excitations(io.StringIO(output))["sample"] == -1)
+
+
+def test_accumulator_matches_batch_spectrum():
+    samples = [
+        get_excitations(
+            io.StringIO(random_output("wpbe", n_roots=5, seed=i)[0]), sample=i
+        )
+        for i in range(4)
+    ]
+    accumulator = SpectrumAccumulator()
+    for excitations in samples:
+        accumulator.add(excitations)
+    assert accumulator.n_samples == 4
+
+    excitations = concatenate_excitations(samples)
+    osc = excitations["osc_strength"] / excitations["osc_strength"].max()
+    expected = GenerateSpectrum().broaden(
+        excitations["ex_energy_ev"], osc, accumulator.grid
+    )
+    assert np.allclose(accumulator.intensity(), expected)
+
+
+def test_current_spectrum():
+    ACCUMULATORS.pop("wpbe", None)
+    assert current_spectrum("wpbe") is None
+    ACCUMULATORS["wpbe"] = SpectrumAccumulator()
+    assert current_spectrum("wpbe") is None
+    excitations = get_excitations(io.StringIO(random_output("wpbe", 3)[0]), sample=0)
+    ACCUMULATORS["wpbe"].add(excitations)
+    grid, intensity = current_spectrum("wpbe")
+    assert grid.shape == intensity.shape
+    ACCUMULATORS.pop("wpbe")
+
+
+def test_ensemble_skips_failed_jobs(tmp_path, monkeypatch):
+    xyz = "3\n\nO 0.0 0.0 0.0\nH 0.0 0.76 0.59\nH 0.0 -0.76 0.59\n"
+    files = []
+    for i in range(3):
+        files.append(tmp_path / f"x{i:04d}.xyz")
+        files[-1].write_text(xyz)
+    # An empty stdout, a crashed job and a good one
+    stdouts = ["", "TeraChem started\n", random_output("wpbe", n_roots=4)[0]]
+    tracebacks = [None, "Segmentation fault", None]
+
+    def iter_terachem_batch(self, tc_input, jobs, extra_files=None):
+        for i, (stdout, traceback) in enumerate(zip(stdouts, tracebacks)):
+            yield i, ProgramOutput(
+                input_data=FileInput(files={"tc.in": tc_input}, cmdline_args=["tc.in"]),
+                success=traceback is None,
+                traceback=traceback,
+                results=Files(),
+                stdout=stdout,
+                provenance=Provenance(program="terachem"),
+            )
+
+    monkeypatch.setattr(RunTerachem, "iter_terachem_batch", iter_terachem_batch)
+    output_dir = tmp_path / "wpbe"
+    # Outputs of an earlier run must not stand in for the failed samples
+    output_dir.mkdir()
+    (output_dir / "x0001.out").write_text(random_output("wpbe", n_roots=2)[0])
+    (output_dir / "x0001.out.json").write_text("{}")
+    succeeded = RunTDDFT().run_ensemble("run energy\n", "wpbe", files, output_dir)
+    # The failed samples are logged and skipped, the rest of the batch is kept
+    assert succeeded == [2]
+    assert sorted(path.name for path in output_dir.iterdir()) == [
+        "x0002.out",
+        "x0002.out.json",
+    ]
+    assert ACCUMULATORS["wpbe"].samples == {2}
+    ACCUMULATORS.pop("wpbe")
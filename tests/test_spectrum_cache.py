@@ -0,0 +1,88 @@
+from src.toddgpt.parsers.excitations import concatenate_excitations, make_excitations
+from src.toddgpt.tools.broadening import BroadeningParams
+from src.toddgpt.tools.excitation_db import ExcitationDB, RunKey
+from src.toddgpt.tools.experimental_spectra import ExperimentalSpectraStore
+from src.toddgpt.tools.spectra import GenerateSpectrum, OverlaySpectra, spectrum_label
+from src.toddgpt.tools.spectrum_cache import SpectrumCache
+from pathlib import Path
+import numpy as np
+
+
+def excitations(center_ev, n_samples=4):
+    rng = np.random.default_rng(0)
+    samples = [
+        make_excitations(
+            sample,
+            [1, 2],
+            [-100.0, -100.0],
+            center_ev + rng.normal(0, 0.1, 2) + [0.0, 1.0],
+            [0.3, 0.1],
+        )
+        for sample in range(n_samples)
+    ]
+    return concatenate_excitations(samples)
+
+
+def write_excitations(method, center_ev, n_samples=4):
+    directory = Path(f"./scratch/{method}")
+    directory.mkdir(parents=True, exist_ok=True)
+    np.save(directory / "excitations.npy", excitations(center_ev, n_samples))
+
+
+def test_spectra_are_cached(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    SpectrumCache.memory.clear()
+    write_excitations("hhtda", 5.0)
+    generator = GenerateSpectrum()
+    calls = []
+    original = GenerateSpectrum.spectrum_from_excitations
+
+    def counting(self, excitations, label, *args, **kwargs):
+        calls.append(label)
+        return original(self, excitations, label, *args, **kwargs)
+
+    monkeypatch.setattr(GenerateSpectrum, "spectrum_from_excitations", counting)
+    first = generator.compute_spectrum("hhtda", n_resamples=50)
+    second = generator.compute_spectrum("hhtda", n_resamples=50)
+    assert second is first and calls == ["hhtda"]
+
+    # Other broadening is a separate entry with its own label
+    lorentzian = BroadeningParams(lineshape="lorentzian", gamma=8)
+    wide = generator.compute_spectrum("hhtda", params=lorentzian, n_resamples=50)
+    assert wide.label == spectrum_label("hhtda", params=lorentzian) != "hhtda"
+    assert len(calls) == 2
+
+    # Entries survive a restart, with their stick data
+    SpectrumCache.memory.clear()
+    (entry,) = [e for e in SpectrumCache().entries() if e.params == BroadeningParams()]
+    assert np.array_equal(entry.spectrum.intensity, first.intensity)
+    assert len(entry.sticks) == 8
+    assert generator.compute_spectrum("hhtda", n_resamples=50).label == "hhtda"
+    assert len(calls) == 2
+
+    # New excitations invalidate the entry
+    write_excitations("hhtda", 4.5, n_samples=5)
+    generator.compute_spectrum("hhtda", n_resamples=50)
+    assert len(calls) == 3
+
+
+def test_overlay(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    write_excitations("hhtda", 5.0)
+    write_excitations("wpbe", 5.5)
+    ExperimentalSpectraStore().add(
+        "cyclobutanone", np.linspace(180, 320, 100), np.linspace(0, 1, 100)
+    )
+    message = OverlaySpectra()._run(["hhtda", "wpbe"])
+    assert "overlay_hhtda_wpbe.png" in message
+    assert Path("scratch/spectra/overlay_hhtda_wpbe.png").stat().st_size > 0
+    assert "wpbe" in message and "hhtda" in message
+
+    db = ExcitationDB()
+    for method, center in [("hhtda", 5.0), ("wpbe", 5.5)]:
+        key = RunKey(formula="C4H6O", molecule="cyclobutanone", method=method)
+        db.add(key, excitations(center))
+    message = OverlaySpectra()._run(["hhtda", "wpbe"], molecule="Cyclobutanone")
+    assert "overlay_cyclobutanone_hhtda_wpbe.png" in message
+    assert "No experimental" not in message
+    assert "No stored" in OverlaySpectra()._run(["wpbe"], molecule="water")
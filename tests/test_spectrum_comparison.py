@@ -0,0 +1,59 @@
+from src.toddgpt.parsers.excitations import HC_EV_NM
+from src.toddgpt.tools.experimental_spectra import ExperimentalSpectraStore
+from src.toddgpt.tools.spectra import CompareSpectra
+from src.toddgpt.tools.spectrum_comparison import compare_spectra, shifted_spectra
+from src.toddgpt.tools.spectrum_data import Spectrum
+import numpy as np
+import pytest
+
+GRID = np.linspace(150, 400, 1001)
+EXPERIMENT_GRID = np.linspace(180, 350, 500)
+
+
+def band(center_nm, grid, width_ev=0.2):
+    energy = HC_EV_NM / grid
+    return np.exp(-((energy - HC_EV_NM / center_nm) ** 2) / (2 * width_ev**2))
+
+
+def test_compare_spectra_finds_shift():
+    spectra = np.stack([band(250, GRID), band(230, GRID), band(280, GRID)])
+    results = compare_spectra(
+        GRID, spectra, EXPERIMENT_GRID, band(250, EXPERIMENT_GRID), labels="abc"
+    )
+    assert [result["label"] for result in results] == ["a", "b", "c"]
+    for result, center in zip(results, [250, 230, 280]):
+        expected = HC_EV_NM / 250 - HC_EV_NM / center
+        assert result["shift_ev"] == pytest.approx(expected, abs=0.01)
+        assert result["cosine"] > 0.999
+        assert result["overlap"] > 0.99
+        assert result["shifted_lambda_max_nm"] == pytest.approx(250, abs=1)
+        assert result["peak_error_nm"] == pytest.approx(center - 250, abs=0.5)
+    assert results[0]["unshifted_cosine"] == pytest.approx(1.0)
+    assert results[1]["unshifted_cosine"] < 0.5
+
+
+def test_shifted_spectra_matches_interp():
+    spectra = np.stack([band(250, GRID), band(300, GRID)])
+    shifts = np.array([-0.2, 0.0, 0.3])
+    values = shifted_spectra(GRID, spectra, EXPERIMENT_GRID, shifts)
+    assert values.shape == (2, 3, len(EXPERIMENT_GRID))
+    for j, shift in enumerate(shifts):
+        source = HC_EV_NM / (HC_EV_NM / EXPERIMENT_GRID - shift)
+        expected = np.interp(source, GRID, spectra[1], left=0.0, right=0.0)
+        np.testing.assert_allclose(values[1, j], expected, atol=1e-12)
+
+
+def test_compare_spectra_tool(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)
+    ExperimentalSpectraStore().add(
+        "cyclobutanone", EXPERIMENT_GRID, band(250, EXPERIMENT_GRID)
+    )
+    paths = []
+    for label, center, grid in [("wpbe", 245, GRID), ("hhtda", 270, GRID[::2])]:
+        Spectrum(label=label, grid=grid, intensity=band(center, grid)).save(tmp_path)
+        paths.append(str(tmp_path / f"{label}.png"))
+    results = CompareSpectra()._run(paths, molecule="Cyclobutanone")
+    assert results[0]["cosine"] >= results[1]["cosine"]
+    assert {result["label"] for result in results} == {"wpbe", "hhtda"}
+    assert all(result["cosine"] > 0.99 for result in results)
+    assert "max_wavelength_tool" in CompareSpectra()._run(paths, molecule="benzene")
@@ -0,0 +1,47 @@
+from src.toddgpt.tools.spectrum_data import Spectrum
+import numpy as np
+import subprocess
+import sys
+
+GRID = np.linspace(150, 350, 201)
+INTENSITY = np.exp(-((GRID - 240) ** 2) / 50)
+
+
+def test_save_and_load(tmp_path):
+    spectrum = Spectrum(
+        label="hhtda",
+        grid=GRID,
+        intensity=INTENSITY,
+        lower=INTENSITY / 2,
+        upper=INTENSITY * 2,
+    )
+    paths = spectrum.save(tmp_path)
+    loaded = Spectrum.load(paths["npz"])
+    assert loaded.label == "hhtda"
+    assert np.array_equal(loaded.grid, GRID)
+    assert np.array_equal(loaded.upper, INTENSITY * 2)
+    assert loaded.lambda_max_nm == 240
+
+    table = np.loadtxt(paths["csv"], delimiter=",", skiprows=1)
+    header = paths["csv"].read_text().splitlines()[0]
+    assert header == "wavelength_nm,intensity,lower,upper"
+    assert np.allclose(table[:, 1], INTENSITY)
+
+
+def test_save_without_band(tmp_path):
+    paths = Spectrum(label="wpbe", grid=GRID, intensity=INTENSITY).save(tmp_path)
+    assert Spectrum.load(paths["npz"]).lower is None
+    assert paths["csv"].read_text().splitlines()[0] == "wavelength_nm,intensity"
+
+
+def test_render(tmp_path):
+    path = Spectrum(label="wpbe", grid=GRID, intensity=INTENSITY).render(tmp_path)
+    assert path == tmp_path / "wpbe.png" and path.stat().st_size > 0
+
+
+def test_spectra_import_skips_matplotlib():
+    code = "import sys, src.toddgpt.tools.spectra; print('matplotlib' in sys.modules)"
+    result = subprocess.run(
+        [sys.executable, "-c", code], capture_output=True, text=True, check=True
+    )
+    assert result.stdout.strip().splitlines()[-1] == "False"
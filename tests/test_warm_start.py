@@ -0,0 +1,104 @@
+from src.toddgpt.tools.warm_start import (
+    collect_guess_files,
+    load_guess_files,
+    reference_tc_input,
+    save_guess_files,
+    warm_start_tc_input,
+)
+from src.toddgpt.tools.chemcloud_tool import RunTerachem
+from src.toddgpt.tools.datatypes import AtomsDict
+from src.toddgpt.tools.spectra import RunTDDFT
+from src.toddgpt.tools.update_tc_input import get_tc_keyword, set_tc_keyword
+from qcio import FileInput, Files, ProgramOutput, Provenance
+import pytest
+
+WATER = AtomsDict(
+    numbers=[8, 1, 1],
+    positions=[[0.0, 0.0, 0.0], [0.0, 0.76, 0.59], [0.0, -0.76, 0.59]],
+)
+AMMONIA = AtomsDict(
+    numbers=[7, 1, 1, 1],
+    positions=[
+        [0.0, 0.0, 0.0],
+        [0.0, 0.94, 0.38],
+        [0.81, -0.47, 0.38],
+        [-0.81, -0.47, 0.38],
+    ],
+)
+
+hhtda_input = """coordinates         geom.xyz
+basis               def2-svp
+method              bhandhlyp
+hhtda               yes
+hhtdasinglets       10
+cisnumstates        10
+run                 energy"""
+
+
+@pytest.mark.parametrize(
+    "keyword, value, expected",
+    [
+        ("cisnumstates", 5, "5"),
+        ("guess", "c0", "c0"),
+    ],
+)
+def test_set_tc_keyword(keyword, value, expected):
+    updated = set_tc_keyword(hhtda_input, keyword, value)
+    assert get_tc_keyword(updated, keyword) == expected
+    assert get_tc_keyword(updated, "basis") == "def2-svp"
+
+
+def test_collect_guess_files():
+    files = {
+        "scr.geom/c0": b"\x00\x01",
+        "scr.geom/grad.xyz": "grad",
+        "cisrestart": b"\x02",
+        "tc.in": "input",
+    }
+    assert collect_guess_files(files) == {"c0": b"\x00\x01", "cisrestart": b"\x02"}
+
+
+def test_warm_start_tc_input():
+    tc_input = warm_start_tc_input(hhtda_input, {"c0": b"", "cisrestart": b""})
+    assert get_tc_keyword(tc_input, "guess") == "c0"
+    assert get_tc_keyword(tc_input, "cisrestart") == "cisrestart"
+
+
+def test_guess_files_roundtrip(tmp_path):
+    ref_input = reference_tc_input(hhtda_input)
+    save_guess_files(
+        tmp_path, ref_input, WATER, {"c0": b"\x00", "cisrestart": "vecs"}
+    )
+    assert load_guess_files(tmp_path, ref_input, WATER) == {
+        "c0": b"\x00",
+        "cisrestart": b"vecs",
+    }
+    # A different template must not reuse the saved reference
+    assert load_guess_files(tmp_path, hhtda_input, WATER) == {}
+    # Nor may a different geometry
+    assert load_guess_files(tmp_path, ref_input, AMMONIA) == {}
+
+
+def test_reference_rerun_for_new_geometry(tmp_path, monkeypatch):
+    geometries = []
+
+    def run_terachem(self, tc_input, atoms_dict, extra_files=None):
+        geometries.append(atoms_dict)
+        orbitals = f"orbitals of {len(atoms_dict.numbers)} atoms".encode()
+        return ProgramOutput(
+            input_data=FileInput(files={"tc.in": tc_input}, cmdline_args=["tc.in"]),
+            success=True,
+            results=Files(files={"scr.geom/c0": orbitals, "cisrestart": b"vecs"}),
+            stdout="",
+            provenance=Provenance(program="terachem"),
+        )
+
+    monkeypatch.setattr(RunTerachem, "run_terachem", run_terachem)
+    tool = RunTDDFT()
+    water = tool.prepare_warm_start(hhtda_input, WATER, tmp_path)
+    # The same molecule reuses the reference, another one runs a new one
+    assert tool.prepare_warm_start(hhtda_input, WATER, tmp_path) == water
+    ammonia = tool.prepare_warm_start(hhtda_input, AMMONIA, tmp_path)
+    assert geometries == [WATER, AMMONIA]
+    assert ammonia["c0"] == b"orbitals of 4 atoms"
+    assert load_guess_files(tmp_path, reference_tc_input(hhtda_input), WATER) == {}